@@ -0,0 +1,218 @@
+"""
+Fast Path - Deterministic Rule-Based Routing
+
+Many commands are trivially parseable ("set volume to 60", "brightness 80",
+"open notepad") and don't need an LLM round trip to route. This module
+provides a small grammar of anchored regex rules that resolve such
+high-confidence commands directly to {tool_name, parameters}. Anything
+that no rule matches in full falls through to the LLM router.
+
+Each rule keeps a hit counter so we can see how much LLM traffic the fast
+path removes.
+
+Usage:
+    from app.core.fast_path import FastPathRouter
+
+    fast_path = FastPathRouter()
+    fast_path.match("Set volume to 60")
+    # {'tool_name': 'set_volume', 'parameters': {'level': 60}, ...}
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+def normalize_command(text: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.rstrip(" .!?")
+
+
+@dataclass
+class FastPathRule:
+    """
+    A single deterministic routing rule.
+
+    Attributes:
+        name: Rule identifier used in stats.
+        tool_name: Tool the rule routes to.
+        pattern: Regex that must match the WHOLE normalized command.
+        build: Builds the parameters from the match and the original query,
+            or returns None to reject the match.
+        hits: Number of commands this rule has resolved.
+    """
+    name: str
+    tool_name: str
+    pattern: re.Pattern
+    build: Callable[[re.Match, str], Optional[Dict[str, Any]]]
+    hits: int = 0
+
+
+def _level(match: re.Match, query: str) -> Optional[Dict[str, Any]]:
+    level = int(match.group("level"))
+    # Out-of-range levels are left to the LLM rather than silently clamped
+    return {"level": level} if 0 <= level <= 100 else None
+
+
+def _constant(params: Dict[str, Any]) -> Callable[[re.Match, str], Dict[str, Any]]:
+    return lambda match, query: dict(params)
+
+
+_SET = r"(?:(?:set|turn|change|put|make)\s+)?(?:the\s+)?"
+_LEVEL = r"(?:\s+(?:to|at))?\s+(?P<level>\d{1,3})(?:\s*%|\s+percent)?"
+_SCREEN = r"(?:my\s+|the\s+|this\s+)?(?:screen|display)"
+
+# Names AppLauncherTool knows how to start (its alias table and the
+# display names in it); anything else goes to the LLM
+LAUNCHABLE_APPS = frozenset({
+    "notepad", "calculator", "paint", "explorer", "cmd", "powershell",
+    "chrome", "google chrome", "firefox", "edge", "microsoft edge",
+    "word", "microsoft word", "excel", "microsoft excel",
+    "powerpoint", "microsoft powerpoint", "outlook", "microsoft outlook",
+    "vscode", "visual studio code", "spotify", "discord", "slack",
+    "teams", "microsoft teams",
+})
+_APP = "|".join(re.escape(name) for name in sorted(LAUNCHABLE_APPS, key=len, reverse=True))
+
+DEFAULT_RULES = [
+    # Volume
+    ("volume_level", "set_volume",
+     _SET + r"(?:system\s+|sound\s+)?volume(?:\s+level)?" + _LEVEL, _level),
+    ("volume_mute", "set_volume",
+     r"mute(?:\s+(?:the\s+)?(?:audio|sound|volume|speakers))?", _constant({"mute": True})),
+    ("volume_unmute", "set_volume",
+     r"unmute(?:\s+(?:the\s+)?(?:audio|sound|volume|speakers))?", _constant({"mute": False})),
+    ("volume_get", "set_volume",
+     r"(?:what(?:'s|\s+is)\s+the\s+(?:current\s+)?volume(?:\s+level)?|get\s+(?:the\s+)?(?:current\s+)?volume(?:\s+level)?)",
+     _constant({"action": "get"})),
+
+    # Brightness
+    ("brightness_level", "set_brightness",
+     _SET + r"(?:screen\s+|display\s+)?brightness(?:\s+level)?" + _LEVEL, _level),
+    ("brightness_get", "set_brightness",
+     r"(?:what(?:'s|\s+is)\s+the\s+(?:current\s+)?brightness(?:\s+level)?|get\s+(?:the\s+)?(?:current\s+)?brightness(?:\s+level)?)",
+     _constant({"action": "get"})),
+
+    # App launcher - known app names only
+    ("launch_app", "launch_app",
+     r"(?:open|launch|start|run)\s+(?:the\s+)?(?P<app>" + _APP + r")(?:\s+(?:app|application|program))?",
+     lambda match, query: {"app_name": match.group("app")}),
+
+    # Screen questions
+    ("visual_query", "visual_query",
+     r"(?:what(?:'s|\s+is)\s+on\s+" + _SCREEN
+     + r"|(?:describe|look\s+at|read)\s+" + _SCREEN
+     + r"|what\s+do\s+you\s+see(?:\s+on\s+" + _SCREEN + r")?"
+     + r"|read\s+(?:the\s+|this\s+)?error(?:\s+message)?)",
+     lambda match, query: {"query": query.strip()}),
+
+    # Web browsing
+    ("browse_web", "browse_web",
+     r"(?:(?:search|google)(?:\s+(?:google|the\s+web|online))?\s+for\s+.+"
+     r"|look\s+up\s+.+"
+     r"|(?:go\s+to|visit)\s+(?:https?://)?[\w\-]+(?:\.[\w\-]+)*\.(?:com|org|net|io|dev|edu|gov)\S*)",
+     lambda match, query: {"task_description": query.strip()}),
+]
+
+
+class FastPathRouter:
+    """
+    Resolves high-confidence commands without an LLM call.
+
+    Rules are tried in order and must match the entire normalized
+    command; partial matches never fire, so ambiguous phrasing still goes
+    to the LLM.
+
+    Attributes:
+        rules: Ordered list of FastPathRule.
+        misses: Commands no rule resolved.
+    """
+
+    def __init__(self, rules: Optional[List[FastPathRule]] = None) -> None:
+        """
+        Initialize the fast path.
+
+        Args:
+            rules: Custom rule list (default: DEFAULT_RULES).
+        """
+        if rules is None:
+            rules = [
+                FastPathRule(name, tool, re.compile(pattern), build)
+                for name, tool, pattern, build in DEFAULT_RULES
+            ]
+        self.rules: List[FastPathRule] = rules
+        self.misses = 0
+
+    def add_rule(
+        self,
+        name: str,
+        tool_name: str,
+        pattern: str,
+        build: Callable[[re.Match, str], Optional[Dict[str, Any]]],
+    ) -> None:
+        """
+        Append a rule (patterns are matched against the lowercased command).
+
+        Args:
+            name: Rule identifier.
+            tool_name: Tool to route to.
+            pattern: Regex matched against the whole normalized command.
+            build: Callable(match, original_query) -> parameters, or None
+                to reject the match.
+        """
+        self.rules.append(FastPathRule(name, tool_name, re.compile(pattern), build))
+
+    def match(
+        self,
+        user_query: str,
+        is_available: Optional[Callable[[str], bool]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Try to resolve a command deterministically.
+
+        Args:
+            user_query: Natural language command.
+            is_available: Predicate telling whether a tool can be routed to;
+                rules for unavailable tools are skipped.
+
+        Returns:
+            Routing decision dict, or None to fall back to the LLM.
+        """
+        command = normalize_command(user_query)
+
+        for rule in self.rules:
+            if is_available is not None and not is_available(rule.tool_name):
+                continue
+            match = rule.pattern.fullmatch(command)
+            if match is None:
+                continue
+            parameters = rule.build(match, user_query)
+            if parameters is not None:
+                rule.hits += 1
+                return {
+                    "tool_name": rule.tool_name,
+                    "parameters": parameters,
+                    "source": "fast_path",
+                    "rule": rule.name,
+                }
+
+        self.misses += 1
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get per-rule hit counters.
+
+        Returns:
+            Dictionary with per-rule hits, total hits, misses and hit_rate.
+        """
+        hits = {rule.name: rule.hits for rule in self.rules}
+        total_hits = sum(hits.values())
+        total = total_hits + self.misses
+        return {
+            "hits": hits,
+            "total_hits": total_hits,
+            "misses": self.misses,
+            "hit_rate": total_hits / total if total else 0.0,
+        }
@@ -39,6 +39,9 @@ class ToolRegistry:
     
     Attributes:
         _tools: Internal dictionary mapping tool name to tool instance.
+        version: Counter bumped on every registration, so consumers can
+            cache anything derived from the tool set (e.g. the router's
+            system prompt) and rebuild it only when this changes.
         
     Example:
         registry = ToolRegistry()
@@ -56,6 +59,12 @@ class ToolRegistry:
     def __init__(self) -> None:
         """Initialize an empty tool registry."""
         self._tools: Dict[str, BaseTool] = {}
+        self._version = 0
+    
+    @property
+    def version(self) -> int:
+        """Monotonic counter incremented whenever the tool set changes."""
+        return self._version
     
     def register_tool(self, tool: BaseTool) -> None:
         """
@@ -77,6 +86,7 @@ class ToolRegistry:
             raise ValueError(f"Tool '{tool.name}' is already registered")
         
         self._tools[tool.name] = tool
+        self._version += 1
     
     def get_tool(self, name: str) -> Optional[BaseTool]:
         """
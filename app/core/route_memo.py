@@ -0,0 +1,294 @@
+"""
+Route Memo - Routing Decisions Learned From Execution History
+
+Users repeat the same handful of commands all day. Once a command has been
+routed by the LLM and its tool ran successfully, the decision is stored
+under a query template so the next occurrence skips the LLM entirely.
+
+Templates are the normalized command with standalone numbers replaced by
+slots, so "volume 30" and "Volume 70" share the template "volume <num>".
+Parameters are stored with the same slots and refilled from the new query:
+
+    "set volume to 30"  ->  {"level": 30}
+    template "set volume to <num>"  ->  {"level": {"$slot": 0}}
+    "set volume to 70"  ->  {"level": 70}
+
+Only successful executions are remembered, a failed execution of a
+memoized route forgets it, and the memo is LRU-bounded and optionally
+persisted to SQLite.
+
+Usage:
+    from app.core.route_memo import RouteMemo
+
+    memo = RouteMemo(persistence_path=Path("data/route_memo.db"))
+    memo.remember("set volume to 30", {"tool_name": "set_volume", "parameters": {"level": 30}})
+    memo.recall("Set volume to 70")
+    # {'tool_name': 'set_volume', 'parameters': {'level': 70}, 'source': 'memo', ...}
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.fast_path import normalize_command
+
+NUM_SLOT = "<num>"
+
+_NUMBER = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+
+
+def template_query(user_query: str) -> Tuple[str, List[str]]:
+    """
+    Reduce a command to its template.
+
+    Args:
+        user_query: Natural language command.
+
+    Returns:
+        (template, numbers) where numbers are the slot values in order.
+    """
+    command = normalize_command(user_query)
+    numbers = _NUMBER.findall(command)
+    return _NUMBER.sub(NUM_SLOT, command), numbers
+
+
+def _number(text: str) -> Any:
+    return float(text) if "." in text else int(text)
+
+
+def _abstract(value: Any, query: str, numbers: List[str]) -> Any:
+    """
+    Replace slot-derived values with markers.
+
+    Raises:
+        ValueError: If the value depends on a number in the query in a way
+            that can't be expressed as a slot (so it mustn't be replayed).
+    """
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        for i, number in enumerate(numbers):
+            if _number(number) == value:
+                return {"$slot": i}
+        if numbers:
+            raise ValueError(f"numeric parameter {value!r} not taken from the query")
+        return value
+    if isinstance(value, str):
+        if value.strip() == query.strip():
+            return {"$query": True}
+        if value in numbers:
+            return {"$slot": numbers.index(value), "as": "str"}
+        if set(_NUMBER.findall(value)) & set(numbers):
+            raise ValueError(f"string parameter {value!r} embeds a query number")
+        return value
+    if isinstance(value, dict):
+        return {k: _abstract(v, query, numbers) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_abstract(v, query, numbers) for v in value]
+    return value
+
+
+def _fill(value: Any, query: str, numbers: List[str]) -> Any:
+    """Inverse of _abstract for a new query with the same template."""
+    if isinstance(value, dict):
+        if "$slot" in value:
+            number = numbers[value["$slot"]]
+            return number if value.get("as") == "str" else _number(number)
+        if "$query" in value:
+            return query.strip()
+        return {k: _fill(v, query, numbers) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, query, numbers) for v in value]
+    return value
+
+
+class RouteMemo:
+    """
+    LRU memo of query template -> routing decision.
+
+    Thread-safe. Entries hold the tool name, the abstracted parameters and
+    a hit counter.
+
+    Attributes:
+        hits: Queries answered from the memo.
+        misses: Queries with no usable entry.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        persistence_path: Optional[Path] = None,
+    ) -> None:
+        """
+        Initialize the route memo.
+
+        Args:
+            max_entries: Maximum templates kept (least recently used are dropped).
+            persistence_path: SQLite file to persist the memo across restarts.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # template -> {"tool_name", "parameters", "hits"}
+        self._entries: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        if persistence_path:
+            self._init_database(Path(persistence_path))
+
+    def _init_database(self, path: Path) -> None:
+        """Open the SQLite table and load the most recently used entries."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS route_memo (
+                template TEXT PRIMARY KEY,
+                tool_name TEXT NOT NULL,
+                parameters TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                last_used REAL NOT NULL
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_route_memo_last_used ON route_memo(last_used);
+        """)
+        self._db.commit()
+
+        rows = self._db.execute(
+            """SELECT template, tool_name, parameters, hits FROM (
+                   SELECT * FROM route_memo ORDER BY last_used DESC LIMIT ?
+               ) ORDER BY last_used ASC""",
+            (self.max_entries,),
+        ).fetchall()
+        for template, tool_name, parameters, hits in rows:
+            self._entries[template] = {
+                "tool_name": tool_name,
+                "parameters": json.loads(parameters),
+                "hits": hits,
+            }
+
+    def recall(
+        self,
+        user_query: str,
+        is_available: Optional[Callable[[str], bool]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a routing decision for a query.
+
+        Args:
+            user_query: Natural language command.
+            is_available: Predicate telling whether a tool can be routed to.
+
+        Returns:
+            Routing decision dict (source "memo"), or None.
+        """
+        template, numbers = template_query(user_query)
+
+        with self._lock:
+            entry = self._entries.get(template)
+            if entry is None or (is_available is not None and not is_available(entry["tool_name"])):
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(template)
+            entry["hits"] += 1
+            self.hits += 1
+            if self._db is not None:
+                self._db.execute(
+                    "UPDATE route_memo SET hits = ?, last_used = ? WHERE template = ?",
+                    (entry["hits"], time.time(), template),
+                )
+                self._db.commit()
+
+            return {
+                "tool_name": entry["tool_name"],
+                "parameters": _fill(entry["parameters"], user_query, numbers),
+                "source": "memo",
+                "template": template,
+            }
+
+    def remember(self, user_query: str, decision: Dict[str, Any]) -> bool:
+        """
+        Store a routing decision that executed successfully.
+
+        Args:
+            user_query: The command that was routed.
+            decision: Routing decision with tool_name and parameters.
+
+        Returns:
+            True if stored, False if the parameters can't be templated.
+        """
+        template, numbers = template_query(user_query)
+        try:
+            parameters = _abstract(decision.get("parameters", {}), user_query, numbers)
+        except ValueError:
+            return False
+
+        with self._lock:
+            previous = self._entries.pop(template, None)
+            entry = {
+                "tool_name": decision["tool_name"],
+                "parameters": parameters,
+                "hits": previous["hits"] if previous else 0,
+            }
+            self._entries[template] = entry
+
+            dropped = []
+            while len(self._entries) > self.max_entries:
+                dropped.append(self._entries.popitem(last=False)[0])
+
+            if self._db is not None:
+                self._db.execute(
+                    """INSERT OR REPLACE INTO route_memo (template, tool_name, parameters, hits, last_used)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    (template, entry["tool_name"], json.dumps(parameters), entry["hits"], time.time()),
+                )
+                self._db.executemany(
+                    "DELETE FROM route_memo WHERE template = ?", [(t,) for t in dropped]
+                )
+                self._db.commit()
+
+        return True
+
+    def forget(self, user_query: str) -> None:
+        """Drop the entry for a query's template (e.g. after a failed execution)."""
+        template, _ = template_query(user_query)
+        with self._lock:
+            self._entries.pop(template, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM route_memo WHERE template = ?", (template,))
+                self._db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get memo counters.
+
+        Returns:
+            Dictionary with entries, hits, misses and hit_rate.
+        """
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, user_query: str) -> bool:
+        return template_query(user_query)[0] in self._entries
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -20,10 +20,18 @@ Usage:
 
 import json
 import re
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Callable, Dict, List, Optional
 
+from app.core.fast_path import FastPathRouter
 from app.core.registry import ToolRegistry
+from app.core.route_memo import RouteMemo
+from app.core.schema import build_routing_format, validate_parameters
 from app.utils.result import CommandResult
+from core.cascade import CascadeStats
+from core.llm_cache import ResponseCache
+from core.model_residency import ModelResidencyManager
+from core.structured_output import estimate_num_predict
 
 
 class SemanticRouter:
@@ -36,6 +44,8 @@ class SemanticRouter:
     Attributes:
         registry: ToolRegistry instance containing available tools.
         model: Ollama model name to use for classification.
+        cascade_models: Cheaper models tried before `model`.
+        stats: Per-tier latency and escalation counters.
         
     Example:
         registry = ToolRegistry()
@@ -46,10 +56,35 @@ class SemanticRouter:
         # {'tool_name': 'set_volume', 'parameters': {'level': 80}}
     """
     
+    # Decisions the agent handles itself rather than through a registry tool
+    COMPOSITE_SCHEMAS = {
+        "visual_query": {
+            "type": "object",
+            "properties": {"query": {"type": "string", "maxLength": 300}},
+        },
+    }
+    
+    # general_chat is answered by the agent from the raw query
+    GENERAL_CHAT_SCHEMA = {
+        "type": "object",
+        "properties": {"message": {"type": "string", "maxLength": 300}},
+        "required": ["message"],
+    }
+    
+    # Upper bound on generated tokens for a routing answer
+    MAX_ROUTING_TOKENS = 256
+    
     def __init__(
         self, 
         registry: ToolRegistry, 
-        model: str = "llama3.2:3b"
+        model: str = "llama3.2:3b",
+        cache: Optional[ResponseCache] = None,
+        use_fast_path: bool = True,
+        memo: Optional[RouteMemo] = None,
+        cascade_models: Optional[List[str]] = None,
+        min_confidence: float = 0.5,
+        structured_output: bool = True,
+        residency: Optional[ModelResidencyManager] = None,
     ) -> None:
         """
         Initialize the Semantic Router.
@@ -57,10 +92,49 @@ class SemanticRouter:
         Args:
             registry: ToolRegistry instance with registered tools.
             model: Ollama model name (default: llama3.2:3b).
+            cache: Optional ResponseCache. Routing is near-deterministic
+                (temperature 0.1), so repeated commands can skip Ollama.
+            use_fast_path: Resolve trivially parseable commands with
+                deterministic rules before calling the LLM.
+            memo: Optional RouteMemo of decisions that executed successfully;
+                populated through record_outcome().
+            cascade_models: Faster models to try first, smallest first. An
+                answer that fails validation (unknown tool, bad parameters,
+                low confidence) escalates to the next one, ending at `model`.
+            min_confidence: Reported confidence below which an answer is
+                escalated.
+            structured_output: Constrain answers with a JSON schema built
+                from the registry (Ollama `format`) and cap num_predict to
+                the schema's size.
+            residency: Optional manager supplying per-model keep_alive and
+                recording load times.
         """
         self.registry = registry
         self.model = model
+        self.cache = cache
+        self.fast_path = FastPathRouter() if use_fast_path else None
+        self.memo = memo
+        self.cascade_models = list(cascade_models or [])
+        self.min_confidence = min_confidence
+        self.stats = CascadeStats()
+        self.structured_output = structured_output
+        self.residency = residency
         self._ollama = None
+        
+        # (registry version, prompt/format) - rebuilt only when tools change
+        self._system_prompt: Optional[tuple] = None
+        self._routing_format: Optional[tuple] = None
+    
+    def _is_routable(self, tool_name: str) -> bool:
+        """
+        Check whether a decision for this tool can be handled.
+        
+        visual_query is a composite handled by the agent, so it needs the
+        capture and vision tools rather than a registry entry of its own.
+        """
+        if tool_name == "visual_query":
+            return "capture_screen" in self.registry and "analyze_image" in self.registry
+        return tool_name in self.registry
     
     def _get_ollama(self) -> Any:
         """
@@ -77,6 +151,39 @@ class SemanticRouter:
             self._ollama = ollama
         return self._ollama
     
+    def _get_system_prompt(self) -> str:
+        """
+        Get the system prompt, rebuilding it only if the registry changed.
+        
+        Returns:
+            System prompt string for the LLM.
+        """
+        version = self.registry.version
+        if self._system_prompt is None or self._system_prompt[0] != version:
+            self._system_prompt = (version, self._build_system_prompt())
+        return self._system_prompt[1]
+    
+    def _get_routing_format(self) -> Dict[str, Any]:
+        """
+        Get the JSON schema for routing answers, rebuilt when the registry changes.
+        
+        Returns:
+            Schema with one branch per routable tool.
+        """
+        version = self.registry.version
+        if self._routing_format is None or self._routing_format[0] != version:
+            tools: Dict[str, Optional[Dict[str, Any]]] = {
+                tool.name: tool.parameters
+                for tool in self.registry.get_all_tools()
+                if tool.name != "general_chat"
+            }
+            for name, schema in self.COMPOSITE_SCHEMAS.items():
+                if self._is_routable(name):
+                    tools[name] = schema
+            tools["general_chat"] = self.GENERAL_CHAT_SCHEMA
+            self._routing_format = (version, build_routing_format(tools))
+        return self._routing_format[1]
+    
     def _build_system_prompt(self) -> str:
         """
         Build the system prompt with dynamically injected tool descriptions.
@@ -214,17 +321,27 @@ Output ONLY the JSON object, no explanations or markdown."""
                 "parameters": {"message": response, "parse_error": True}
             }
     
-    def route(self, user_query: str) -> Dict[str, Any]:
+    def route(
+        self,
+        user_query: str,
+        before_llm: Optional[Callable[[], None]] = None,
+    ) -> Dict[str, Any]:
         """
         Route a user query to the appropriate tool.
         
         Args:
             user_query: Natural language command from the user.
+            before_llm: Called once when the query could not be resolved
+                locally and a model is about to be asked (e.g. to start
+                speculative work that overlaps the LLM call).
             
         Returns:
             Dictionary with:
             - tool_name: Name of the tool to execute
             - parameters: Arguments for the tool
+            - source: (optional) "fast_path" or "memo" when resolved without
+              the LLM, or the answering model in cascade mode
+            - warning: (optional) Why the final model's answer looks invalid
             - error: (optional) Error message if routing failed
         """
         if not user_query or not user_query.strip():
@@ -234,6 +351,25 @@ Output ONLY the JSON object, no explanations or markdown."""
                 "error": "Empty query"
             }
         
+        # Deterministic fast path - no LLM call for trivially parseable commands
+        if self.fast_path is not None:
+            started = time.perf_counter()
+            decision = self.fast_path.match(user_query, self._is_routable)
+            self.stats.record("fast_path", time.perf_counter() - started, escalated=decision is None)
+            if decision is not None:
+                return decision
+        
+        # Templates of commands that previously routed and executed fine
+        if self.memo is not None:
+            started = time.perf_counter()
+            decision = self.memo.recall(user_query, self._is_routable)
+            self.stats.record("memo", time.perf_counter() - started, escalated=decision is None)
+            if decision is not None:
+                return decision
+        
+        if before_llm is not None:
+            before_llm()
+        
         try:
             ollama = self._get_ollama()
         except ImportError:
@@ -243,42 +379,187 @@ Output ONLY the JSON object, no explanations or markdown."""
                 "error": "Ollama not installed. Run: pip install ollama"
             }
         
-        # Build the system prompt with available tools
-        system_prompt = self._build_system_prompt()
+        # Model cascade: smallest model first, escalate rejected answers
+        tiers = [*self.cascade_models, self.model]
+        for tier, model in enumerate(tiers, start=1):
+            last = tier == len(tiers)
+            started = time.perf_counter()
+            try:
+                result = self._ask_model(ollama, model, user_query, cache_valid_only=not last)
+            except Exception as e:
+                self.stats.record(model, time.perf_counter() - started, escalated=not last, failed=last)
+                if last:
+                    return {
+                        "tool_name": "general_chat",
+                        "parameters": {"message": user_query},
+                        "error": f"Routing error: {str(e)}"
+                    }
+                continue
+            
+            problem = self.validate_decision(result)
+            self.stats.record(
+                model, time.perf_counter() - started,
+                escalated=problem is not None and not last,
+                failed=problem is not None and last,
+            )
+            if problem is None:
+                if self.cascade_models:
+                    result["source"] = model
+                return result
+            if last:
+                result["warning"] = problem
+                return result
+    
+    def _ask_model(
+        self,
+        ollama: Any,
+        model: str,
+        user_query: str,
+        cache_valid_only: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Ask one model for a routing decision (through the response cache).
+        
+        Args:
+            ollama: Ollama client module.
+            model: Model to ask.
+            user_query: Natural language command.
+            cache_valid_only: Only cache answers that pass validation, so a
+                rejected answer from a cheap tier isn't replayed.
+            
+        Returns:
+            Parsed decision with tool_name and parameters.
+        """
+        # System prompt with available tools (cached per registry version)
+        system_prompt = self._get_system_prompt()
         
-        try:
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_query}
+        ]
+        options = {
+            "temperature": 0.1,  # Low temperature for consistent classification
+            "num_predict": self.MAX_ROUTING_TOKENS   # Limit response length
+        }
+        request = {}
+        if self.structured_output:
+            # The answer can only be one of the tool branches. Strings are
+            # priced by their maxLength; one without (a tool that doesn't
+            # bound it) can be longer than the query, so it gets the whole
+            # budget
+            routing_format = self._get_routing_format()
+            options["num_predict"] = estimate_num_predict(
+                routing_format,
+                text_tokens=self.MAX_ROUTING_TOKENS,
+                cap=self.MAX_ROUTING_TOKENS,
+            )
+            request["format"] = routing_format
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(model, messages, options, **request)
+        
+        cached = self.cache.get(cache_key) if cache_key else None
+        
+        if cached is not None:
+            llm_response = cached
+        else:
+            # keep_alive doesn't change the answer, so it isn't part of the cache key
+            if self.residency is not None:
+                request["keep_alive"] = self.residency.keep_alive(model)
+            
             # Call Ollama for intent classification
             response = ollama.chat(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_query}
-                ],
-                options={
-                    "temperature": 0.1,  # Low temperature for consistent classification
-                    "num_predict": 256   # Limit response length
-                }
+                model=model,
+                messages=messages,
+                options=options,
+                **request,
             )
             
+            if self.residency is not None:
+                self.residency.record_use(model, response.get("load_duration"))
+            
             # Extract the response content
             llm_response = response["message"]["content"]
+        
+        # Parse the JSON response
+        result = self._parse_response(llm_response)
+        
+        # Only remember answers that parse, so a bad one isn't replayed
+        if cache_key and cached is None and "parse_error" not in result["parameters"]:
+            if not cache_valid_only or self.validate_decision(result) is None:
+                self.cache.put(cache_key, llm_response)
+        
+        return result
+    
+    def validate_decision(self, decision: Dict[str, Any]) -> Optional[str]:
+        """
+        Check a model's routing decision against the registry.
+        
+        The tool must exist (or be a composite the agent handles), the
+        parameters must match the tool's schema, and any confidence the
+        model reported must reach min_confidence.
+        
+        Args:
+            decision: Parsed decision with tool_name and parameters.
             
-            # Parse the JSON response
-            result = self._parse_response(llm_response)
-            
-            # Validate tool exists
-            if result["tool_name"] != "general_chat":
-                if result["tool_name"] not in self.registry:
-                    result["warning"] = f"Tool '{result['tool_name']}' not found in registry"
-            
-            return result
-            
-        except Exception as e:
-            return {
-                "tool_name": "general_chat",
-                "parameters": {"message": user_query},
-                "error": f"Routing error: {str(e)}"
-            }
+        Returns:
+            None if the decision is usable, otherwise the reason it isn't.
+        """
+        tool_name = decision.get("tool_name")
+        parameters = decision.get("parameters")
+        
+        if isinstance(parameters, dict) and parameters.get("parse_error"):
+            return "Unparseable routing response"
+        
+        confidence = decision.get("confidence")
+        if isinstance(confidence, (int, float)) and confidence < self.min_confidence:
+            return f"Low confidence ({confidence:.2f})"
+        
+        # general_chat is answered from the raw query, its parameters don't matter
+        if tool_name == "general_chat":
+            return None
+        
+        if tool_name in self.COMPOSITE_SCHEMAS:
+            if not self._is_routable(tool_name):
+                return f"Tool '{tool_name}' not available"
+            schema = self.COMPOSITE_SCHEMAS[tool_name]
+        else:
+            tool = self.registry.get_tool(tool_name) if isinstance(tool_name, str) else None
+            if tool is None:
+                return f"Tool '{tool_name}' not found in registry"
+            schema = tool.parameters
+        
+        problem = validate_parameters(schema, parameters)
+        if problem:
+            return f"Invalid parameters for '{tool_name}': {problem}"
+        return None
+    
+    def record_outcome(
+        self,
+        user_query: str,
+        decision: Dict[str, Any],
+        result: CommandResult,
+    ) -> None:
+        """
+        Feed a tool execution result back into the route memo.
+        
+        Successful LLM routes are memoized; a failed memoized route is
+        forgotten so the LLM gets another look next time. Fast path
+        decisions are already free and aren't stored.
+        
+        Args:
+            user_query: The command that was routed.
+            decision: The decision returned by route().
+            result: CommandResult from executing the tool.
+        """
+        if self.memo is None or decision.get("source") == "fast_path":
+            return
+        if result.success:
+            if "error" not in decision and "warning" not in decision:
+                self.memo.remember(user_query, decision)
+        elif decision.get("source") == "memo":
+            self.memo.forget(user_query)
     
     def route_and_execute(self, user_query: str) -> CommandResult:
         """
@@ -324,7 +605,9 @@ Output ONLY the JSON object, no explanations or markdown."""
             )
         
         # Execute the tool with extracted parameters
-        return tool.execute(**parameters)
+        result = tool.execute(**parameters)
+        self.record_outcome(user_query, route_result, result)
+        return result
 
 
 # =============================================================================
@@ -0,0 +1,120 @@
+"""
+Parameter Schemas - Validation of Routed Tool Parameters
+
+Tools may describe their parameters with a small JSON Schema subset
+(see BaseTool.parameters). The router uses it to check a model's routing
+decision before executing anything, so a malformed answer from a small
+model can be escalated instead of failing at the tool.
+
+Supported keywords: type, properties, required, enum, minimum, maximum,
+additionalProperties (False only). maxLength on a string isn't checked
+here; it bounds the routing format (and so the routing call's num_predict).
+
+The same schemas build the `format` passed to Ollama for routing calls, so
+the model can only emit a tool name that exists with parameters shaped
+for that tool.
+
+Usage:
+    from app.core.schema import validate_parameters
+
+    schema = {
+        "type": "object",
+        "properties": {"level": {"type": "integer", "minimum": 0, "maximum": 100}},
+    }
+    validate_parameters(schema, {"level": 150})
+    # "level: 150 is above the maximum 100"
+"""
+
+from typing import Any, Dict, Optional
+
+_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "object": (dict,),
+    "array": (list,),
+}
+
+
+def _check(schema: Dict[str, Any], value: Any, path: str) -> Optional[str]:
+    label = path or "parameters"
+    expected = schema.get("type")
+    if expected is not None:
+        names = expected if isinstance(expected, list) else [expected]
+        types = tuple(t for name in names for t in _TYPES.get(name, (object,)))
+        # bool is an int subclass, but true is never a valid volume level
+        if isinstance(value, bool) and "boolean" not in names:
+            return f"{label}: expected {expected}, got boolean"
+        if not isinstance(value, types):
+            return f"{label}: expected {expected}, got {type(value).__name__}"
+
+    if "enum" in schema and value not in schema["enum"]:
+        return f"{label}: {value!r} is not one of {schema['enum']}"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if "minimum" in schema and value < schema["minimum"]:
+            return f"{label}: {value} is below the minimum {schema['minimum']}"
+        if "maximum" in schema and value > schema["maximum"]:
+            return f"{label}: {value} is above the maximum {schema['maximum']}"
+
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in value:
+                return f"{label}: missing required parameter '{key}'"
+        for key, item in value.items():
+            if key in properties:
+                error = _check(properties[key], item, f"{path}.{key}" if path else key)
+                if error:
+                    return error
+            elif schema.get("additionalProperties") is False:
+                return f"{label}: unexpected parameter '{key}'"
+    return None
+
+
+def validate_parameters(schema: Optional[Dict[str, Any]], parameters: Any) -> Optional[str]:
+    """
+    Validate routed parameters against a tool's schema.
+
+    Args:
+        schema: JSON Schema subset, or None for tools without one.
+        parameters: Parameters produced by the router.
+
+    Returns:
+        None if valid, otherwise a short description of the first problem.
+    """
+    if not isinstance(parameters, dict):
+        return f"parameters must be an object, got {type(parameters).__name__}"
+    if schema is None:
+        return None
+    return _check(schema, parameters, "")
+
+
+def build_routing_format(tools: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Build the JSON schema for a routing answer.
+
+    One branch per tool pins tool_name to the tool and parameters to its
+    schema (a free-form object for tools without one).
+
+    Args:
+        tools: Tool name -> parameter schema (or None).
+
+    Returns:
+        JSON schema suitable for Ollama's `format` option.
+    """
+    branches = []
+    for name, schema in tools.items():
+        if schema is None:
+            parameters: Dict[str, Any] = {"type": "object"}
+        else:
+            parameters = {"additionalProperties": False, **schema}
+        branches.append({
+            "type": "object",
+            "properties": {
+                "tool_name": {"const": name},
+                "parameters": parameters,
+            },
+            "required": ["tool_name", "parameters"],
+        })
+    return {"anyOf": branches}
@@ -0,0 +1,202 @@
+"""
+Speculative Chat - Start the Chat Reply While Routing Resolves
+
+A conversational turn normally pays for two LLM calls in a row: the router
+decides "general_chat", then ChatTool generates the reply. In speculative
+mode the reply starts generating at the same time as routing. If routing
+picks general_chat, the reply is already underway. If it picks a real
+tool, the speculative generation is cancelled and its tokens are counted
+as waste. A multi-turn chat tool (one with commit_turn) holds the reply
+out of the conversation until result() uses it, so a reply that is never
+used never becomes part of the conversation.
+
+Speculation only helps if Ollama can serve both requests at once
+(OLLAMA_NUM_PARALLEL > 1, or separate models). Commands the router
+resolves without an LLM never start a speculation, because the router
+calls `before_llm` only when it is about to ask a model.
+
+Usage:
+    from app.core.speculative import SpeculativeChat
+
+    speculative = SpeculativeChat(chat_tool)
+    speculation = speculative.prepare(user_query)
+    try:
+        decision = router.route(user_query, before_llm=speculation.start)
+        if decision["tool_name"] == "general_chat":
+            result = speculation.result()
+    finally:
+        speculation.cancel()  # no-op once the result was used
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+from app.interfaces.tool import BaseTool
+from app.utils.result import CommandResult
+
+
+@dataclass
+class SpeculationStats:
+    """
+    Counters for speculative chat generations.
+
+    Attributes:
+        launched: Speculations started alongside routing.
+        used: Speculations whose reply was used.
+        cancelled: Speculations thrown away because routing picked a tool.
+        used_tokens: Tokens generated by used speculations.
+        wasted_tokens: Tokens generated by cancelled speculations.
+        head_start: Seconds of generation done before routing finished,
+            summed over used speculations.
+    """
+    launched: int = 0
+    used: int = 0
+    cancelled: int = 0
+    used_tokens: int = 0
+    wasted_tokens: int = 0
+    head_start: float = 0.0
+
+    @property
+    def waste_rate(self) -> float:
+        """Share of speculative tokens that were thrown away."""
+        total = self.used_tokens + self.wasted_tokens
+        return self.wasted_tokens / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["waste_rate"] = self.waste_rate
+        return data
+
+
+class Speculation:
+    """
+    One query's speculative chat reply.
+
+    Created by SpeculativeChat.prepare(). Nothing runs until start() is
+    called; result() works either way (it generates synchronously if the
+    speculation was never started).
+    """
+
+    def __init__(self, owner: "SpeculativeChat", query: str) -> None:
+        self._owner = owner
+        self.query = query
+        self._cancel_event = threading.Event()
+        self._future: Optional[Future] = None
+        self._started_at = 0.0
+        self._settled = False
+
+    @property
+    def started(self) -> bool:
+        """True once the speculative generation was launched."""
+        return self._future is not None
+
+    def start(self) -> None:
+        """Launch the chat generation in the background (idempotent)."""
+        if self._future is None and not self._settled:
+            self._started_at = time.perf_counter()
+            self._future = self._owner._launch(self.query, self._cancel_event)
+
+    def result(self, timeout: Optional[float] = None) -> CommandResult:
+        """
+        Use the speculative reply.
+
+        Args:
+            timeout: Seconds to wait for the generation to finish.
+
+        Returns:
+            CommandResult from ChatTool.
+        """
+        if self._future is None:
+            self._settled = True
+            return self._owner.chat_tool.execute(query=self.query)
+
+        head_start = time.perf_counter() - self._started_at
+        result = self._future.result(timeout)
+        if not self._settled:
+            self._settled = True
+            self._owner._record_used(result, head_start)
+        return result
+
+    def cancel(self) -> None:
+        """Stop the speculation if its reply wasn't used (idempotent)."""
+        if self._settled:
+            return
+        self._settled = True
+        if self._future is None:
+            return
+        self._cancel_event.set()
+        self._future.add_done_callback(self._owner._record_cancelled)
+
+
+class SpeculativeChat:
+    """
+    Runs ChatTool generations speculatively, alongside routing.
+
+    Attributes:
+        chat_tool: Tool used to generate replies (accepts cancel_event).
+        stats: SpeculationStats counters.
+    """
+
+    def __init__(self, chat_tool: BaseTool, max_workers: int = 2) -> None:
+        """
+        Initialize speculative chat.
+
+        Args:
+            chat_tool: ChatTool (or compatible) instance.
+            max_workers: Maximum speculations generating at once.
+        """
+        self.chat_tool = chat_tool
+        self.stats = SpeculationStats()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="speculative-chat"
+        )
+
+    def prepare(self, query: str) -> Speculation:
+        """Create a not-yet-started speculation for a query."""
+        return Speculation(self, query)
+
+    def _launch(self, query: str, cancel_event: threading.Event) -> Future:
+        with self._lock:
+            self.stats.launched += 1
+        options = {"defer_commit": True} if hasattr(self.chat_tool, "commit_turn") else {}
+        return self._executor.submit(
+            self.chat_tool.execute, query=query, cancel_event=cancel_event, **options
+        )
+
+    def _turn_call(self, method: str, result: Optional[CommandResult]) -> None:
+        """Commit or discard the reply's held-back turn (multi-turn chat tools)."""
+        call = getattr(self.chat_tool, method, None)
+        if call is not None and result is not None and isinstance(result.data, dict):
+            call(result.data.get("turn_id"))
+
+    @staticmethod
+    def _tokens(result: CommandResult) -> int:
+        if result.success and isinstance(result.data, dict):
+            return int(result.data.get("tokens", 0))
+        return 0
+
+    def _record_used(self, result: CommandResult, head_start: float) -> None:
+        with self._lock:
+            self.stats.used += 1
+            self.stats.used_tokens += self._tokens(result)
+            self.stats.head_start += head_start
+        self._turn_call("commit_turn", result)
+
+    def _record_cancelled(self, future: Future) -> None:
+        result = None
+        with self._lock:
+            self.stats.cancelled += 1
+            if not future.cancelled() and future.exception() is None:
+                result = future.result()
+                self.stats.wasted_tokens += self._tokens(result)
+
+        # Never committed, so this only forgets it, whatever ran since
+        self._turn_call("discard_turn", result)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads (pending speculations are abandoned)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -32,7 +32,7 @@ Usage:
 """
 
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Dict, Optional
 
 from app.utils.result import CommandResult
 from app.utils.safety import safe_execute
@@ -105,6 +105,21 @@ class BaseTool(ABC):
         """
         pass
     
+    @property
+    def parameters(self) -> Optional[Dict[str, Any]]:
+        """
+        Schema of the keyword arguments accepted by execute().
+        
+        Optional. A JSON Schema subset ({"type": "object", "properties":
+        ..., "required": [...]}) used by the router to validate a model's
+        routing decision before the tool runs. Tools without a schema are
+        routed without parameter validation.
+        
+        Returns:
+            The parameter schema, or None if not declared.
+        """
+        return None
+    
     @abstractmethod
     def _run(self, **kwargs: Any) -> CommandResult:
         """
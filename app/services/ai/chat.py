@@ -16,12 +16,19 @@ Usage:
     tool = ChatTool()
     result = tool.execute(query="What is Python?")
     print(result.data["response"])
+
+    # Multi-turn: later turns reuse the model's evaluated context
+    tool = ChatTool(multi_turn=True)
 """
 
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 from app.interfaces.tool import BaseTool
 
+if TYPE_CHECKING:
+    from core.chat_session import ChatSession
+    from core.model_residency import ModelResidencyManager
+
 
 class ChatTool(BaseTool):
     """
@@ -48,14 +55,38 @@ You are concise because your output is spoken aloud.
 Do not use markdown formatting like bold or lists, just plain text.
 Keep responses brief and conversational - ideally 1-3 sentences."""
     
-    def __init__(self, model: str = "llama3.2:3b"):
+    def __init__(
+        self,
+        model: str = "llama3.2:3b",
+        residency: Optional["ModelResidencyManager"] = None,
+        multi_turn: bool = False,
+        host: str = "http://localhost:11434",
+    ):
         """
         Initialize the ChatTool.
         
         Args:
             model: Ollama model name for conversation.
+            residency: Optional manager supplying keep_alive and recording
+                load times for the model.
+            multi_turn: Keep the conversation in a ChatSession, so replies
+                see earlier turns and each turn only evaluates the new
+                message.
+            host: Ollama API host URL (multi-turn mode).
         """
         self.model = model
+        self.residency = residency
+        self.session: Optional["ChatSession"] = None
+        
+        if multi_turn:
+            from core.chat_session import ChatSession
+            from core.llm_engine import LLMEngine
+            
+            self.session = ChatSession(
+                LLMEngine(model=model, host=host),
+                system_prompt=self.SYSTEM_PROMPT,
+                keep_alive=residency.keep_alive if residency is not None else None,
+            )
     
     @property
     def name(self) -> str:
@@ -67,6 +98,15 @@ Keep responses brief and conversational - ideally 1-3 sentences."""
         """Tool description for LLM routing."""
         return "Generates a conversational response. Params: query (str)."
     
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        """Schema of the keyword arguments accepted by execute()."""
+        return {
+            "type": "object",
+            "properties": {"query": {"type": "string"}},
+            "required": ["query"],
+        }
+    
     def _run(self, query: str, **kwargs) -> Dict[str, Any]:
         """
         Generate a conversational response.
@@ -74,21 +114,33 @@ Keep responses brief and conversational - ideally 1-3 sentences."""
         Args:
             query: The user's question or message.
             **kwargs: Additional options (temperature, etc.)
+                cancel_event: threading.Event; when given, the reply is
+                    streamed and generation stops as soon as it is set.
+                defer_commit: Multi-turn mode: keep the reply out of the
+                    conversation until commit_turn(turn_id).
         
         Returns:
             Dictionary with:
             - response: The generated text response
             - model: Model name used
+            - tokens: Tokens generated
+            - cancelled: True if generation was stopped early
+            - turn_id: Session turn of the reply (multi-turn mode)
         """
         try:
+            if self.session is not None:
+                return self._run_session(
+                    query, kwargs.get("cancel_event"), kwargs.get("defer_commit", False)
+                )
+            
             # Lazy import to avoid loading ollama if not used
             import ollama
             
             # Get optional parameters
             temperature = kwargs.get("temperature", 0.7)
+            cancel_event = kwargs.get("cancel_event")
             
-            # Call Ollama for conversation
-            response = ollama.chat(
+            request = dict(
                 model=self.model,
                 messages=[
                     {
@@ -104,6 +156,17 @@ Keep responses brief and conversational - ideally 1-3 sentences."""
                     "temperature": temperature,
                 }
             )
+            if self.residency is not None:
+                request["keep_alive"] = self.residency.keep_alive(self.model)
+            
+            if cancel_event is not None:
+                return self._stream_until_cancelled(ollama, request, cancel_event)
+            
+            # Call Ollama for conversation
+            response = ollama.chat(**request)
+            
+            if self.residency is not None:
+                self.residency.record_use(self.model, response.get("load_duration"))
             
             # Extract the response content
             response_text = response["message"]["content"]
@@ -111,6 +174,8 @@ Keep responses brief and conversational - ideally 1-3 sentences."""
             return {
                 "response": response_text,
                 "model": self.model,
+                "tokens": response.get("eval_count", 0),
+                "cancelled": False,
             }
             
         except Exception as e:
@@ -123,6 +188,79 @@ Keep responses brief and conversational - ideally 1-3 sentences."""
                     "error": error_msg,
                 }
             raise  # Re-raise for other errors to be caught by safety wrapper
+    
+    def _run_session(self, query: str, cancel_event: Any, defer_commit: bool = False) -> Dict[str, Any]:
+        """Generate the next reply of the multi-turn conversation."""
+        response, turn = self.session.exchange(
+            query, cancel_event=cancel_event, commit=not defer_commit
+        )
+        
+        if self.residency is not None:
+            self.residency.record_use(self.model, response.load_duration)
+        
+        return {
+            "response": response.content,
+            "model": self.model,
+            "tokens": response.tokens_used,
+            "prompt_tokens": response.prompt_tokens,
+            "cancelled": not response.done,
+            "turn_id": turn.turn_id if turn is not None else None,
+        }
+    
+    def commit_turn(self, turn_id: Optional[int]) -> None:
+        """
+        Add a reply generated with defer_commit to the conversation.
+        
+        Args:
+            turn_id: turn_id from the reply's result data.
+        """
+        if self.session is not None and turn_id is not None:
+            self.session.commit(turn_id)
+    
+    def discard_turn(self, turn_id: Optional[int]) -> None:
+        """
+        Drop a reply that was generated but never shown (multi-turn mode).
+        
+        Args:
+            turn_id: turn_id from the reply's result data.
+        """
+        if self.session is not None and turn_id is not None:
+            self.session.discard(turn_id)
+    
+    def _stream_until_cancelled(self, ollama: Any, request: Dict[str, Any], cancel_event: Any) -> Dict[str, Any]:
+        """
+        Stream a chat reply, stopping when cancel_event is set.
+        
+        Closing the stream drops the connection, which stops Ollama from
+        generating the rest of the reply.
+        """
+        parts = []
+        tokens = 0
+        load_duration = None
+        cancelled = False
+        stream = ollama.chat(stream=True, **request)
+        try:
+            for chunk in stream:
+                if cancel_event.is_set():
+                    cancelled = True
+                    break
+                parts.append(chunk["message"]["content"])
+                tokens = chunk.get("eval_count") or tokens + 1
+                load_duration = chunk.get("load_duration") or load_duration
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        
+        if self.residency is not None:
+            self.residency.record_use(self.model, load_duration)
+        
+        return {
+            "response": "".join(parts),
+            "model": self.model,
+            "tokens": tokens,
+            "cancelled": cancelled,
+        }
 
 
 # =============================================================================
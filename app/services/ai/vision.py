@@ -2,7 +2,8 @@
 Vision Tool - AI Image Analysis Service
 
 Wrapper around Ollama's llama3.2-vision model for image analysis.
-Takes an image path and a question, returns the model's answer.
+Takes an image (a file path or encoded bytes) and a question, returns
+the model's answer.
 
 Dependencies:
     - ollama: Python client for Ollama API
@@ -16,12 +17,19 @@ Usage:
     tool = VisionTool()
     result = tool.execute(image_path="/path/to/image.png", query="What is in this image?")
     print(result.data["response"])
+    
+    # Or straight from memory, e.g. ScreenCaptureTool(in_memory=True) output
+    result = tool.execute(image_bytes=jpeg_bytes, query="What is in this image?")
 """
 
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 from app.interfaces.tool import BaseTool
 
+if TYPE_CHECKING:
+    from core.model_residency import ModelResidencyManager
+    from core.visual_cache import VisualAnswerCache
+
 
 class VisionTool(BaseTool):
     """
@@ -46,14 +54,25 @@ class VisionTool(BaseTool):
             print(result.data["response"])
     """
     
-    def __init__(self, model: str = "llama3.2-vision"):
+    def __init__(
+        self,
+        model: str = "llama3.2-vision",
+        residency: Optional["ModelResidencyManager"] = None,
+        cache: Optional["VisualAnswerCache"] = None,
+    ):
         """
         Initialize the VisionTool.
         
         Args:
             model: Ollama model name for vision analysis.
+            residency: Optional manager supplying keep_alive and recording
+                load times for the model.
+            cache: Optional cache answering repeated questions about an
+                unchanged image without calling the model.
         """
         self.model = model
+        self.residency = residency
+        self.cache = cache
     
     @property
     def name(self) -> str:
@@ -63,39 +82,81 @@ class VisionTool(BaseTool):
     @property
     def description(self) -> str:
         """Tool description for LLM routing."""
-        return "Analyzes an image using a Vision Language Model. Params: image_path (str), query (str)."
+        return (
+            "Analyzes an image using a Vision Language Model. "
+            "Params: image_path (str) or image_bytes (bytes), query (str)."
+        )
+    
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        """
+        Schema of the keyword arguments the router may produce.
+        
+        Programmatic callers can pass image_bytes instead of image_path.
+        """
+        return {
+            "type": "object",
+            "properties": {
+                "image_path": {"type": "string", "maxLength": 260},
+                "query": {"type": "string", "maxLength": 300},
+            },
+            "required": ["image_path", "query"],
+        }
     
-    def _run(self, image_path: str, query: str, **kwargs) -> Dict[str, Any]:
+    def _run(
+        self,
+        query: str,
+        image_path: Optional[str] = None,
+        image_bytes: Optional[bytes] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
         """
         Analyze an image using the vision model.
         
         Args:
-            image_path: Path to the image file to analyze.
             query: Question or prompt about the image.
+            image_path: Path to the image file to analyze.
+            image_bytes: Encoded image (PNG/JPEG) to analyze instead of a file.
             **kwargs: Additional options (temperature, etc.)
         
         Returns:
             Dictionary with:
             - response: The model's text response
             - model: Model name used
-            - image_path: Path to analyzed image
+            - image_path: Path to analyzed image (None for image_bytes)
+            - cached: True if the answer came from the cache
         """
-        # Lazy import to avoid loading ollama if not used
-        import ollama
         import base64
         from pathlib import Path
         
         # Get optional parameters
         temperature = kwargs.get("temperature", 0.7)
         
-        # Read image file and encode as base64
+        if image_bytes is None:
+            if image_path is None:
+                raise ValueError("Either image_path or image_bytes is required")
+            image_file = Path(image_path)
+            if not image_file.exists():
+                raise FileNotFoundError(f"Image file not found: {image_path}")
+            image_bytes = image_file.read_bytes()
+        
+        frame_hash = None
+        if self.cache is not None:
+            frame_hash = self.cache.frame_hash(image_bytes)
+            cached = self.cache.get(frame_hash, query, self.model)
+            if cached is not None:
+                return {
+                    "response": cached,
+                    "model": self.model,
+                    "image_path": image_path,
+                    "cached": True,
+                }
+        
         # Ollama requires base64 encoded images
-        image_file = Path(image_path)
-        if not image_file.exists():
-            raise FileNotFoundError(f"Image file not found: {image_path}")
+        image_data = base64.b64encode(image_bytes).decode("utf-8")
         
-        with open(image_file, "rb") as f:
-            image_data = base64.b64encode(f.read()).decode("utf-8")
+        # Lazy import to avoid loading ollama if not used (or on a cache hit)
+        import ollama
         
         # Call Ollama with the vision model
         response = ollama.chat(
@@ -109,17 +170,31 @@ class VisionTool(BaseTool):
             ],
             options={
                 "temperature": temperature,
-            }
+            },
+            **self._residency_options(),
         )
         
+        if self.residency is not None:
+            self.residency.record_use(self.model, response.get("load_duration"))
+        
         # Extract the response content
         response_text = response["message"]["content"]
         
+        if frame_hash is not None:
+            self.cache.put(frame_hash, query, response_text, self.model)
+        
         return {
             "response": response_text,
             "model": self.model,
             "image_path": image_path,
+            "cached": False,
         }
+    
+    def _residency_options(self) -> Dict[str, Any]:
+        """keep_alive for the request, when residency is managed."""
+        if self.residency is None:
+            return {}
+        return {"keep_alive": self.residency.keep_alive(self.model)}
 
 
 # =============================================================================
@@ -19,7 +19,7 @@ Usage:
 """
 
 from pathlib import Path
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 from app.interfaces.tool import BaseTool
 from app.utils.result import CommandResult
@@ -60,6 +60,19 @@ class ExcelReaderTool(BaseTool):
         """Human-readable description of the tool."""
         return "Reads data from a specific range. Params: filename (str), range (e.g., 'A1:B10')"
     
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        """Schema of the keyword arguments accepted by execute()."""
+        return {
+            "type": "object",
+            "properties": {
+                "filename": {"type": "string", "maxLength": 260},
+                "range": {"type": "string", "maxLength": 40},
+                "sheet": {"type": "string", "maxLength": 31},
+            },
+            "required": ["filename", "range"],
+        }
+    
     def _run(self, **kwargs: Any) -> CommandResult:
         """
         Execute Excel reading logic.
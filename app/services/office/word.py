@@ -21,7 +21,7 @@ Usage:
 
 import os
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 
 from app.interfaces.tool import BaseTool
 from app.utils.result import CommandResult
@@ -59,6 +59,18 @@ class WordWriterTool(BaseTool):
         """Human-readable description of the tool."""
         return "Writes text to a Word document. Params: text (str), filename (optional str)"
     
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        """Schema of the keyword arguments accepted by execute()."""
+        return {
+            "type": "object",
+            "properties": {
+                "text": {"type": "string"},
+                "filename": {"type": "string", "maxLength": 100},
+            },
+            "required": ["text"],
+        }
+    
     def _run(self, **kwargs: Any) -> CommandResult:
         """
         Execute Word document writing logic.
@@ -15,7 +15,7 @@ Usage:
     result = tool.execute(action="get")  # Get current brightness
 """
 
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 
 from app.interfaces.tool import BaseTool
 from app.utils.result import CommandResult
@@ -69,6 +69,18 @@ class BrightnessTool(BaseTool):
         """Human-readable description of the tool."""
         return "Sets the display brightness (0-100) or gets current brightness level"
     
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        """Schema of the keyword arguments accepted by execute()."""
+        return {
+            "type": "object",
+            "properties": {
+                "level": {"type": "number", "minimum": 0, "maximum": 100},
+                "display": {"type": ["integer", "string"], "maxLength": 64},
+                "action": {"type": "string", "enum": ["get", "set"]},
+            },
+        }
+    
     def _run(self, **kwargs: Any) -> CommandResult:
         """
         Execute brightness control logic.
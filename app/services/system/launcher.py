@@ -21,7 +21,7 @@ Usage:
 import subprocess
 import shutil
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 
 from app.interfaces.tool import BaseTool
 from app.utils.result import CommandResult
@@ -216,6 +216,17 @@ class AppLauncherTool(BaseTool):
         """Human-readable description of the tool."""
         return "Launches an application by name (e.g., 'chrome', 'notepad') or by file path"
     
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        """Schema of the keyword arguments accepted by execute()."""
+        return {
+            "type": "object",
+            "properties": {
+                "app_name": {"type": "string", "maxLength": 64},
+                "path": {"type": "string", "maxLength": 260},
+            },
+        }
+    
     def _run(self, **kwargs: Any) -> CommandResult:
         """
         Execute application launch logic.
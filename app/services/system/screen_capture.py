@@ -4,6 +4,12 @@ Screen Capture Tool - Visual Perception Service
 Captures screenshots of the primary monitor for visual analysis.
 Uses mss for fast, cross-platform screen capture.
 
+With in_memory=True nothing touches the disk: the raw frame is
+downscaled and JPEG-encoded once (the same encoding as
+perception.vision.VisionProcessor) and returned as bytes, ready for
+VisionTool. Given a running perception.capture_service.CaptureService,
+in-memory captures return its latest frame instantly instead of grabbing.
+
 Dependencies:
     - mss: Fast cross-platform screenshots
 
@@ -13,13 +19,26 @@ Usage:
     tool = ScreenCaptureTool()
     result = tool.execute()
     print(f"Screenshot saved to: {result.data['path']}")
+    
+    result = tool.execute(in_memory=True)
+    jpeg = result.data["image_bytes"]
 """
 
 import tempfile
+import time
 from pathlib import Path
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 
 from app.interfaces.tool import BaseTool
+from perception.vision import (
+    DEFAULT_JPEG_QUALITY,
+    DEFAULT_MAX_RESOLUTION,
+    encode_for_llm,
+    frame_to_image,
+)
+
+if TYPE_CHECKING:
+    from perception.capture_service import CaptureService
 
 
 class ScreenCaptureTool(BaseTool):
@@ -28,7 +47,8 @@ class ScreenCaptureTool(BaseTool):
     
     Captures the primary monitor and saves to a temporary file.
     The temporary file is kept alive for downstream processing
-    (e.g., vision model analysis).
+    (e.g., vision model analysis). Alternatively returns the capture
+    as in-memory JPEG bytes.
     
     Attributes:
         name: Tool identifier ("capture_screen").
@@ -43,6 +63,29 @@ class ScreenCaptureTool(BaseTool):
             # Pass to vision model...
     """
     
+    def __init__(
+        self,
+        max_resolution: Tuple[int, int] = DEFAULT_MAX_RESOLUTION,
+        quality: int = DEFAULT_JPEG_QUALITY,
+        service: Optional["CaptureService"] = None,
+        max_age: Optional[float] = None,
+    ):
+        """
+        Initialize the ScreenCaptureTool.
+        
+        Args:
+            max_resolution: Largest (width, height) of in-memory captures.
+            quality: JPEG quality of in-memory captures (1-100).
+            service: Background capture service whose latest frame answers
+                in-memory captures of its monitor.
+            max_age: Longest time since the service last checked the screen
+                for its frame to count as current (default: 2 intervals).
+        """
+        self.max_resolution = max_resolution
+        self.quality = quality
+        self.service = service
+        self.max_age = max_age
+    
     @property
     def name(self) -> str:
         """Tool name for registry."""
@@ -51,23 +94,48 @@ class ScreenCaptureTool(BaseTool):
     @property
     def description(self) -> str:
         """Tool description for LLM routing."""
-        return "Takes a screenshot of the primary monitor. Returns: path to the temporary image file."
+        return (
+            "Takes a screenshot of the primary monitor. "
+            "Returns: path to the temporary image file, or JPEG bytes with in_memory=True."
+        )
+    
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        """Schema of the keyword arguments accepted by execute()."""
+        return {
+            "type": "object",
+            "properties": {
+                "monitor": {"type": "integer"},
+                "in_memory": {"type": "boolean"},
+            },
+        }
     
     def _run(self, **kwargs) -> Dict[str, Any]:
         """
         Capture the primary monitor screen.
         
         Args:
-            **kwargs: Currently unused, but allows for future options
-                      like monitor_index, region, etc.
+            **kwargs: Optional settings:
+                - monitor: Monitor index (default: 1, the primary)
+                - in_memory: Return downscaled JPEG bytes instead of
+                  writing a PNG file (default: False)
         
         Returns:
             Dictionary with:
-            - path: Absolute path to the saved screenshot
+            - path: Absolute path to the saved screenshot (file mode)
+            - image_bytes: JPEG bytes (in-memory mode)
+            - age: Seconds since the frame was stored (in-memory mode)
             - width: Image width in pixels
             - height: Image height in pixels
             - monitor: Monitor index captured
         """
+        if kwargs.get("in_memory"):
+            monitor_index = kwargs.get("monitor", 1)
+            buffered = self._latest_buffered(monitor_index)
+            if buffered is not None:
+                return buffered
+            return self._capture_in_memory(monitor_index)
+        
         # Lazy import to avoid loading mss if not used
         import mss
         import mss.tools
@@ -106,6 +174,48 @@ class ScreenCaptureTool(BaseTool):
                 "height": screenshot.height,
                 "monitor": monitor_index,
             }
+    
+    def _latest_buffered(self, monitor_index: int) -> Optional[Dict[str, Any]]:
+        """The capture service's current frame, if it has one."""
+        service = self.service
+        if service is None or service.monitor_index != monitor_index:
+            return None
+        
+        max_age = self.max_age if self.max_age is not None else 2 * service.interval
+        frame = service.latest(max_age=max_age)
+        if frame is None:
+            return None
+        
+        return {
+            "image_bytes": frame.jpeg,
+            "format": "jpeg",
+            "width": frame.width,
+            "height": frame.height,
+            "monitor": monitor_index,
+            "age": time.monotonic() - frame.captured_at,
+        }
+    
+    def _capture_in_memory(self, monitor_index: int) -> Dict[str, Any]:
+        """Grab a monitor and encode it straight from the raw frame."""
+        import mss
+        
+        with mss.mss() as sct:
+            if monitor_index >= len(sct.monitors):
+                monitor_index = 1
+            screenshot = sct.grab(sct.monitors[monitor_index])
+        
+        # .raw is mss' own buffer; .bgra would copy it
+        image = frame_to_image(screenshot.raw, screenshot.size)
+        image_bytes = encode_for_llm(image, self.max_resolution, self.quality)
+        
+        return {
+            "image_bytes": image_bytes,
+            "format": "jpeg",
+            "width": screenshot.width,
+            "height": screenshot.height,
+            "monitor": monitor_index,
+            "age": 0.0,
+        }
 
 
 # =============================================================================
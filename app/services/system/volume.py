@@ -17,7 +17,7 @@ Usage:
     result = tool.execute(mute=True)  # Mute audio
 """
 
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 
 from app.interfaces.tool import BaseTool
 from app.utils.result import CommandResult
@@ -76,6 +76,18 @@ class VolumeTool(BaseTool):
         """Human-readable description of the tool."""
         return "Sets the system volume (0-100), mutes/unmutes audio, or gets current volume level"
     
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        """Schema of the keyword arguments accepted by execute()."""
+        return {
+            "type": "object",
+            "properties": {
+                "level": {"type": "number", "minimum": 0, "maximum": 100},
+                "mute": {"type": "boolean"},
+                "action": {"type": "string", "enum": ["get", "set"]},
+            },
+        }
+    
     def _run(self, **kwargs: Any) -> CommandResult:
         """
         Execute volume control logic.
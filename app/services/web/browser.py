@@ -70,6 +70,15 @@ class BrowserTool(BaseTool):
         """Tool description for LLM routing."""
         return "Performs autonomous web browsing to find information or execute tasks. Params: task_description (str)."
     
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        """Schema of the keyword arguments accepted by execute()."""
+        return {
+            "type": "object",
+            "properties": {"task_description": {"type": "string", "maxLength": 300}},
+            "required": ["task_description"],
+        }
+    
     def _run(self, task_description: str, **kwargs) -> Dict[str, Any]:
         """
         Execute an autonomous web browsing task.
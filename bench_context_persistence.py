@@ -0,0 +1,53 @@
+"""
+Micro-benchmark - ContextManager persistence
+
+Measures conversation turns per second (a user message, an action record,
+an assistant message and a session value) with persistence off, with
+synchronous commits, and with write-behind batching.
+
+Run: python bench_context_persistence.py
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from core.context_manager import ContextManager
+
+TURNS = 500
+
+
+def run_turns(ctx: ContextManager, turns: int) -> float:
+    """Seconds to record `turns` conversation turns."""
+    start = time.perf_counter()
+    for i in range(turns):
+        ctx.add_message("user", f"set the volume to {i % 100}")
+        ctx.record_action("set_volume", "volume_control", {"level": i % 100}, "ok", success=True)
+        ctx.add_message("assistant", f"Volume set to {i % 100}%.")
+        ctx.set("last_volume", i % 100)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print(f"CONTEXT PERSISTENCE BENCHMARK ({TURNS} turns)")
+    print("=" * 60)
+    print(f"{'mode':>14} {'turns/sec':>12} {'drain (ms)':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        modes = [
+            ("memory", {}),
+            ("synchronous", {"persistence_path": Path(tmp) / "sync.db"}),
+            ("write-behind", {"persistence_path": Path(tmp) / "behind.db", "write_behind": True}),
+        ]
+        for name, options in modes:
+            ctx = ContextManager(**options)
+            elapsed = run_turns(ctx, TURNS)
+
+            start = time.perf_counter()
+            ctx.close()
+            drain = time.perf_counter() - start
+
+            print(f"{name:>14} {TURNS / elapsed:>12.0f} {drain * 1000:>12.1f}")
+
+    print("=" * 60)
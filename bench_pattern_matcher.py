@@ -0,0 +1,75 @@
+"""
+Micro-benchmark - core SemanticRouter pattern matching
+
+Compares the old linear scan (search every compiled pattern in order)
+against the anchor-prefiltered PatternTable as plugins grow the pattern
+table to hundreds of entries.
+
+Run: python bench_pattern_matcher.py
+"""
+
+import timeit
+
+from core.semantic_router import IntentCategory, SemanticRouter
+
+QUERIES = [
+    "open notepad",
+    "set the volume to 40",
+    "what's on the screen",
+    "search for python tutorials",
+    "tell me a joke about penguins",
+    "what is the capital of france",
+]
+
+TABLE_SIZES = [0, 100, 250, 500, 1000]
+
+
+def build_router(plugin_patterns: int) -> SemanticRouter:
+    """Default table plus synthetic plugin patterns with their own verbs."""
+    router = SemanticRouter()
+    for i in range(plugin_patterns):
+        router.register_pattern(
+            rf"(plugverb{i}|plugalt{i})\s+(.+)",
+            IntentCategory.APPLICATION_CONTROL,
+            f"plugin_action_{i}",
+        )
+    return router
+
+
+def linear_match(router: SemanticRouter, query: str):
+    """The original behaviour: search every pattern in sequence."""
+    for pattern, category, action in router._patterns:
+        if match := pattern.search(query):
+            return match, category, action
+    return None
+
+
+def per_query_us(fn, router: SemanticRouter, number: int) -> float:
+    elapsed = timeit.timeit(
+        lambda: [fn(router, q) for q in QUERIES],
+        number=number,
+    )
+    return elapsed / (number * len(QUERIES)) * 1e6
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PATTERN MATCHER BENCHMARK (microseconds per query)")
+    print("=" * 60)
+    print(f"{'patterns':>10} {'linear':>12} {'prefilter':>12} {'speedup':>10}")
+
+    for size in TABLE_SIZES:
+        router = build_router(size)
+        number = 200 if size >= 500 else 1000
+
+        # Same first-match result either way
+        for query in QUERIES:
+            a = linear_match(router, query)
+            b = router._patterns.match(query)
+            assert (a and a[1:]) == (b and b[1:]), query
+
+        linear = per_query_us(linear_match, router, number)
+        prefiltered = per_query_us(lambda r, q: r._patterns.match(q), router, number)
+        print(f"{len(router._patterns):>10} {linear:>12.2f} {prefiltered:>12.2f} {linear / prefiltered:>9.1f}x")
+
+    print("=" * 60)
@@ -0,0 +1,102 @@
+"""
+Micro-benchmark - Screen capture to vision request
+
+Compares the time from a grabbed frame to a ready base64 image payload:
+
+- temp file: PNG-encode the full-resolution frame to a temp file, read it
+  back and base64-encode it (the previous ScreenCaptureTool/VisionTool path)
+- in memory: downscale the raw frame and JPEG-encode it once, then
+  base64-encode the bytes (ScreenCaptureTool(in_memory=True))
+
+Uses a real mss grab when mss is installed, otherwise a synthetic
+desktop-like frame.
+
+Run: python bench_vision_pipeline.py
+"""
+
+import base64
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from perception.vision import encode_for_llm, frame_to_image
+
+RUNS = 10
+WIDTH, HEIGHT = 2560, 1440
+
+
+def grab_frame():
+    """(bgra bytes, (width, height)) from the screen, or a synthetic frame."""
+    try:
+        import mss
+        with mss.mss() as sct:
+            shot = sct.grab(sct.monitors[1])
+            return bytes(shot.bgra), shot.size
+    except Exception:
+        pass
+
+    rng = np.random.default_rng(0)
+    frame = np.full((HEIGHT, WIDTH, 4), 235, dtype=np.uint8)
+    frame[:40] = (60, 50, 40, 255)  # title bar
+    frame[:, :300] = (245, 240, 238, 255)  # sidebar
+    # Lines of "text" drawn from a small set of 8x12 glyphs, as on a screen
+    glyphs = rng.random((60, 12, 8)) < 0.3
+    columns = (WIDTH - 340) // 8
+    for y in range(80, HEIGHT - 20, 22):
+        line = np.hstack(glyphs[rng.integers(0, len(glyphs), columns)])
+        frame[y:y + 12, 320:320 + columns * 8][line] = (30, 30, 30, 255)
+    return frame.tobytes(), (WIDTH, HEIGHT)
+
+
+def temp_file_path(bgra: bytes, size) -> str:
+    """Full-resolution PNG through a temporary file."""
+    image = frame_to_image(bgra, size)
+    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
+        path = f.name
+    try:
+        try:
+            import mss.tools
+            mss.tools.to_png(image.tobytes(), size, output=path)
+        except ImportError:
+            image.save(path, format="PNG")
+        with open(path, "rb") as f:
+            return base64.b64encode(f.read()).decode("utf-8")
+    finally:
+        os.remove(path)
+
+
+def in_memory_path(bgra: bytes, size) -> str:
+    """Downscaled JPEG straight from the frame buffer."""
+    jpeg = encode_for_llm(frame_to_image(bgra, size))
+    return base64.b64encode(jpeg).decode("utf-8")
+
+
+def measure(fn, bgra, size):
+    """(median ms, payload KB)."""
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        payload = fn(bgra, size)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000, len(payload) / 1024
+
+
+if __name__ == "__main__":
+    bgra, size = grab_frame()
+
+    print("=" * 60)
+    print(f"CAPTURE-TO-REQUEST BENCHMARK ({size[0]}x{size[1]}, {RUNS} runs)")
+    print("=" * 60)
+    print(f"{'path':>12} {'median (ms)':>14} {'payload (KB)':>14}")
+
+    results = {}
+    for name, fn in [("temp file", temp_file_path), ("in memory", in_memory_path)]:
+        results[name] = measure(fn, bgra, size)
+        ms, kb = results[name]
+        print(f"{name:>12} {ms:>14.1f} {kb:>14.0f}")
+
+    speedup = results["temp file"][0] / results["in memory"][0]
+    print(f"\nIn-memory path: {speedup:.1f}x faster")
+    print("=" * 60)
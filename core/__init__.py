@@ -2,15 +2,21 @@
 The Sovereign Desktop - Core Module
 
 This module contains the brain of the agent:
-- LLM Engine: Ollama/Llama integration
+- LLM Engine: Ollama/Llama integration (blocking and async/pooled)
+- Chat Session: Multi-turn chat reusing the model's evaluated context
 - Semantic Router: Intent classification and routing
 - Context Manager: Memory and state management
+- Session Store: Per-session context managers over one database
 - Intent Router: LLM-based intent classification
+- Embedding Router: Nearest-neighbour intent classification
 """
 
-from .llm_engine import LLMEngine
+from .llm_engine import LLMEngine, AsyncLLMEngine
+from .chat_session import ChatSession
 from .semantic_router import SemanticRouter
 from .context_manager import ContextManager
+from .session_store import SessionStore
+from .embedding_router import EmbeddingRouter
 from .router import (
     IntentRouter,
     IntentCategory,
@@ -22,8 +28,12 @@ from .router import (
 
 __all__ = [
     "LLMEngine",
+    "AsyncLLMEngine",
+    "ChatSession",
     "SemanticRouter",
     "ContextManager",
+    "SessionStore",
+    "EmbeddingRouter",
     "IntentRouter",
     "IntentCategory",
     "RouterResult",
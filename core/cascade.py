@@ -0,0 +1,87 @@
+"""
+Cascade Stats - Per-Tier Accounting for Tiered Routing
+
+Routers can try cheap tiers first (rules, embeddings, a small model) and
+only escalate to a larger model when the cheap answer fails validation or
+is not confident enough. These counters show where time goes and how often
+each tier has to hand off.
+
+Usage:
+    from core.cascade import CascadeStats
+
+    stats = CascadeStats()
+    stats.record("llama3.2:1b", latency=0.12, escalated=True)
+    stats.record("llama3.2:3b", latency=0.35, escalated=False)
+    stats.to_dict()["llama3.2:1b"]["escalation_rate"]  # 1.0
+"""
+
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+
+@dataclass
+class TierStats:
+    """Counters for one cascade tier."""
+    calls: int = 0
+    accepted: int = 0
+    escalated: int = 0
+    failed: int = 0
+    total_latency: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.calls if self.calls else 0.0
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalated / self.calls if self.calls else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["avg_latency"] = self.avg_latency
+        data["escalation_rate"] = self.escalation_rate
+        return data
+
+
+class CascadeStats:
+    """
+    Per-tier latency and escalation counters, in tier order.
+
+    A call is "escalated" when the tier's answer was rejected and a later
+    tier was tried; "failed" when the tier's answer was rejected and there
+    was nothing left to escalate to. Thread-safe.
+    """
+
+    def __init__(self):
+        self._tiers: Dict[str, TierStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tier: str, latency: float, escalated: bool = False, failed: bool = False):
+        """
+        Record one call to a tier.
+
+        Args:
+            tier: Tier name (model name, "fast_path", "embedding", ...)
+            latency: Seconds spent in the tier
+            escalated: The answer was rejected and passed to the next tier
+            failed: The answer was rejected by the last tier
+        """
+        with self._lock:
+            stats = self._tiers.setdefault(tier, TierStats())
+            stats.calls += 1
+            stats.total_latency += latency
+            if escalated:
+                stats.escalated += 1
+            elif failed:
+                stats.failed += 1
+            else:
+                stats.accepted += 1
+
+    def get(self, tier: str) -> Optional[TierStats]:
+        """Counters for a tier, or None if it was never called."""
+        return self._tiers.get(tier)
+
+    def to_dict(self) -> Dict[str, dict]:
+        with self._lock:
+            return {tier: stats.to_dict() for tier, stats in self._tiers.items()}
@@ -0,0 +1,364 @@
+"""
+Chat Session - Multi-Turn Chat Without Re-Evaluating History
+
+A plain chat call resends the system prompt and the whole history every
+turn, and Ollama evaluates all of it again, so each turn is slower than
+the one before. A ChatSession avoids that:
+
+- Context mode: each turn goes to /api/generate with the `context` tokens
+  returned by the previous turn, so only the new message is evaluated
+- History mode (fallback): the history is sent to /api/chat in a stable
+  order (system prompt first, turns appended, never rewritten), so
+  Ollama's prompt cache can still reuse the unchanged prefix. Once it no
+  longer fits the context window the oldest turns are dropped, down to
+  half the window, so the prefix then stays stable for several turns
+  instead of shifting (and missing the cache) on every one
+
+The session drops to history mode when the context can no longer be
+trusted: the model changed, the context filled the window, a turn other
+than the newest was discarded, or a request carrying a context failed.
+Discarding the newest turn restores the context from before it. A reply
+that may go unused (a speculative one) can be generated with
+commit=False: it stays out of the session until commit() adds it, and
+discarding it changes nothing. `prompt_eval_count` is recorded per turn,
+so the effect shows up in get_stats().
+
+Usage:
+    from core.chat_session import ChatSession
+
+    session = ChatSession(LLMEngine(model="llama3.2:3b"), system_prompt="Be brief.")
+    print(session.send("What is Python?").content)
+    print(session.send("Who created it?").content)
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .token_budget import MESSAGE_OVERHEAD, estimate_tokens, pack_newest_first
+
+if TYPE_CHECKING:
+    from .llm_engine import LLMEngine, LLMResponse
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_MODE = "context"
+HISTORY_MODE = "history"
+
+
+@dataclass
+class TurnStats:
+    """Prompt evaluation figures for one turn."""
+    mode: str
+    prompt_tokens: int
+    generated_tokens: int
+    latency: float
+    fallback: bool = False
+
+
+@dataclass
+class ChatTurn:
+    """One committed user/assistant exchange."""
+    turn_id: int
+    user: str
+    assistant: str
+    stats: TurnStats
+
+
+class ChatSession:
+    """
+    Multi-turn conversation that reuses the model's evaluated context.
+
+    Turns are committed only when generation completes (or, for
+    exchange(commit=False), when commit() is called); a cancelled turn
+    leaves the session unchanged. Thread-safe: turns are sent one at a time.
+    """
+
+    def __init__(
+        self,
+        engine: "LLMEngine",
+        system_prompt: Optional[str] = None,
+        use_context: bool = True,
+        context_margin: int = 256,
+        keep_alive: Optional[Callable[[str], int]] = None,
+    ):
+        """
+        Initialize the session.
+
+        Args:
+            engine: LLMEngine used for every turn
+            system_prompt: Optional system prompt, always sent first
+            use_context: Reuse Ollama's `context` tokens between turns.
+                         When False every turn uses history mode.
+            context_margin: Tokens kept free in the context window; a
+                            longer context falls back to history mode
+            keep_alive: Optional callable mapping a model name to the
+                        keep_alive to send (e.g. ModelResidencyManager.keep_alive)
+        """
+        self.engine = engine
+        self.system_prompt = system_prompt
+        self.use_context = use_context
+        self.context_margin = context_margin
+        self.keep_alive = keep_alive
+
+        self._turns: List[ChatTurn] = []
+        self._context: Optional[List[int]] = None
+        self._context_model: Optional[str] = None
+        # (turn_id, context, model) as they were before the newest turn
+        self._undo: Optional[Tuple[int, Optional[List[int]], Optional[str]]] = None
+        # Uncommitted turns: turn_id -> (turn, context after it, model,
+        # newest committed turn_id it was generated after)
+        self._pending: Dict[int, Tuple[ChatTurn, Optional[List[int]], Optional[str], int]] = {}
+        self._next_id = 1
+        # Leading turns left out of history mode to fit the context window
+        self._window_start = 0
+        self._fallbacks = 0
+        self._lock = threading.Lock()
+
+    @property
+    def turns(self) -> List[ChatTurn]:
+        """Committed turns, oldest first."""
+        return list(self._turns)
+
+    @property
+    def mode(self) -> str:
+        """Mode the next turn will use."""
+        return CONTEXT_MODE if self._context_usable() else HISTORY_MODE
+
+    def messages(self, user_message: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        History in stable order, as sent in history mode.
+
+        Args:
+            user_message: Optional new message to append
+
+        Returns:
+            Chat messages: system prompt, then the user/assistant pair of
+            each turn still inside the context window
+        """
+        messages = []
+        if self.system_prompt:
+            messages.append({"role": "system", "content": self.system_prompt})
+        for turn in self._turns[self._window_start:]:
+            messages.append({"role": "user", "content": turn.user})
+            messages.append({"role": "assistant", "content": turn.assistant})
+        if user_message is not None:
+            messages.append({"role": "user", "content": user_message})
+        return messages
+
+    def _context_usable(self) -> bool:
+        if not self.use_context:
+            return False
+        if not self._context:
+            # Only a fresh session can start a context; after a history-mode
+            # turn there is nothing that covers the whole conversation
+            return not self._turns
+        if self._context_model != self.engine.model:
+            return False
+        return len(self._context) + self.context_margin < self.engine.context_length
+
+    @staticmethod
+    def _turn_tokens(turn: ChatTurn) -> int:
+        return (
+            estimate_tokens(turn.user) + estimate_tokens(turn.assistant) + 2 * MESSAGE_OVERHEAD
+        )
+
+    def _fit_window(self, message: str):
+        """Drop the oldest turns from history mode if the prompt would overflow."""
+        budget = self.engine.context_length - self.context_margin - MESSAGE_OVERHEAD
+        budget -= estimate_tokens(message)
+        if self.system_prompt:
+            budget -= estimate_tokens(self.system_prompt) + MESSAGE_OVERHEAD
+
+        turns = self._turns[self._window_start:]
+        costs = [self._turn_tokens(turn) for turn in turns]
+        if sum(costs) <= budget:
+            return
+        kept = pack_newest_first(turns, costs, max(0, budget) // 2)
+        self._window_start = len(self._turns) - len(kept)
+        logger.debug(f"History window now starts at turn {self._window_start}")
+
+    def send(self, message: str, cancel_event: Optional[threading.Event] = None) -> "LLMResponse":
+        """
+        Send a user message and get the reply.
+
+        Args:
+            message: User message
+            cancel_event: Stop generating once this is set. A cancelled
+                          reply (done=False) is not added to the session.
+
+        Returns:
+            LLMResponse for this turn
+        """
+        return self.exchange(message, cancel_event)[0]
+
+    def exchange(
+        self,
+        message: str,
+        cancel_event: Optional[threading.Event] = None,
+        commit: bool = True,
+    ) -> Tuple["LLMResponse", Optional[ChatTurn]]:
+        """
+        Like send(), but also return the committed turn.
+
+        Args:
+            message: User message
+            cancel_event: Stop generating once this is set
+            commit: Add the turn to the session now. When False the turn
+                    is held back until commit(turn.turn_id), and
+                    discard(turn.turn_id) just forgets it.
+
+        Returns:
+            (response, turn); turn is None if the reply was cancelled
+        """
+        with self._lock:
+            keep_alive = self.keep_alive(self.engine.model) if self.keep_alive else None
+            fallback = False
+            start = time.perf_counter()
+
+            if self._context_usable():
+                try:
+                    response = self.engine.generate(
+                        message,
+                        system_prompt=None if self._context else self.system_prompt,
+                        cancel_event=cancel_event,
+                        context=self._context,
+                        keep_alive=keep_alive,
+                    )
+                    mode = CONTEXT_MODE
+                except httpx.HTTPError as e:
+                    if not self._context:
+                        raise
+                    logger.warning(f"Context reuse failed, resending history: {e}")
+                    response, mode, fallback = None, HISTORY_MODE, True
+            else:
+                response, mode = None, HISTORY_MODE
+                fallback = bool(self._context)
+
+            if response is None:
+                self._context = None
+                self._fit_window(message)
+                response = self.engine.chat(
+                    self.messages(message),
+                    cancel_event=cancel_event,
+                    keep_alive=keep_alive,
+                )
+
+            if fallback:
+                self._fallbacks += 1
+
+            if not response.done:
+                return response, None
+
+            stats = TurnStats(
+                mode=mode,
+                prompt_tokens=response.prompt_tokens,
+                generated_tokens=response.tokens_used,
+                latency=time.perf_counter() - start,
+                fallback=fallback,
+            )
+            turn = ChatTurn(self._next_id, message, response.content, stats)
+            self._next_id += 1
+            context = response.context if mode == CONTEXT_MODE else None
+            if commit:
+                self._append(turn, context, self.engine.model)
+            else:
+                self._pending[turn.turn_id] = (
+                    turn, context, self.engine.model, self._newest_turn_id()
+                )
+            return response, turn
+
+    def _newest_turn_id(self) -> int:
+        return self._turns[-1].turn_id if self._turns else 0
+
+    def _append(self, turn: ChatTurn, context: Optional[List[int]], model: Optional[str]):
+        self._turns.append(turn)
+        self._undo = (turn.turn_id, self._context, self._context_model)
+        if context:
+            self._context = context
+            self._context_model = model
+        else:
+            # A history-mode turn isn't part of any returned context
+            self._context = None
+
+    def commit(self, turn_id: int) -> bool:
+        """
+        Add a turn generated with exchange(commit=False) to the session.
+
+        If another turn was committed in the meantime, the held turn's
+        context doesn't cover it, so the session continues in history mode.
+
+        Args:
+            turn_id: ChatTurn.turn_id to commit
+
+        Returns:
+            True if the turn was pending
+        """
+        with self._lock:
+            pending = self._pending.pop(turn_id, None)
+            if pending is None:
+                return False
+            turn, context, model, after = pending
+            if after != self._newest_turn_id():
+                context = None
+            self._append(turn, context, model)
+            return True
+
+    def discard(self, turn_id: int) -> bool:
+        """
+        Remove a committed turn (e.g. a reply that was never shown).
+
+        Discarding the newest turn restores the context from before it.
+        Any other turn is part of the current context, so the session
+        continues in history mode. A turn that was never committed is
+        just forgotten.
+
+        Args:
+            turn_id: ChatTurn.turn_id to remove
+
+        Returns:
+            True if the turn was found
+        """
+        with self._lock:
+            if self._pending.pop(turn_id, None) is not None:
+                return True
+            for i, turn in enumerate(self._turns):
+                if turn.turn_id == turn_id:
+                    del self._turns[i]
+                    if i < self._window_start:
+                        self._window_start -= 1
+                    if self._undo is not None and self._undo[0] == turn_id:
+                        _, self._context, self._context_model = self._undo
+                    else:
+                        self._context = None
+                    self._undo = None
+                    return True
+            return False
+
+    def reset(self):
+        """Forget the conversation; the next turn starts a new context."""
+        with self._lock:
+            self._turns.clear()
+            self._pending.clear()
+            self._window_start = 0
+            self._context = None
+            self._context_model = None
+            self._undo = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-turn prompt evaluation counts and mode usage."""
+        with self._lock:
+            turns = [turn.stats for turn in self._turns]
+        prompt_tokens = sum(t.prompt_tokens for t in turns)
+        return {
+            "turns": len(turns),
+            "context_turns": sum(t.mode == CONTEXT_MODE for t in turns),
+            "fallbacks": self._fallbacks,
+            "prompt_tokens": prompt_tokens,
+            "avg_prompt_tokens": prompt_tokens / len(turns) if turns else 0.0,
+            "per_turn": [asdict(t) for t in turns],
+        }
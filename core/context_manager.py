@@ -3,19 +3,89 @@ Context Manager - Memory and State Management
 
 This module manages conversation history, screen state tracking,
 action history, and persistent context storage.
+
+Prompts are assembled within token budgets (see core.token_budget), so
+their size, and with it prompt evaluation time, stays bounded. Messages
+leaving the window can be folded into a running summary (see
+core.summarizer) instead of being lost.
 """
 
 import json
 import logging
+import re
 import sqlite3
+import threading
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 from collections import deque
 
+from .db_writer import WriteBehindWriter, configure_connection
+from .token_budget import (
+    MESSAGE_OVERHEAD,
+    AssembledContext,
+    ContextBudget,
+    TokenEstimator,
+    estimate_tokens,
+    pack_newest_first,
+    truncate_to_budget,
+)
+
+if TYPE_CHECKING:
+    from .summarizer import ConversationSummarizer
+
 logger = logging.getLogger(__name__)
 
+# Full-text indexes over messages and actions, kept in sync by triggers.
+# External content: the text is stored once, in the base tables.
+_SEARCH_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        content, content='messages', content_rowid='id', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+    END;
+    CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END;
+    CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+    END;
+    
+    CREATE VIRTUAL TABLE IF NOT EXISTS actions_fts USING fts5(
+        tool_name, action_type, parameters, result,
+        content='actions', content_rowid='id', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS actions_fts_insert AFTER INSERT ON actions BEGIN
+        INSERT INTO actions_fts(rowid, tool_name, action_type, parameters, result)
+        VALUES (new.id, new.tool_name, new.action_type, new.parameters, new.result);
+    END;
+    CREATE TRIGGER IF NOT EXISTS actions_fts_delete AFTER DELETE ON actions BEGIN
+        INSERT INTO actions_fts(actions_fts, rowid, tool_name, action_type, parameters, result)
+        VALUES ('delete', old.id, old.tool_name, old.action_type, old.parameters, old.result);
+    END;
+    CREATE TRIGGER IF NOT EXISTS actions_fts_update AFTER UPDATE ON actions BEGIN
+        INSERT INTO actions_fts(actions_fts, rowid, tool_name, action_type, parameters, result)
+        VALUES ('delete', old.id, old.tool_name, old.action_type, old.parameters, old.result);
+        INSERT INTO actions_fts(rowid, tool_name, action_type, parameters, result)
+        VALUES (new.id, new.tool_name, new.action_type, new.parameters, new.result);
+    END;
+"""
+
+
+def _match_expression(query: str, match_all: bool = False) -> str:
+    """
+    Turn free text into an FTS5 query.
+    
+    Every word is quoted, so punctuation and FTS operators in user text
+    can't cause syntax errors. Words are OR-ed by default: bm25 ranks rows
+    matching more of them first.
+    """
+    words = re.findall(r"\w+", query.lower())
+    return f" {'AND' if match_all else 'OR'} ".join(f'"{w}"' for w in words)
+
 
 @dataclass
 class Message:
@@ -24,6 +94,8 @@ class Message:
     content: str
     timestamp: datetime = field(default_factory=datetime.now)
     metadata: dict = field(default_factory=dict)
+    # Cached by ContextManager.count_tokens
+    token_count: Optional[int] = field(default=None, repr=False, compare=False)
     
     def to_dict(self) -> dict:
         return {
@@ -57,10 +129,16 @@ class ActionRecord:
     error: Optional[str] = None
 
 
+DEFAULT_SESSION = "default"
+
+
 class ContextManager:
     """
     Manages all context for the agent including conversation history,
     screen state, action history, and persistent storage.
+    
+    Each manager holds one session. Several sessions can share a database
+    (rows carry a session_id); see core.session_store.SessionStore.
     """
     
     def __init__(
@@ -68,6 +146,13 @@ class ContextManager:
         max_context_messages: int = 50,
         max_action_history: int = 100,
         persistence_path: Optional[Path] = None,
+        token_estimator: Optional[TokenEstimator] = None,
+        budget: Optional[ContextBudget] = None,
+        summarizer: Optional["ConversationSummarizer"] = None,
+        write_behind: bool = False,
+        flush_interval: float = 0.05,
+        session_id: str = DEFAULT_SESSION,
+        share_database: Optional["ContextManager"] = None,
     ):
         """
         Initialize the Context Manager.
@@ -76,9 +161,25 @@ class ContextManager:
             max_context_messages: Maximum messages to keep in memory
             max_action_history: Maximum actions to track
             persistence_path: Path for SQLite database (optional)
+            token_estimator: Callable returning the token count of a text
+                             (default: character heuristic)
+            budget: Default token budgets for build_context/assemble
+            summarizer: Folds messages evicted from the window into a
+                        running summary (in the background)
+            write_behind: Queue writes to a background thread that commits
+                          them in batches, instead of committing each
+                          write on the caller's thread. Call flush() or
+                          close() to make sure they reached disk.
+            flush_interval: Longest a write-behind batch waits to commit
+            session_id: Session whose rows this manager reads and writes
+            share_database: Use this manager's database connection and
+                            writer instead of opening persistence_path
         """
         self.max_context_messages = max_context_messages
         self.max_action_history = max_action_history
+        self.token_estimator = token_estimator or estimate_tokens
+        self.budget = budget or ContextBudget()
+        self.session_id = session_id
         
         # In-memory storage
         self._messages: deque[Message] = deque(maxlen=max_context_messages)
@@ -89,9 +190,26 @@ class ContextManager:
         # Persistence
         self._db_path = persistence_path
         self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writer: Optional[WriteBehindWriter] = None
+        self._search_enabled = False
+        self._owns_db = share_database is None
         
-        if persistence_path:
+        if share_database is not None:
+            self._db_path = share_database._db_path
+            self._db = share_database._db
+            self._db_lock = share_database._db_lock
+            self._writer = share_database._writer
+            self._search_enabled = share_database._search_enabled
+        elif persistence_path:
             self._init_database(persistence_path)
+            if write_behind:
+                self._writer = WriteBehindWriter(persistence_path, flush_interval=flush_interval)
+        
+        # Rolling summary of messages that left the window
+        self.summarizer = None
+        if summarizer is not None:
+            self.attach_summarizer(summarizer)
         
         logger.info("Context Manager initialized")
     
@@ -99,10 +217,15 @@ class ContextManager:
         """Initialize SQLite database for persistence."""
         path.parent.mkdir(parents=True, exist_ok=True)
         self._db = sqlite3.connect(str(path), check_same_thread=False)
+        # Lets core.retention return freed pages without a full VACUUM
+        # (takes effect only on a new database)
+        self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        configure_connection(self._db)
         
         self._db.executescript("""
             CREATE TABLE IF NOT EXISTS messages (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL DEFAULT 'default',
                 role TEXT NOT NULL,
                 content TEXT NOT NULL,
                 timestamp TEXT NOT NULL,
@@ -111,6 +234,7 @@ class ContextManager:
             
             CREATE TABLE IF NOT EXISTS actions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL DEFAULT 'default',
                 timestamp TEXT NOT NULL,
                 action_type TEXT NOT NULL,
                 tool_name TEXT NOT NULL,
@@ -121,17 +245,171 @@ class ContextManager:
             );
             
             CREATE TABLE IF NOT EXISTS session_data (
-                key TEXT PRIMARY KEY,
+                session_id TEXT NOT NULL DEFAULT 'default',
+                key TEXT NOT NULL,
                 value TEXT NOT NULL,
-                updated_at TEXT NOT NULL
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (session_id, key)
             );
             
+            CREATE TABLE IF NOT EXISTS summaries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL DEFAULT 'default',
+                summary TEXT NOT NULL,
+                message_count INTEGER NOT NULL,
+                created_at TEXT NOT NULL
+            );
+        """)
+        self._migrate_sessions()
+        self._db.executescript("""
             CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp);
             CREATE INDEX IF NOT EXISTS idx_actions_timestamp ON actions(timestamp);
+            CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, id);
+            CREATE INDEX IF NOT EXISTS idx_actions_session ON actions(session_id, id);
+            CREATE INDEX IF NOT EXISTS idx_summaries_session ON summaries(session_id, id);
+            CREATE INDEX IF NOT EXISTS idx_actions_tool ON actions(tool_name);
+            CREATE INDEX IF NOT EXISTS idx_actions_success ON actions(success, id);
+            CREATE INDEX IF NOT EXISTS idx_session_data_updated ON session_data(updated_at);
         """)
         self._db.commit()
+        self._init_search_index()
         logger.info(f"Database initialized at {path}")
     
+    def _migrate_sessions(self):
+        """Add session_id to databases created before sessions existed."""
+        def columns(table: str) -> set[str]:
+            return {row[1] for row in self._db.execute(f"PRAGMA table_info({table})")}
+        
+        for table in ("messages", "actions", "summaries"):
+            if "session_id" not in columns(table):
+                self._db.execute(
+                    f"ALTER TABLE {table} ADD COLUMN session_id TEXT NOT NULL DEFAULT 'default'"
+                )
+        
+        if "session_id" not in columns("session_data"):
+            # The primary key changes, so the table has to be rebuilt
+            self._db.executescript("""
+                ALTER TABLE session_data RENAME TO session_data_old;
+                CREATE TABLE session_data (
+                    session_id TEXT NOT NULL DEFAULT 'default',
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (session_id, key)
+                );
+                INSERT INTO session_data (key, value, updated_at)
+                    SELECT key, value, updated_at FROM session_data_old;
+                DROP TABLE session_data_old;
+            """)
+        self._db.commit()
+    
+    def _init_search_index(self):
+        """Create the FTS5 indexes, backfilling rows written before they existed."""
+        self._search_enabled = False
+        try:
+            existed = self._db.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'"
+            ).fetchone()
+            self._db.executescript(_SEARCH_SCHEMA)
+            if not existed:
+                self._db.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+                self._db.execute("INSERT INTO actions_fts(actions_fts) VALUES ('rebuild')")
+            self._db.commit()
+            self._search_enabled = True
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5: search falls back to LIKE scans
+            logger.warning(f"Full-text search unavailable: {e}")
+    
+    def _write(self, sql: str, params: tuple):
+        """Run a write, queued to the writer thread in write-behind mode."""
+        if self._writer is not None:
+            self._writer.execute(sql, params)
+            return
+        with self._db_lock:
+            self._db.execute(sql, params)
+            self._db.commit()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all persisted writes are committed.
+        
+        Args:
+            timeout: Seconds to wait (None waits indefinitely)
+            
+        Returns:
+            True if nothing is left pending
+        """
+        if self._writer is None:
+            return True
+        return self._writer.flush(timeout)
+    
+    def close(self):
+        """Commit pending writes and close the database."""
+        if not self._owns_db:
+            # The database belongs to another manager; just detach
+            self.flush()
+            self._writer = None
+            self._db = None
+            return
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._db:
+            self._db.close()
+            self._db = None
+    
+    def rehydrate(self):
+        """
+        Load this session's recent history from the database.
+        
+        Fills the message and action windows with the newest stored rows
+        and restores session data (and the running summary).
+        """
+        if not self._db:
+            return
+        self.flush()
+        
+        rows = self._db.execute(
+            """SELECT role, content, timestamp, metadata FROM messages
+               WHERE session_id = ? ORDER BY id DESC LIMIT ?""",
+            (self.session_id, self.max_context_messages),
+        ).fetchall()
+        self._messages.clear()
+        for role, content, timestamp, metadata in reversed(rows):
+            self._messages.append(Message(
+                role=role,
+                content=content,
+                timestamp=datetime.fromisoformat(timestamp),
+                metadata=json.loads(metadata) if metadata else {},
+            ))
+        
+        rows = self._db.execute(
+            """SELECT timestamp, action_type, tool_name, parameters, result, success, error
+               FROM actions WHERE session_id = ? ORDER BY id DESC LIMIT ?""",
+            (self.session_id, self.max_action_history),
+        ).fetchall()
+        self._action_history.clear()
+        for timestamp, action_type, tool_name, parameters, result, success, error in reversed(rows):
+            self._action_history.append(ActionRecord(
+                timestamp=datetime.fromisoformat(timestamp),
+                action_type=action_type,
+                tool_name=tool_name,
+                parameters=json.loads(parameters) if parameters else {},
+                result=json.loads(result) if result else None,
+                success=bool(success),
+                error=error,
+            ))
+        
+        self._session_data = {
+            key: json.loads(value)
+            for key, value in self._db.execute(
+                "SELECT key, value FROM session_data WHERE session_id = ?", (self.session_id,)
+            )
+        }
+        
+        if self.summarizer is not None:
+            self.summarizer.reset(self._load_summary())
+    
     # Message Management
     
     def add_message(self, role: str, content: str, metadata: Optional[dict] = None) -> Message:
@@ -141,6 +419,8 @@ class ContextManager:
             content=content,
             metadata=metadata or {},
         )
+        if self.summarizer is not None and len(self._messages) == self._messages.maxlen:
+            self.summarizer.add_evicted(self._messages[0])
         self._messages.append(message)
         
         if self._db:
@@ -155,23 +435,103 @@ class ContextManager:
             messages = messages[-limit:]
         return messages
     
-    def get_messages_for_llm(self, limit: Optional[int] = None) -> list[dict]:
-        """Get messages formatted for LLM API."""
+    def get_messages_for_llm(
+        self,
+        limit: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+    ) -> list[dict]:
+        """
+        Get messages formatted for LLM API.
+        
+        Args:
+            limit: Maximum number of recent messages
+            max_tokens: Keep only the newest messages fitting this many tokens
+            
+        Returns:
+            List of {"role", "content"} dicts, oldest first
+        """
         messages = self.get_messages(limit)
+        if max_tokens is not None:
+            messages = self._pack_messages(messages, max_tokens)
         return [{"role": m.role, "content": m.content} for m in messages]
     
+    def count_tokens(self, message: Message) -> int:
+        """
+        Estimated tokens a message takes in a prompt (cached on the message).
+        
+        Args:
+            message: Message to measure
+            
+        Returns:
+            Content tokens plus per-message template overhead
+        """
+        if message.token_count is None:
+            message.token_count = self.token_estimator(message.content) + MESSAGE_OVERHEAD
+        return message.token_count
+    
+    def set_token_estimator(self, estimator: TokenEstimator):
+        """Switch token estimators, dropping counts cached with the old one."""
+        self.token_estimator = estimator
+        for message in self._messages:
+            message.token_count = None
+    
+    def _pack_messages(self, messages: list[Message], max_tokens: int) -> list[Message]:
+        return pack_newest_first(messages, [self.count_tokens(m) for m in messages], max_tokens)
+    
     def clear_messages(self):
-        """Clear conversation history."""
+        """Clear conversation history (and its running summary)."""
         self._messages.clear()
+        if self.summarizer is not None:
+            self.summarizer.reset()
         logger.info("Conversation history cleared")
     
+    def attach_summarizer(self, summarizer: Optional["ConversationSummarizer"]):
+        """
+        Summarize this session's evicted messages with a summarizer.
+        
+        A summarizer serves one session: it persists under this session's
+        ID and continues from this session's stored summary.
+        
+        Args:
+            summarizer: Summarizer to use, or None to stop summarizing
+                        (the previous one is left running; close it to
+                        finish its queued spans)
+        """
+        self.summarizer = summarizer
+        if summarizer is not None:
+            summarizer.on_summary = self._persist_summary
+            if self._db and not summarizer.summary:
+                summarizer.reset(self._load_summary())
+    
+    def get_summary(self) -> str:
+        """Running summary of messages that left the window ("" if none)."""
+        return self.summarizer.summary if self.summarizer is not None else ""
+    
+    def _persist_summary(self, summary: str, message_count: int):
+        """Store a summary update (called on the summarizer's thread)."""
+        if not self._db:
+            return
+        self._write(
+            "INSERT INTO summaries (session_id, summary, message_count, created_at) VALUES (?, ?, ?, ?)",
+            (self.session_id, summary, message_count, datetime.now().isoformat())
+        )
+    
+    def _load_summary(self) -> str:
+        """Latest stored summary, to continue after a restart."""
+        self.flush()
+        row = self._db.execute(
+            "SELECT summary FROM summaries WHERE session_id = ? ORDER BY id DESC LIMIT 1",
+            (self.session_id,)
+        ).fetchone()
+        return row[0] if row else ""
+    
     def _persist_message(self, message: Message):
         """Persist a message to the database."""
-        self._db.execute(
-            "INSERT INTO messages (role, content, timestamp, metadata) VALUES (?, ?, ?, ?)",
-            (message.role, message.content, message.timestamp.isoformat(), json.dumps(message.metadata))
+        self._write(
+            "INSERT INTO messages (session_id, role, content, timestamp, metadata) VALUES (?, ?, ?, ?, ?)",
+            (self.session_id, message.role, message.content, message.timestamp.isoformat(),
+             json.dumps(message.metadata))
         )
-        self._db.commit()
     
     # Screen State Management
     
@@ -253,13 +613,56 @@ class ContextManager:
         """Get the most recent action."""
         return self._action_history[-1] if self._action_history else None
     
+    def get_successful_routes(self, limit: int = 500) -> list[dict]:
+        """
+        Get past successful actions paired with the user message that
+        preceded them, newest first.
+        
+        Used to seed routers with examples of how real queries were
+        resolved. Requires persistence.
+        
+        Args:
+            limit: Maximum number of routes to return
+            
+        Returns:
+            List of {"query", "action_type", "tool_name", "parameters"}
+        """
+        if not self._db:
+            return []
+        
+        self.flush()
+        rows = self._db.execute(
+            """SELECT a.action_type, a.tool_name, a.parameters,
+                      (SELECT m.content FROM messages m
+                        WHERE m.role = 'user' AND m.session_id = a.session_id
+                          AND m.timestamp <= a.timestamp
+                        ORDER BY m.timestamp DESC LIMIT 1)
+               FROM actions a
+               WHERE a.success = 1
+               ORDER BY a.id DESC
+               LIMIT ?""",
+            (limit,),
+        ).fetchall()
+        
+        return [
+            {
+                "query": query,
+                "action_type": action_type,
+                "tool_name": tool_name,
+                "parameters": json.loads(parameters) if parameters else {},
+            }
+            for action_type, tool_name, parameters, query in rows
+            if query
+        ]
+    
     def _persist_action(self, record: ActionRecord):
         """Persist an action to the database."""
-        self._db.execute(
+        self._write(
             """INSERT INTO actions 
-               (timestamp, action_type, tool_name, parameters, result, success, error) 
-               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+               (session_id, timestamp, action_type, tool_name, parameters, result, success, error) 
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
             (
+                self.session_id,
                 record.timestamp.isoformat(),
                 record.action_type,
                 record.tool_name,
@@ -269,7 +672,139 @@ class ContextManager:
                 record.error,
             )
         )
-        self._db.commit()
+    
+    # Search
+    
+    def search_messages(
+        self,
+        query: str,
+        limit: int = 10,
+        offset: int = 0,
+        role: Optional[str] = None,
+        match_all: bool = False,
+    ) -> list[dict]:
+        """
+        Find this session's past messages relevant to a query, best match first.
+        
+        Requires persistence. Ranked by bm25 over the full-text index.
+        
+        Args:
+            query: Free text to look for
+            limit: Maximum results (page size)
+            offset: Results to skip (page start)
+            role: Only messages from this role
+            match_all: Require every word instead of any
+            
+        Returns:
+            List of {"id", "role", "content", "timestamp", "score", "snippet"}
+        """
+        expression = _match_expression(query, match_all)
+        if not self._db or not expression:
+            return []
+        
+        self.flush()
+        role_filter = "AND m.session_id = ?" + (" AND m.role = ?" if role else "")
+        params = [expression, self.session_id] + ([role] if role else []) + [limit, offset]
+        
+        if self._search_enabled:
+            rows = self._db.execute(
+                f"""SELECT m.id, m.role, m.content, m.timestamp, -bm25(messages_fts),
+                           snippet(messages_fts, 0, '[', ']', '...', 12)
+                    FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+                    WHERE messages_fts MATCH ? {role_filter}
+                    ORDER BY bm25(messages_fts)
+                    LIMIT ? OFFSET ?""",
+                params,
+            ).fetchall()
+        else:
+            rows = self._like_search("messages", ["content"], query, role_filter, params[1:])
+        
+        return [
+            {"id": id_, "role": role_, "content": content, "timestamp": timestamp,
+             "score": score, "snippet": snippet}
+            for id_, role_, content, timestamp, score, snippet in rows
+        ]
+    
+    def search_actions(
+        self,
+        query: str,
+        limit: int = 10,
+        offset: int = 0,
+        success: Optional[bool] = None,
+        match_all: bool = False,
+    ) -> list[dict]:
+        """
+        Find this session's past actions by tool, type, parameters or result.
+        
+        Requires persistence. Ranked by bm25 over the full-text index.
+        
+        Args:
+            query: Free text to look for
+            limit: Maximum results (page size)
+            offset: Results to skip (page start)
+            success: Only successful (True) or failed (False) actions
+            match_all: Require every word instead of any
+            
+        Returns:
+            List of {"id", "timestamp", "action_type", "tool_name",
+            "parameters", "result", "success", "score"}
+        """
+        expression = _match_expression(query, match_all)
+        if not self._db or not expression:
+            return []
+        
+        self.flush()
+        success_filter = "AND a.session_id = ?" + (" AND a.success = ?" if success is not None else "")
+        params = [expression, self.session_id] + ([int(success)] if success is not None else []) + [limit, offset]
+        
+        if self._search_enabled:
+            rows = self._db.execute(
+                f"""SELECT a.id, a.timestamp, a.action_type, a.tool_name, a.parameters,
+                           a.result, a.success, -bm25(actions_fts)
+                    FROM actions_fts JOIN actions a ON a.id = actions_fts.rowid
+                    WHERE actions_fts MATCH ? {success_filter}
+                    ORDER BY bm25(actions_fts)
+                    LIMIT ? OFFSET ?""",
+                params,
+            ).fetchall()
+        else:
+            rows = self._like_search(
+                "actions", ["tool_name", "action_type", "parameters", "result"],
+                query, success_filter, params[1:],
+            )
+        
+        return [
+            {
+                "id": id_,
+                "timestamp": timestamp,
+                "action_type": action_type,
+                "tool_name": tool_name,
+                "parameters": json.loads(parameters) if parameters else {},
+                "result": json.loads(result) if result else None,
+                "success": bool(ok),
+                "score": score,
+            }
+            for id_, timestamp, action_type, tool_name, parameters, result, ok, score in rows
+        ]
+    
+    def _like_search(self, table: str, columns: list[str], query: str, extra_filter: str, params: list) -> list:
+        """Unranked substring search for SQLite builds without FTS5."""
+        words = re.findall(r"\w+", query.lower())
+        text = " || ' ' || ".join(f"COALESCE({c}, '')" for c in columns)
+        condition = " OR ".join(f"lower({text}) LIKE ?" for _ in words)
+        alias = table[0]
+        if table == "messages":
+            select = f"{alias}.id, {alias}.role, {alias}.content, {alias}.timestamp, 0.0, {alias}.content"
+        else:
+            select = (f"{alias}.id, {alias}.timestamp, {alias}.action_type, {alias}.tool_name, "
+                      f"{alias}.parameters, {alias}.result, {alias}.success, 0.0")
+        return self._db.execute(
+            f"""SELECT {select} FROM {table} {alias}
+                WHERE ({condition}) {extra_filter}
+                ORDER BY {alias}.id DESC
+                LIMIT ? OFFSET ?""",
+            [f"%{w}%" for w in words] + params,
+        ).fetchall()
     
     # Session Data Management
     
@@ -278,12 +813,11 @@ class ContextManager:
         self._session_data[key] = value
         
         if self._db:
-            self._db.execute(
-                """INSERT OR REPLACE INTO session_data (key, value, updated_at) 
-                   VALUES (?, ?, ?)""",
-                (key, json.dumps(value), datetime.now().isoformat())
+            self._write(
+                """INSERT OR REPLACE INTO session_data (session_id, key, value, updated_at) 
+                   VALUES (?, ?, ?, ?)""",
+                (self.session_id, key, json.dumps(value), datetime.now().isoformat())
             )
-            self._db.commit()
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get a session data value."""
@@ -294,39 +828,166 @@ class ContextManager:
         self._session_data.pop(key, None)
         
         if self._db:
-            self._db.execute("DELETE FROM session_data WHERE key = ?", (key,))
-            self._db.commit()
+            self._write(
+                "DELETE FROM session_data WHERE session_id = ? AND key = ?", (self.session_id, key)
+            )
     
     # Context Building
     
-    def build_context(self, include_screen: bool = True, include_actions: int = 5) -> str:
+    def build_context(
+        self,
+        include_screen: bool = True,
+        include_actions: int = 5,
+        budget: Optional[ContextBudget] = None,
+    ) -> str:
         """
         Build a comprehensive context string for the LLM.
         
         Args:
             include_screen: Include current screen state
             include_actions: Number of recent actions to include
+            budget: Token budgets for the summary, screen and action sections
+                    (default: the manager's budget)
             
         Returns:
             Formatted context string
         """
-        context_parts = []
+        sections = self._context_sections(include_screen, include_actions, budget or self.budget)
+        return "\n".join(text for _, text in sections)
+    
+    def _context_sections(
+        self,
+        include_screen: bool,
+        include_actions: int,
+        budget: ContextBudget,
+    ) -> list[tuple[str, str]]:
+        """Summary, screen and action sections, each cut to its token budget."""
+        sections = []
+        
+        summary = self.get_summary()
+        if summary:
+            header = "## Earlier Conversation"
+            room = budget.summary - self.token_estimator(header)
+            summary = truncate_to_budget(summary, room, self.token_estimator)
+            if summary:
+                sections.append(("summary", f"{header}\n{summary}"))
         
         if include_screen and self._screen_state:
-            context_parts.append("## Current Screen State")
-            context_parts.append(self.get_screen_context())
+            header = "## Current Screen State"
+            room = budget.screen - self.token_estimator(header)
+            screen = truncate_to_budget(self.get_screen_context(), room, self.token_estimator)
+            if screen:
+                sections.append(("screen", f"{header}\n{screen}"))
         
         if include_actions:
             recent_actions = self.get_action_history(include_actions)
             if recent_actions:
-                context_parts.append("## Recent Actions")
-                for action in recent_actions:
-                    status = "✓" if action.success else "✗"
-                    context_parts.append(f"- [{status}] {action.tool_name}: {action.action_type}")
+                header = "## Recent Actions"
+                lines = [
+                    f"- [{'✓' if action.success else '✗'}] {action.tool_name}: {action.action_type}"
+                    for action in recent_actions
+                ]
+                room = budget.actions - self.token_estimator(header)
+                lines = pack_newest_first(lines, [self.token_estimator(line) + 1 for line in lines], room)
+                if lines:
+                    sections.append(("actions", "\n".join([header, *lines])))
         
-        return "\n".join(context_parts)
+        return sections
+    
+    def _recall_section(self, query: str, recall: int, budget: int) -> Optional[tuple[str, str]]:
+        """Stored messages matching the query that are no longer in the window."""
+        window = {(m.timestamp.isoformat(), m.content) for m in self._messages}
+        hits = [
+            hit for hit in self.search_messages(query, limit=recall + len(window))
+            if (hit["timestamp"], hit["content"]) not in window
+        ][:recall]
+        if not hits:
+            return None
+        
+        header = "## Related Earlier Messages"
+        lines = [f"- {hit['role']}: {hit['content']}" for hit in hits]
+        room = budget - self.token_estimator(header)
+        # Best match first, so keep a prefix rather than the newest lines
+        kept, used = [], 0
+        for line in lines:
+            line = truncate_to_budget(line, room - used, self.token_estimator)
+            if not line:
+                break
+            kept.append(line)
+            used += self.token_estimator(line) + 1
+        if not kept:
+            return None
+        return "recall", "\n".join([header, *kept])
+    
+    def assemble(
+        self,
+        system_prompt: Optional[str] = None,
+        include_screen: bool = True,
+        include_actions: int = 5,
+        budget: Optional[ContextBudget] = None,
+        query: Optional[str] = None,
+        recall: int = 0,
+    ) -> AssembledContext:
+        """
+        Assemble a complete chat prompt within token budgets.
+        
+        The system prompt, conversation summary, recalled messages, screen
+        state and recent actions form the system message, each cut to its
+        own budget. Conversation messages are packed newest first into
+        what's left of the prompt limit (or into budget.messages, if
+        smaller).
+        
+        Args:
+            system_prompt: Instructions for the model
+            include_screen: Include current screen state
+            include_actions: Number of recent actions to include
+            budget: Token budgets (default: the manager's budget)
+            query: Current user query, used to recall related messages
+            recall: Number of stored messages relevant to `query` to add
+                    (older than the in-memory window; needs persistence)
+            
+        Returns:
+            AssembledContext with the messages and per-section token counts
+        """
+        budget = budget or self.budget
+        section_tokens: dict[str, int] = {}
+        parts = []
+        
+        if system_prompt:
+            system_prompt = truncate_to_budget(system_prompt, budget.system, self.token_estimator)
+            parts.append(system_prompt)
+            section_tokens["system"] = self.token_estimator(system_prompt)
+        
+        sections = self._context_sections(include_screen, include_actions, budget)
+        if query and recall:
+            recalled = self._recall_section(query, recall, budget.recall)
+            if recalled:
+                sections.insert(1 if sections and sections[0][0] == "summary" else 0, recalled)
+        
+        for name, text in sections:
+            parts.append(text)
+            section_tokens[name] = self.token_estimator(text)
+        
+        messages = []
+        if parts:
+            messages.append({"role": "system", "content": "\n\n".join(parts)})
+            section_tokens["template"] = MESSAGE_OVERHEAD
+        
+        room = budget.prompt_limit - sum(section_tokens.values())
+        if budget.messages is not None:
+            room = min(room, budget.messages)
+        history = self.get_messages()
+        kept = self._pack_messages(history, max(0, room))
+        messages.extend({"role": m.role, "content": m.content} for m in kept)
+        section_tokens["messages"] = sum(self.count_tokens(m) for m in kept)
+        
+        return AssembledContext(
+            messages=messages,
+            section_tokens=section_tokens,
+            dropped_messages=len(history) - len(kept),
+        )
     
     def __del__(self):
         """Cleanup database connection."""
-        if self._db:
-            self._db.close()
+        if getattr(self, "_db", None) is not None:
+            self.close()
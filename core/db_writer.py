@@ -0,0 +1,200 @@
+"""
+Write-Behind Writer - Batched SQLite Writes off the Caller's Thread
+
+Committing every INSERT on the caller's thread makes each conversation
+turn wait for the disk. The writer queues statements instead and a
+dedicated thread applies them in batches, one transaction per batch:
+
+- A batch closes when it reaches `batch_size` statements or
+  `flush_interval` seconds after its first statement
+- The writer has its own connection, so with WAL journaling readers on
+  other connections are never blocked by it
+- flush() waits until everything queued so far is committed; close()
+  drains the queue before stopping
+
+If a batch fails, its statements are retried one by one so a single bad
+row doesn't lose the rest.
+
+Usage:
+    from core.db_writer import WriteBehindWriter
+
+    writer = WriteBehindWriter(Path("data/context.db"))
+    writer.execute("INSERT INTO messages (role, content) VALUES (?, ?)", ("user", "hi"))
+    writer.flush()
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def configure_connection(db: sqlite3.Connection):
+    """
+    WAL journaling with synchronous=NORMAL.
+
+    WAL lets readers and the writer work concurrently, and NORMAL only
+    syncs at checkpoints: a committed transaction survives an application
+    crash, though the last few may be lost on power failure.
+    """
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+
+
+@dataclass
+class WriterStats:
+    """Counters for the write-behind writer."""
+    statements: int = 0
+    batches: int = 0
+    failed: int = 0
+    total_commit_time: float = 0.0
+
+    @property
+    def avg_batch_size(self) -> float:
+        return self.statements / self.batches if self.batches else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["avg_batch_size"] = self.avg_batch_size
+        return data
+
+
+class WriteBehindWriter:
+    """
+    Applies queued SQL statements on a background thread, batched.
+
+    Attributes:
+        stats: WriterStats counters
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+    ):
+        """
+        Initialize the writer and start its thread.
+
+        Args:
+            path: SQLite database file (the schema must already exist)
+            batch_size: Maximum statements per transaction
+            flush_interval: Seconds a batch may wait for more statements
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = WriterStats()
+
+        # (sql, params), flush markers (Event) and the stop marker (None)
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def execute(self, sql: str, params: Sequence = ()):
+        """
+        Queue a statement; it is committed with the next batch.
+
+        Args:
+            sql: SQL statement
+            params: Statement parameters
+        """
+        if self._closed:
+            raise RuntimeError("WriteBehindWriter is closed")
+        self._queue.put((sql, tuple(params)))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every statement queued so far is committed.
+
+        Args:
+            timeout: Seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if the queue drained in time
+        """
+        if not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    @property
+    def pending(self) -> int:
+        """Approximate number of queued items."""
+        return self._queue.qsize()
+
+    def _run(self):
+        db = sqlite3.connect(str(self.path))
+        configure_connection(db)
+        try:
+            while True:
+                item = self._queue.get()
+                batch, markers, stop = self._collect(item)
+                if batch:
+                    self._commit(db, batch)
+                for marker in markers:
+                    marker.set()
+                if stop:
+                    return
+        finally:
+            db.close()
+
+    def _collect(self, first):
+        """Gather a batch starting with `first`, until it's full or due."""
+        batch, markers, stop = [], [], False
+        item = first
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if item is None:
+                stop = True
+            elif isinstance(item, threading.Event):
+                # Everything queued before the marker is in this batch,
+                # so commit now rather than waiting out the interval
+                markers.append(item)
+            else:
+                batch.append(item)
+
+            if stop or markers or len(batch) >= self.batch_size:
+                return batch, markers, stop
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return batch, markers, stop
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, markers, stop
+
+    def _commit(self, db: sqlite3.Connection, batch: list):
+        start = time.perf_counter()
+        try:
+            with db:
+                for sql, params in batch:
+                    db.execute(sql, params)
+        except sqlite3.Error as e:
+            logger.warning(f"Batch of {len(batch)} writes failed ({e}), retrying one by one")
+            for sql, params in batch:
+                try:
+                    with db:
+                        db.execute(sql, params)
+                except sqlite3.Error as e:
+                    self.stats.failed += 1
+                    logger.error(f"Dropped write: {e}")
+        self.stats.statements += len(batch)
+        self.stats.batches += 1
+        self.stats.total_commit_time += time.perf_counter() - start
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Commit everything queued, then stop the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
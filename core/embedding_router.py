@@ -0,0 +1,370 @@
+"""
+Embedding Router - Nearest-Neighbour Intent Classification
+
+Routes queries by embedding them and finding the most similar exemplar,
+instead of asking a generative model. Exemplars come from:
+
+- The few-shot examples in core.router.ROUTER_SYSTEM_PROMPT
+- Tool/action descriptions (core.router.ACTION_HANDLERS by default)
+- Past successful routes recorded by ContextManager
+
+Vectors live in a row-normalized NumPy matrix, so scoring a query against
+every exemplar is a single matrix-vector product. The index is persisted
+to disk; on restart only exemplars that aren't already stored are embedded.
+
+When the best similarity is below the threshold the router returns None
+and the caller escalates to the LLM. It also escalates when the match
+can't supply the parameters: a parameterless exemplar (e.g. an action
+description) for an action that takes parameters, or an exemplar whose
+numbers don't line up with the query's. Embeddings barely see numbers, so
+numeric parameters are never replayed as stored; they are refilled from
+the query ("set volume to 30" against "Set volume to 50%" -> 30).
+
+Usage:
+    from core.embedding_router import EmbeddingRouter
+    from core.llm_engine import LLMEngine
+
+    engine = LLMEngine()
+    router = EmbeddingRouter(engine.embed, index_path=Path("data/intent_index.npz"))
+    router.add_router_examples()
+    router.add_action_handlers()
+    router.build()
+
+    result = router.route("turn the sound off")  # RouterResult or None
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .router import ACTION_HANDLERS, ROUTER_SYSTEM_PROMPT, IntentCategory, RouterResult
+
+if TYPE_CHECKING:
+    from .context_manager import ContextManager
+
+logger = logging.getLogger(__name__)
+
+# 'User: "<query>"' followed by its JSON answer on the next line
+_PROMPT_EXAMPLE = re.compile(r'^User: "(.+)"\n(\{.*\})$', re.MULTILINE)
+
+# Standalone numbers (not part of "A1" or "v2.0"), as in app.core.route_memo
+_NUMBER = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+
+# Actions that are complete without parameters; any other action matched
+# through a parameterless exemplar is escalated to the LLM
+PARAMETERLESS_ACTIONS = frozenset({
+    "get_volume", "mute", "unmute", "get_brightness", "chat", "question",
+})
+
+
+@dataclass
+class EmbeddingMatch:
+    """A scored exemplar."""
+    text: str
+    label: Dict[str, Any]
+    similarity: float
+
+
+class ExemplarIndex:
+    """
+    Exemplar texts, their routing labels and a normalized vector matrix.
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.texts: List[str] = []
+        self.labels: List[Dict[str, Any]] = []
+        self.matrix = np.zeros((0, dim or 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def add(self, texts: List[str], labels: List[Dict[str, Any]], vectors: Any):
+        """Append exemplars; vectors are L2-normalized on the way in."""
+        block = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1))
+        if len(self) == 0:
+            self.matrix = block
+        else:
+            self.matrix = np.vstack([self.matrix, block])
+        self.texts.extend(texts)
+        self.labels.extend(labels)
+
+    def search(self, vector: Any, k: int = 1) -> List[Tuple[int, float]]:
+        """Top-k (row, cosine similarity) for a query vector."""
+        if len(self) == 0:
+            return []
+        query = _normalize(np.asarray(vector, dtype=np.float32).reshape(1, -1))[0]
+        scores = self.matrix @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def save(self, path: Path, model: str):
+        """Persist matrix and metadata to a single .npz file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = json.dumps({"model": model, "texts": self.texts, "labels": self.labels})
+        with open(path, "wb") as f:
+            np.savez(f, matrix=self.matrix, meta=np.array(meta))
+
+    @classmethod
+    def load(cls, path: Path, model: str) -> Optional["ExemplarIndex"]:
+        """Load a saved index; None if missing or built with another model."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["meta"]))
+                matrix = data["matrix"].astype(np.float32)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable exemplar index {path}: {e}")
+            return None
+        if meta.get("model") != model:
+            return None
+        index = cls()
+        index.texts, index.labels, index.matrix = meta["texts"], meta["labels"], matrix
+        return index
+
+
+def _number(text: str) -> Any:
+    return float(text) if "." in text else int(text)
+
+
+def _refill(value: Any, stored: List[str], query: List[str]) -> Any:
+    """
+    Swap an exemplar's numbers for the query's, position by position.
+
+    Raises:
+        ValueError: If a numeric value isn't one of the exemplar's numbers,
+            so there is nothing in the query to take it from.
+    """
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        for i, number in enumerate(stored):
+            if _number(number) == value:
+                return _number(query[i])
+        raise ValueError(f"numeric parameter {value!r} not taken from the exemplar")
+    if isinstance(value, str):
+        if value in stored:
+            return query[stored.index(value)]
+        if set(_NUMBER.findall(value)) & set(stored):
+            raise ValueError(f"string parameter {value!r} embeds an exemplar number")
+        return value
+    if isinstance(value, dict):
+        return {k: _refill(v, stored, query) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_refill(v, stored, query) for v in value]
+    return value
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class EmbeddingRouter:
+    """
+    Nearest-neighbour router over embedded exemplars.
+
+    Exemplar labels carry {"category", "action", "parameters"}. Parameter
+    values are specific to the exemplar ("volume 50"), so an exemplar with
+    parameters only answers near-duplicate queries (exact_threshold), with
+    its numbers replaced by the query's; everything else with parameters is
+    escalated to the LLM, as is a parameterless exemplar for an action
+    outside parameterless_actions.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], List[List[float]]],
+        threshold: float = 0.82,
+        exact_threshold: float = 0.97,
+        index_path: Optional[Path] = None,
+        model: str = "nomic-embed-text",
+        batch_size: int = 64,
+        parameterless_actions: Optional[Set[str]] = None,
+    ):
+        """
+        Initialize the embedding router.
+
+        Args:
+            embed: Batch embedding function (e.g. LLMEngine.embed)
+            threshold: Minimum cosine similarity to route without the LLM
+            exact_threshold: Similarity needed to reuse an exemplar's parameters
+            index_path: Where to persist the index (.npz)
+            model: Embedding model name, stored with the index
+            batch_size: Texts per embedding request when building
+            parameterless_actions: Actions a parameterless exemplar may
+                answer (default PARAMETERLESS_ACTIONS)
+        """
+        self._embed = embed
+        self.threshold = threshold
+        self.exact_threshold = exact_threshold
+        self.index_path = Path(index_path) if index_path else None
+        self.model = model
+        self.batch_size = batch_size
+        self.parameterless_actions = (
+            PARAMETERLESS_ACTIONS if parameterless_actions is None else frozenset(parameterless_actions)
+        )
+
+        self.index = ExemplarIndex()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+        logger.info(f"Embedding router initialized (threshold={threshold})")
+
+    # Exemplar sources
+
+    def add_exemplar(self, text: str, category: str, action: str, parameters: Optional[dict] = None):
+        """Queue an exemplar; it is embedded on the next build()."""
+        text = text.strip()
+        if text:
+            self._pending[text] = {
+                "category": category,
+                "action": action,
+                "parameters": parameters or {},
+            }
+
+    def add_router_examples(self, prompt: str = ROUTER_SYSTEM_PROMPT) -> int:
+        """Add the few-shot examples from a router system prompt."""
+        count = 0
+        for query, answer in _PROMPT_EXAMPLE.findall(prompt):
+            try:
+                data = json.loads(answer)
+            except json.JSONDecodeError:
+                continue
+            self.add_exemplar(query, data.get("category", ""), data.get("action", ""), data.get("parameters"))
+            count += 1
+        return count
+
+    def add_action_handlers(
+        self,
+        handlers: Dict[IntentCategory, Dict[str, Optional[str]]] = ACTION_HANDLERS,
+        descriptions: Optional[Dict[str, str]] = None,
+    ) -> int:
+        """
+        Add one exemplar per action, described by its name or an explicit
+        description (e.g. a tool's description string).
+        """
+        descriptions = descriptions or {}
+        count = 0
+        for category, actions in handlers.items():
+            for action in actions:
+                text = descriptions.get(action) or action.replace("_", " ")
+                self.add_exemplar(text, category.value, action)
+                count += 1
+        return count
+
+    def add_action_history(self, context_manager: "ContextManager", limit: int = 500) -> int:
+        """
+        Add past successful routes from a ContextManager's actions table.
+
+        Actions are expected to be recorded with action_type set to the
+        intent category and tool_name set to the routed action.
+        """
+        known = {category.value for category in IntentCategory}
+        count = 0
+        for route in context_manager.get_successful_routes(limit):
+            if route["action_type"] in known:
+                self.add_exemplar(route["query"], route["action_type"], route["tool_name"], route["parameters"])
+                count += 1
+        return count
+
+    # Index lifecycle
+
+    def build(self) -> int:
+        """
+        Embed queued exemplars and persist the index.
+
+        Vectors already present in the saved index are reused, so a
+        restart with unchanged exemplars makes no embedding calls.
+
+        Returns:
+            Number of texts that had to be embedded
+        """
+        saved = ExemplarIndex.load(self.index_path, self.model) if self.index_path else None
+        reusable = {}
+        if saved is not None:
+            reusable = {text: row for row, text in enumerate(saved.texts)}
+
+        index = ExemplarIndex()
+        texts = list(self._pending)
+        labels = [self._pending[t] for t in texts]
+
+        cached_rows = [
+            (t, label, reusable[t]) for t, label in zip(texts, labels) if t in reusable
+        ]
+        if cached_rows:
+            index.add(
+                [t for t, _, _ in cached_rows],
+                [label for _, label, _ in cached_rows],
+                saved.matrix[[r for _, _, r in cached_rows]],
+            )
+
+        missing = [(t, label) for t, label in zip(texts, labels) if t not in reusable]
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            vectors = self._embed([t for t, _ in batch])
+            index.add([t for t, _ in batch], [label for _, label in batch], vectors)
+
+        self.index = index
+        if self.index_path and missing:
+            index.save(self.index_path, self.model)
+
+        logger.info(f"Exemplar index built: {len(index)} exemplars, {len(missing)} embedded")
+        return len(missing)
+
+    # Routing
+
+    def match(self, query: str, k: int = 1) -> List[EmbeddingMatch]:
+        """Top-k exemplars for a query."""
+        if len(self.index) == 0:
+            return []
+        vector = self._embed([query])[0]
+        return [
+            EmbeddingMatch(self.index.texts[row], self.index.labels[row], score)
+            for row, score in self.index.search(vector, k)
+        ]
+
+    def route(self, query: str) -> Optional[RouterResult]:
+        """
+        Route a query by nearest exemplar.
+
+        Returns:
+            RouterResult (confidence = similarity), or None to escalate
+        """
+        matches = self.match(query)
+        if not matches:
+            return None
+
+        best = matches[0]
+        if best.similarity < self.threshold:
+            return None
+        parameters = best.label["parameters"]
+        if not parameters and best.label["action"] not in self.parameterless_actions:
+            return None
+        if parameters and best.similarity < self.exact_threshold:
+            return None
+
+        stored, numbers = _NUMBER.findall(best.text), _NUMBER.findall(query)
+        if len(stored) != len(numbers):
+            return None
+        try:
+            parameters = _refill(parameters, stored, numbers)
+        except ValueError:
+            return None
+
+        return RouterResult(
+            category=IntentCategory.from_string(best.label["category"]),
+            action=best.label["action"],
+            parameters=parameters,
+            confidence=best.similarity,
+            raw_query=query,
+        )
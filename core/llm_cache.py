@@ -0,0 +1,266 @@
+"""
+LLM Response Cache - Content-Addressed Caching for Deterministic Calls
+
+Low-temperature calls with identical inputs (e.g. intent routing of
+repeated commands like "mute" or "volume 50") return the same answer, so
+paying a full Ollama round trip for each one is wasted latency. This module
+provides a two-tier cache keyed on model + normalized prompt + options:
+
+- Memory tier: bounded LRU (OrderedDict) for the hot set
+- Disk tier: optional SQLite table that survives restarts
+
+Entries expire after a TTL and both tiers are size-bounded.
+
+Usage:
+    from core.llm_cache import ResponseCache
+
+    cache = ResponseCache(persistence_path=Path("data/llm_cache.db"))
+    key = cache.make_key("llama3.2:3b", messages, {"temperature": 0.1})
+    if (cached := cache.get(key)) is None:
+        cached = call_llm()
+        cache.put(key, cached)
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: Union[str, list[dict]]) -> Union[str, list[dict]]:
+    """
+    Normalize a prompt or message list for cache keying.
+
+    Collapses runs of whitespace and strips the ends of every text field.
+    Case is preserved because parameters (file names, quoted text) may be
+    case-sensitive.
+    """
+    if isinstance(prompt, str):
+        return _WHITESPACE.sub(" ", prompt).strip()
+    return [
+        {k: normalize_prompt(v) if isinstance(v, str) else v for k, v in message.items()}
+        for message in prompt
+    ]
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for ResponseCache."""
+    hits: int = 0
+    misses: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        return data
+
+
+class ResponseCache:
+    """
+    Two-tier (memory LRU + SQLite) cache for deterministic LLM responses.
+
+    Values must be JSON-serializable. The cache is thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl: Optional[float] = 24 * 3600.0,
+        persistence_path: Optional[Path] = None,
+        max_disk_entries: int = 10000,
+    ):
+        """
+        Initialize the response cache.
+
+        Args:
+            max_entries: Maximum entries held in the memory tier
+            ttl: Seconds before an entry expires (None = never)
+            persistence_path: Path for the SQLite tier (optional)
+            max_disk_entries: Maximum entries kept in the SQLite tier
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.stats = CacheStats()
+
+        # key -> (created_at, value)
+        self._memory: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        if persistence_path:
+            self._init_database(Path(persistence_path))
+
+        logger.info(f"Response cache initialized (max_entries={max_entries}, ttl={ttl})")
+
+    def _init_database(self, path: Path):
+        """Initialize the SQLite tier."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access);
+        """)
+        self._db.commit()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        prompt: Union[str, list[dict]],
+        options: Optional[dict] = None,
+        **extra: Any,
+    ) -> str:
+        """
+        Build a content-addressed cache key.
+
+        Args:
+            model: Model name
+            prompt: Prompt string or chat message list
+            options: Sampling options (temperature, num_predict, ...)
+            **extra: Anything else that changes the output (system prompt,
+                     images, response format)
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        material = {
+            "model": model,
+            "prompt": normalize_prompt(prompt),
+            "options": options or {},
+            **{k: v for k, v in extra.items() if v is not None},
+        }
+        encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        """Look up a key, promoting disk hits into the memory tier."""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.stats.hits += 1
+                    self.stats.memory_hits += 1
+                    return value
+                del self._memory[key]
+                self.stats.expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = json.loads(row[0]), row[1]
+                    if not self._expired(created_at, now):
+                        self._db.execute(
+                            "UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key)
+                        )
+                        self._db.commit()
+                        self._remember(key, created_at, value)
+                        self.stats.hits += 1
+                        self.stats.disk_hits += 1
+                        return value
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.stats.expirations += 1
+
+            self.stats.misses += 1
+            return None
+
+    def put(self, key: str, value: Any):
+        """Store a value in both tiers."""
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, now, value)
+
+            if self._db is not None:
+                self._db.execute(
+                    """INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_access)
+                       VALUES (?, ?, ?, ?)""",
+                    (key, json.dumps(value), now, now),
+                )
+                self._trim_disk()
+                self._db.commit()
+
+    def _remember(self, key: str, created_at: float, value: Any):
+        """Insert into the memory tier, evicting least recently used entries."""
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _trim_disk(self):
+        """Drop expired rows and the least recently used overflow."""
+        if self.ttl is not None:
+            cursor = self._db.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+            self.stats.expirations += max(cursor.rowcount, 0)
+
+        (count,) = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._db.execute(
+                """DELETE FROM llm_cache WHERE key IN (
+                       SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?
+                   )""",
+                (overflow,),
+            )
+            self.stats.evictions += overflow
+
+    def clear(self):
+        """Remove all entries from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def close(self):
+        """Close the SQLite tier."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __del__(self):
+        """Cleanup database connection."""
+        if getattr(self, "_db", None) is not None:
+            self._db.close()
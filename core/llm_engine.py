@@ -5,18 +5,60 @@ This module provides the interface to the local LLM running via Ollama.
 Supports text and vision (multimodal) inputs with Llama 3.2 Vision.
 """
 
+import asyncio
 import base64
 import json
 import logging
-from dataclasses import dataclass
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Generator, Optional, Union
+from typing import TYPE_CHECKING, AsyncIterator, Generator, Optional, Union
 
 import httpx
 
+if TYPE_CHECKING:
+    from .chat_session import ChatSession
+    from .llm_cache import ResponseCache
+
 logger = logging.getLogger(__name__)
 
 
+def _encode_images(images: list) -> list[str]:
+    """Convert images (paths, base64 strings, or bytes) to base64 strings."""
+    processed = []
+    for img in images:
+        if isinstance(img, bytes):
+            processed.append(base64.b64encode(img).decode("utf-8"))
+        elif isinstance(img, (str, Path)):
+            path = Path(img)
+            if path.exists():
+                with open(path, "rb") as f:
+                    processed.append(base64.b64encode(f.read()).decode("utf-8"))
+            else:
+                # Assume it's already base64
+                processed.append(str(img))
+    return processed
+
+
+def _cache_key(cache: "ResponseCache", payload: dict, prompt_field: str) -> str:
+    """Cache key for an Ollama payload: model + prompt + options + extras."""
+    # keep_alive only affects residency, never the answer
+    skip = ("model", prompt_field, "options", "stream", "keep_alive")
+    extra = {k: v for k, v in payload.items() if k not in skip}
+    return cache.make_key(payload["model"], payload[prompt_field], payload["options"], **extra)
+
+
+def _http2_available() -> bool:
+    """HTTP/2 in httpx needs the optional 'h2' package."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
 @dataclass
 class LLMResponse:
     """Response from the LLM."""
@@ -24,6 +66,10 @@ class LLMResponse:
     model: str
     tokens_used: int
     done: bool
+    prompt_tokens: int = 0
+    context: Optional[list[int]] = None
+    # Nanoseconds Ollama spent loading the model for this call (0 if warm)
+    load_duration: int = 0
 
 
 class LLMEngine:
@@ -40,6 +86,7 @@ class LLMEngine:
         host: str = "http://localhost:11434",
         temperature: float = 0.7,
         context_length: int = 8192,
+        cache: Optional["ResponseCache"] = None,
     ):
         """
         Initialize the LLM Engine.
@@ -49,11 +96,14 @@ class LLMEngine:
             host: Ollama API host URL
             temperature: Sampling temperature (0.0 - 1.0)
             context_length: Maximum context window size
+            cache: Optional ResponseCache for non-streaming calls. Only
+                   useful for deterministic (low temperature) workloads.
         """
         self.model = model
         self.host = host.rstrip("/")
         self.temperature = temperature
         self.context_length = context_length
+        self.cache = cache
         self._client = httpx.Client(timeout=120.0)
         
         logger.info(f"LLM Engine initialized with model: {model}")
@@ -64,6 +114,9 @@ class LLMEngine:
         system_prompt: Optional[str] = None,
         images: Optional[list[Union[str, Path, bytes]]] = None,
         stream: bool = False,
+        cancel_event: Optional[threading.Event] = None,
+        context: Optional[list[int]] = None,
+        keep_alive: Optional[int] = None,
     ) -> Union[LLMResponse, Generator[str, None, None]]:
         """
         Generate a response from the LLM.
@@ -73,6 +126,12 @@ class LLMEngine:
             system_prompt: Optional system prompt for context
             images: Optional list of images (paths, base64 strings, or bytes)
             stream: Whether to stream the response
+            cancel_event: Stop generating once this is set (non-streaming
+                          calls only). The partial response is returned
+                          with done=False.
+            context: `context` from a previous response; continues that
+                     conversation without re-evaluating it
+            keep_alive: Seconds Ollama should keep the model loaded
             
         Returns:
             LLMResponse or generator of response chunks if streaming
@@ -90,13 +149,23 @@ class LLMEngine:
         if system_prompt:
             payload["system"] = system_prompt
         
+        if context:
+            payload["context"] = context
+        
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        
         if images:
             payload["images"] = self._process_images(images)
         
         if stream:
             return self._stream_generate(payload)
-        else:
-            return self._sync_generate(payload)
+        if cancel_event is not None:
+            return self._cached(
+                payload, "prompt",
+                lambda p: self._collect_stream("/api/generate", p, cancel_event),
+            )
+        return self._cached(payload, "prompt", self._sync_generate)
     
     def _sync_generate(self, payload: dict) -> LLMResponse:
         """Synchronous generation."""
@@ -113,6 +182,9 @@ class LLMEngine:
                 model=data.get("model", self.model),
                 tokens_used=data.get("eval_count", 0),
                 done=data.get("done", True),
+                prompt_tokens=data.get("prompt_eval_count", 0),
+                context=data.get("context"),
+                load_duration=data.get("load_duration", 0),
             )
         except httpx.HTTPError as e:
             logger.error(f"LLM generation failed: {e}")
@@ -140,25 +212,15 @@ class LLMEngine:
     
     def _process_images(self, images: list) -> list[str]:
         """Convert images to base64 strings."""
-        processed = []
-        for img in images:
-            if isinstance(img, bytes):
-                processed.append(base64.b64encode(img).decode("utf-8"))
-            elif isinstance(img, (str, Path)):
-                path = Path(img)
-                if path.exists():
-                    with open(path, "rb") as f:
-                        processed.append(base64.b64encode(f.read()).decode("utf-8"))
-                else:
-                    # Assume it's already base64
-                    processed.append(str(img))
-        return processed
+        return _encode_images(images)
     
     def chat(
         self,
         messages: list[dict],
         images: Optional[list] = None,
         stream: bool = False,
+        cancel_event: Optional[threading.Event] = None,
+        keep_alive: Optional[int] = None,
     ) -> Union[LLMResponse, Generator[str, None, None]]:
         """
         Chat-style interaction with conversation history.
@@ -167,6 +229,10 @@ class LLMEngine:
             messages: List of {"role": "user|assistant|system", "content": "..."}
             images: Optional images for the last message
             stream: Whether to stream the response
+            cancel_event: Stop generating once this is set (non-streaming
+                          calls only). The partial response is returned
+                          with done=False.
+            keep_alive: Seconds Ollama should keep the model loaded
             
         Returns:
             LLMResponse or generator of response chunks
@@ -181,14 +247,88 @@ class LLMEngine:
             }
         }
         
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        
         if images:
             # Add images to the last user message
             payload["messages"][-1]["images"] = self._process_images(images)
         
         if stream:
             return self._stream_chat(payload)
-        else:
-            return self._sync_chat(payload)
+        if cancel_event is not None:
+            return self._cached(
+                payload, "messages",
+                lambda p: self._collect_stream("/api/chat", p, cancel_event),
+            )
+        return self._cached(payload, "messages", self._sync_chat)
+    
+    def _cached(self, payload: dict, prompt_field: str, call) -> LLMResponse:
+        """Serve a non-streaming call from the response cache if possible."""
+        if self.cache is None:
+            return call(payload)
+        
+        key = _cache_key(self.cache, payload, prompt_field)
+        if (cached := self.cache.get(key)) is not None:
+            # No model ran, so nothing was loaded
+            return LLMResponse(**{**cached, "load_duration": 0})
+        
+        response = call(payload)
+        if response.done:
+            self.cache.put(key, asdict(response))
+        return response
+    
+    def _collect_stream(
+        self,
+        path: str,
+        payload: dict,
+        cancel_event: threading.Event,
+    ) -> LLMResponse:
+        """
+        Stream a call into a single response, stopping early on cancel.
+        
+        Leaving the stream closes the connection, which makes Ollama stop
+        generating, so a cancelled call stops costing GPU time.
+        """
+        payload = {**payload, "stream": True}
+        parts: list[str] = []
+        data: dict = {}
+        
+        try:
+            with self._client.stream("POST", f"{self.host}{path}", json=payload) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if cancel_event.is_set():
+                        return LLMResponse(
+                            content="".join(parts),
+                            model=self.model,
+                            tokens_used=len(parts),
+                            done=False,
+                        )
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if path == "/api/generate":
+                        chunk = data.get("response")
+                    else:
+                        chunk = data.get("message", {}).get("content")
+                    if chunk:
+                        parts.append(chunk)
+                    if data.get("done"):
+                        break
+        except httpx.HTTPError as e:
+            logger.error(f"LLM call failed: {e}")
+            raise
+        
+        return LLMResponse(
+            content="".join(parts),
+            model=data.get("model", self.model),
+            tokens_used=data.get("eval_count", len(parts)),
+            done=True,
+            prompt_tokens=data.get("prompt_eval_count", 0),
+            context=data.get("context"),
+            load_duration=data.get("load_duration", 0),
+        )
     
     def _sync_chat(self, payload: dict) -> LLMResponse:
         """Synchronous chat."""
@@ -205,6 +345,8 @@ class LLMEngine:
                 model=data.get("model", self.model),
                 tokens_used=data.get("eval_count", 0),
                 done=data.get("done", True),
+                prompt_tokens=data.get("prompt_eval_count", 0),
+                load_duration=data.get("load_duration", 0),
             )
         except httpx.HTTPError as e:
             logger.error(f"LLM chat failed: {e}")
@@ -230,6 +372,45 @@ class LLMEngine:
             logger.error(f"LLM chat streaming failed: {e}")
             raise
     
+    def session(self, system_prompt: Optional[str] = None, **kwargs) -> "ChatSession":
+        """
+        Start a multi-turn conversation on this engine.
+        
+        Unlike chat(), later turns reuse the context Ollama returned for
+        earlier ones instead of resending the whole history.
+        
+        Args:
+            system_prompt: Optional system prompt for the conversation
+            **kwargs: Further ChatSession options
+            
+        Returns:
+            ChatSession bound to this engine
+        """
+        from .chat_session import ChatSession
+        return ChatSession(self, system_prompt=system_prompt, **kwargs)
+    
+    def embed(self, texts: list[str], model: str = "nomic-embed-text") -> list[list[float]]:
+        """
+        Embed a batch of texts with an Ollama embedding model.
+        
+        Args:
+            texts: Texts to embed (sent in a single request)
+            model: Embedding model name
+            
+        Returns:
+            One vector per input text
+        """
+        try:
+            response = self._client.post(
+                f"{self.host}/api/embed",
+                json={"model": model, "input": texts},
+            )
+            response.raise_for_status()
+            return response.json().get("embeddings", [])
+        except httpx.HTTPError as e:
+            logger.error(f"LLM embedding failed: {e}")
+            raise
+    
     def is_available(self) -> bool:
         """Check if Ollama is running and the model is available."""
         try:
@@ -244,3 +425,334 @@ class LLMEngine:
         """Cleanup HTTP client."""
         if hasattr(self, "_client"):
             self._client.close()
+
+
+@dataclass
+class EngineStats:
+    """Concurrency and queueing metrics for AsyncLLMEngine."""
+    max_concurrency: int
+    in_flight: int = 0
+    waiting: int = 0
+    peak_in_flight: int = 0
+    peak_waiting: int = 0
+    total_requests: int = 0
+    failed_requests: int = 0
+    total_wait_time: float = 0.0
+    
+    @property
+    def avg_wait_time(self) -> float:
+        """Average time a request spent queued for a slot (seconds)."""
+        if not self.total_requests:
+            return 0.0
+        return self.total_wait_time / self.total_requests
+    
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["avg_wait_time"] = self.avg_wait_time
+        return data
+
+
+class AsyncLLMEngine:
+    """
+    Asynchronous, pooled LLM Engine using Ollama.
+    
+    Shares one keep-alive connection pool between all callers and bounds
+    the number of in-flight requests with a semaphore, so routing, chat
+    and vision calls from concurrent sessions overlap instead of queuing
+    behind a single blocking client. Every call accepts a model override
+    so one engine can serve the router, chat and vision models.
+    
+    Example:
+        async with AsyncLLMEngine(max_concurrency=4) as engine:
+            route, answer = await asyncio.gather(
+                engine.chat(route_messages, model="llama3.2:3b"),
+                engine.generate("Describe this", images=[png_bytes]),
+            )
+    """
+    
+    def __init__(
+        self,
+        model: str = "llama3.2-vision",
+        host: str = "http://localhost:11434",
+        temperature: float = 0.7,
+        context_length: int = 8192,
+        max_concurrency: int = 4,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 5,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 120.0,
+        http2: bool = True,
+        cache: Optional["ResponseCache"] = None,
+    ):
+        """
+        Initialize the async LLM Engine.
+        
+        Args:
+            model: Default Ollama model name
+            host: Ollama API host URL
+            temperature: Sampling temperature (0.0 - 1.0)
+            context_length: Maximum context window size
+            max_concurrency: Maximum requests in flight at once; further
+                callers wait in the queue
+            max_connections: Connection pool size
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection stays in the pool
+            timeout: Request timeout in seconds
+            http2: Use HTTP/2 when the 'h2' package is installed
+            cache: Optional ResponseCache for non-streaming calls
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        
+        self.model = model
+        self.host = host.rstrip("/")
+        self.temperature = temperature
+        self.context_length = context_length
+        self.max_concurrency = max_concurrency
+        self.http2 = http2 and _http2_available()
+        self.cache = cache
+        self.stats = EngineStats(max_concurrency=max_concurrency)
+        
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+        
+        logger.info(
+            f"Async LLM Engine initialized with model: {model} "
+            f"(concurrency={max_concurrency}, http2={self.http2})"
+        )
+    
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        """Wait for an in-flight slot, tracking queue depth and wait time."""
+        stats = self.stats
+        stats.waiting += 1
+        stats.peak_waiting = max(stats.peak_waiting, stats.waiting)
+        start = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            stats.waiting -= 1
+        
+        stats.total_wait_time += time.perf_counter() - start
+        stats.total_requests += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        try:
+            yield
+        except Exception:
+            stats.failed_requests += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            self._semaphore.release()
+    
+    def _options(self, options: Optional[dict]) -> dict:
+        merged = {
+            "temperature": self.temperature,
+            "num_ctx": self.context_length,
+        }
+        if options:
+            merged.update(options)
+        return merged
+    
+    def _generate_payload(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        images: Optional[list],
+        model: Optional[str],
+        options: Optional[dict],
+        stream: bool,
+    ) -> dict:
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": self._options(options),
+        }
+        if system_prompt:
+            payload["system"] = system_prompt
+        if images:
+            payload["images"] = _encode_images(images)
+        return payload
+    
+    def _chat_payload(
+        self,
+        messages: list[dict],
+        images: Optional[list],
+        model: Optional[str],
+        options: Optional[dict],
+        stream: bool,
+    ) -> dict:
+        payload = {
+            "model": model or self.model,
+            "messages": [dict(m) for m in messages],
+            "stream": stream,
+            "options": self._options(options),
+        }
+        if images:
+            # Add images to the last user message
+            payload["messages"][-1]["images"] = _encode_images(images)
+        return payload
+    
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        images: Optional[list[Union[str, Path, bytes]]] = None,
+        model: Optional[str] = None,
+        options: Optional[dict] = None,
+    ) -> LLMResponse:
+        """
+        Generate a response from the LLM.
+        
+        Args:
+            prompt: User prompt/query
+            system_prompt: Optional system prompt for context
+            images: Optional list of images (paths, base64 strings, or bytes)
+            model: Override the default model for this call
+            options: Extra Ollama options merged over the defaults
+            
+        Returns:
+            LLMResponse
+        """
+        payload = self._generate_payload(prompt, system_prompt, images, model, options, False)
+        data = await self._cached_post("/api/generate", payload, "prompt")
+        return LLMResponse(
+            content=data.get("response", ""),
+            model=data.get("model", payload["model"]),
+            tokens_used=data.get("eval_count", 0),
+            done=data.get("done", True),
+        )
+    
+    async def chat(
+        self,
+        messages: list[dict],
+        images: Optional[list] = None,
+        model: Optional[str] = None,
+        options: Optional[dict] = None,
+    ) -> LLMResponse:
+        """
+        Chat-style interaction with conversation history.
+        
+        Args:
+            messages: List of {"role": "user|assistant|system", "content": "..."}
+            images: Optional images for the last message
+            model: Override the default model for this call
+            options: Extra Ollama options merged over the defaults
+            
+        Returns:
+            LLMResponse
+        """
+        payload = self._chat_payload(messages, images, model, options, False)
+        data = await self._cached_post("/api/chat", payload, "messages")
+        return LLMResponse(
+            content=data.get("message", {}).get("content", ""),
+            model=data.get("model", payload["model"]),
+            tokens_used=data.get("eval_count", 0),
+            done=data.get("done", True),
+        )
+    
+    async def stream_generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        images: Optional[list[Union[str, Path, bytes]]] = None,
+        model: Optional[str] = None,
+        options: Optional[dict] = None,
+    ) -> AsyncIterator[str]:
+        """Streaming variant of generate(); yields response chunks."""
+        payload = self._generate_payload(prompt, system_prompt, images, model, options, True)
+        async for data in self._stream("/api/generate", payload):
+            if chunk := data.get("response"):
+                yield chunk
+    
+    async def stream_chat(
+        self,
+        messages: list[dict],
+        images: Optional[list] = None,
+        model: Optional[str] = None,
+        options: Optional[dict] = None,
+    ) -> AsyncIterator[str]:
+        """Streaming variant of chat(); yields response chunks."""
+        payload = self._chat_payload(messages, images, model, options, True)
+        async for data in self._stream("/api/chat", payload):
+            if chunk := data.get("message", {}).get("content"):
+                yield chunk
+    
+    async def embed(self, texts: list[str], model: str = "nomic-embed-text") -> list[list[float]]:
+        """Embed a batch of texts with an Ollama embedding model."""
+        data = await self._post("/api/embed", {"model": model, "input": texts})
+        return data.get("embeddings", [])
+    
+    async def _cached_post(self, path: str, payload: dict, prompt_field: str) -> dict:
+        """_post() fronted by the response cache, if one is configured."""
+        if self.cache is None:
+            return await self._post(path, payload)
+        
+        key = _cache_key(self.cache, payload, prompt_field)
+        if (cached := self.cache.get(key)) is not None:
+            return cached
+        
+        data = await self._post(path, payload)
+        self.cache.put(key, data)
+        return data
+    
+    async def _post(self, path: str, payload: dict) -> dict:
+        """Send a non-streaming request within an in-flight slot."""
+        async with self._slot():
+            try:
+                response = await self._client.post(f"{self.host}{path}", json=payload)
+                response.raise_for_status()
+                return response.json()
+            except httpx.HTTPError as e:
+                logger.error(f"LLM request to {path} failed: {e}")
+                raise
+    
+    async def _stream(self, path: str, payload: dict) -> AsyncIterator[dict]:
+        """Stream NDJSON objects; the slot is held until the stream ends."""
+        async with self._slot():
+            try:
+                async with self._client.stream(
+                    "POST",
+                    f"{self.host}{path}",
+                    json=payload,
+                ) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if line:
+                            data = json.loads(line)
+                            yield data
+                            if data.get("done"):
+                                break
+            except httpx.HTTPError as e:
+                logger.error(f"LLM streaming to {path} failed: {e}")
+                raise
+    
+    async def is_available(self) -> bool:
+        """Check if Ollama is running and the model is available."""
+        try:
+            response = await self._client.get(f"{self.host}/api/tags")
+            response.raise_for_status()
+            models = response.json().get("models", [])
+            return any(m.get("name", "").startswith(self.model) for m in models)
+        except httpx.HTTPError:
+            return False
+    
+    async def aclose(self):
+        """Close the connection pool."""
+        await self._client.aclose()
+    
+    async def __aenter__(self) -> "AsyncLLMEngine":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,297 @@
+"""
+Model Residency - Keep Ollama Models Warm
+
+The router, chat and vision models are loaded by Ollama on first use and
+unloaded after `keep_alive` expires (5 minutes by default), so the first
+request after a pause pays the full model load time. This manager:
+
+- Pre-warms configured models (an empty /api/generate request loads a
+  model without generating anything)
+- Picks `keep_alive` per model from how often it is used, so frequent
+  models stay resident and rare ones free their memory
+- Runs a background loop that warms a model shortly before its next
+  predicted use if it would have been unloaded by then
+- Records `load_duration` from every response, so cold starts are visible
+
+Usage:
+    from core.model_residency import ModelResidencyManager
+
+    residency = ModelResidencyManager(models=["llama3.2:3b", "llama3.2-vision"])
+    residency.prewarm(background=True)
+    residency.start()
+
+    response = ollama.chat(model=m, ..., keep_alive=residency.keep_alive(m))
+    residency.record_use(m, response.get("load_duration"))
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+NANOSECONDS = 1_000_000_000
+
+
+@dataclass
+class ModelUsage:
+    """Usage and load-time counters for one model."""
+    uses: int = 0
+    cold_starts: int = 0
+    total_load_time: float = 0.0
+    warm_pings: int = 0
+    warm_load_time: float = 0.0
+    last_used: Optional[float] = None
+    # When Ollama was last told to keep the model (use or ping)
+    last_touched: Optional[float] = None
+    keep_alive: float = 0.0
+    intervals: Deque[float] = field(default_factory=lambda: deque(maxlen=20))
+
+    @property
+    def cold_start_rate(self) -> float:
+        return self.cold_starts / self.uses if self.uses else 0.0
+
+    @property
+    def mean_interval(self) -> Optional[float]:
+        """Average seconds between uses, once there's history."""
+        return sum(self.intervals) / len(self.intervals) if self.intervals else None
+
+    def to_dict(self) -> dict:
+        return {
+            "uses": self.uses,
+            "cold_starts": self.cold_starts,
+            "cold_start_rate": self.cold_start_rate,
+            "total_load_time": self.total_load_time,
+            "warm_pings": self.warm_pings,
+            "warm_load_time": self.warm_load_time,
+            "keep_alive": self.keep_alive,
+            "mean_interval": self.mean_interval,
+        }
+
+
+class ModelResidencyManager:
+    """
+    Keeps frequently used Ollama models loaded.
+
+    keep_alive for a model is `interval_factor` times its mean gap between
+    uses, clamped to [min_keep_alive, max_keep_alive]. Models without
+    history get default_keep_alive. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        host: str = "http://localhost:11434",
+        models: Optional[Iterable[str]] = None,
+        default_keep_alive: float = 300.0,
+        min_keep_alive: float = 60.0,
+        max_keep_alive: float = 3600.0,
+        interval_factor: float = 2.0,
+        cold_start_threshold: float = 0.5,
+        check_interval: float = 15.0,
+        warm_lead: float = 30.0,
+        timeout: float = 120.0,
+    ):
+        """
+        Initialize the residency manager.
+
+        Args:
+            host: Ollama API host URL
+            models: Models to pre-warm and track
+            default_keep_alive: Seconds to keep a model without usage history
+            min_keep_alive: Lower bound for adaptive keep_alive
+            max_keep_alive: Upper bound for adaptive keep_alive
+            interval_factor: keep_alive as a multiple of the mean gap between uses
+            cold_start_threshold: load_duration (seconds) counted as a cold start
+            check_interval: Seconds between background residency checks
+            warm_lead: Warm this many seconds before a predicted use
+            timeout: HTTP timeout for warm requests (model loads can be slow)
+        """
+        self.host = host.rstrip("/")
+        self.default_keep_alive = default_keep_alive
+        self.min_keep_alive = min_keep_alive
+        self.max_keep_alive = max_keep_alive
+        self.interval_factor = interval_factor
+        self.cold_start_threshold = cold_start_threshold
+        self.check_interval = check_interval
+        self.warm_lead = warm_lead
+
+        self._usage: Dict[str, ModelUsage] = {}
+        self._lock = threading.Lock()
+        self._client = httpx.Client(timeout=timeout)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        for model in models or []:
+            self._get_usage(model)
+
+        logger.info(f"Model residency manager tracking: {list(self._usage)}")
+
+    def _get_usage(self, model: str) -> ModelUsage:
+        with self._lock:
+            if model not in self._usage:
+                self._usage[model] = ModelUsage(keep_alive=self.default_keep_alive)
+            return self._usage[model]
+
+    @property
+    def models(self) -> list[str]:
+        """Tracked model names."""
+        return list(self._usage)
+
+    def keep_alive(self, model: str) -> int:
+        """
+        keep_alive (seconds) to send with a request for this model.
+
+        Args:
+            model: Model name
+
+        Returns:
+            Whole seconds, as accepted by Ollama's keep_alive field
+        """
+        return int(self._get_usage(model).keep_alive)
+
+    def record_use(self, model: str, load_duration: Optional[float] = None):
+        """
+        Record a request made with a model.
+
+        Args:
+            model: Model name
+            load_duration: Ollama's load_duration for the request, in
+                           nanoseconds (as returned by the API)
+        """
+        usage = self._get_usage(model)
+        now = time.time()
+
+        with self._lock:
+            if usage.last_used is not None:
+                usage.intervals.append(now - usage.last_used)
+            usage.uses += 1
+            usage.last_used = now
+            usage.last_touched = now
+
+            if load_duration:
+                seconds = load_duration / NANOSECONDS
+                usage.total_load_time += seconds
+                if seconds >= self.cold_start_threshold:
+                    usage.cold_starts += 1
+                    logger.info(f"Cold start for {model}: {seconds:.2f}s load")
+
+            usage.keep_alive = self._adapt_keep_alive(usage)
+
+    def _adapt_keep_alive(self, usage: ModelUsage) -> float:
+        mean = usage.mean_interval
+        if mean is None:
+            return self.default_keep_alive
+        return max(self.min_keep_alive, min(self.max_keep_alive, mean * self.interval_factor))
+
+    def warm(self, model: str) -> float:
+        """
+        Load a model (or refresh its residency) without generating.
+
+        Args:
+            model: Model name
+
+        Returns:
+            Seconds Ollama spent loading the model (0 if it was resident)
+        """
+        keep_alive = self.keep_alive(model)
+        response = self._client.post(
+            f"{self.host}/api/generate",
+            json={"model": model, "prompt": "", "stream": False, "keep_alive": keep_alive},
+        )
+        response.raise_for_status()
+        seconds = response.json().get("load_duration", 0) / NANOSECONDS
+
+        usage = self._get_usage(model)
+        with self._lock:
+            usage.warm_pings += 1
+            usage.warm_load_time += seconds
+            usage.last_touched = time.time()
+
+        logger.debug(f"Warmed {model} (load {seconds:.2f}s, keep_alive {keep_alive}s)")
+        return seconds
+
+    def prewarm(self, models: Optional[Iterable[str]] = None, background: bool = False):
+        """
+        Load models ahead of their first request.
+
+        Args:
+            models: Models to warm (default: all tracked models)
+            background: Warm in a daemon thread and return immediately;
+                stop() skips the models not yet warmed
+        """
+        models = list(models) if models is not None else self.models
+
+        def run():
+            for model in models:
+                if self._stop.is_set():
+                    break
+                try:
+                    self.warm(model)
+                except Exception as e:
+                    logger.warning(f"Pre-warm of {model} failed: {e}")
+
+        if background:
+            threading.Thread(target=run, name="model-prewarm", daemon=True).start()
+        else:
+            run()
+
+    def due_for_warming(self, now: Optional[float] = None) -> list[str]:
+        """
+        Models predicted to be needed soon that will have been unloaded.
+
+        The next use is predicted as last use + mean gap between uses. A
+        model is due when that moment is within warm_lead seconds and its
+        current residency (last request or ping + keep_alive) ends before
+        it. Each prediction triggers at most one ping, since the ping
+        extends residency past the predicted use.
+        """
+        now = now if now is not None else time.time()
+        due = []
+        with self._lock:
+            for model, usage in self._usage.items():
+                mean = usage.mean_interval
+                if mean is None or usage.last_touched is None:
+                    continue
+                predicted = usage.last_used + mean
+                expires = usage.last_touched + usage.keep_alive
+                if predicted - self.warm_lead <= now <= predicted and expires < predicted:
+                    due.append(model)
+        return due
+
+    def start(self):
+        """Start the background warm-ping loop."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="model-residency", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.check_interval):
+            for model in self.due_for_warming():
+                try:
+                    self.warm(model)
+                except Exception as e:
+                    logger.warning(f"Warm ping for {model} failed: {e}")
+
+    def stop(self):
+        """Stop the background loop."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.check_interval)
+            self._thread = None
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Per-model usage, cold-start and keep_alive figures."""
+        with self._lock:
+            return {model: usage.to_dict() for model, usage in self._usage.items()}
+
+    def close(self):
+        """Stop the loop and close the HTTP client."""
+        self.stop()
+        self._client.close()
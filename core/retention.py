@@ -0,0 +1,325 @@
+"""
+Retention - Pruning and Compaction for the Context Database
+
+Without limits the messages and actions tables grow for as long as the
+agent runs. A RetentionJob enforces a RetentionPolicy on a schedule:
+
+- Rows older than `max_age_days` and rows beyond `max_rows` per table are
+  deleted; once the history tables themselves (not the rest of the file,
+  e.g. vector memory) take more than `max_bytes`, the oldest history is
+  trimmed in proportion
+- Deletes run in small batches, one short transaction each with a pause
+  in between, so the conversation's own writes never wait long
+- Superseded running summaries (all but each session's latest) go too
+- Freed pages are returned to the filesystem with incremental VACUUM,
+  a bounded number of pages per run
+
+The job uses its own connection; with WAL journaling readers are not
+blocked while it works.
+
+Usage:
+    from core.retention import RetentionJob, RetentionPolicy
+
+    job = RetentionJob.from_context(ctx, RetentionPolicy(max_age_days=30))
+    job.start(interval=3600)
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from .db_writer import configure_connection
+
+if TYPE_CHECKING:
+    from .context_manager import ContextManager
+
+logger = logging.getLogger(__name__)
+
+# Tables pruned by age and row count, oldest rows (lowest id) first
+_HISTORY_TABLES = ("messages", "actions")
+
+# Trim-and-measure rounds per run for the max_bytes limit
+_SIZE_PASSES = 4
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Limits enforced by RetentionJob. None disables a limit.
+
+    Attributes:
+        max_age_days: Delete messages, actions and session data older than this
+        max_rows: Keep at most this many rows in each of messages and actions
+        max_bytes: Trim the oldest history when messages and actions (rows
+            and indexes; other tables and the full-text index aside)
+            take more than this
+        keep_summaries: Keep only each session's latest running summary
+    """
+    max_age_days: Optional[float] = 90.0
+    max_rows: Optional[int] = 200_000
+    max_bytes: Optional[int] = None
+    keep_summaries: bool = True
+
+
+@dataclass
+class PruneReport:
+    """What one retention run removed."""
+    messages: int = 0
+    actions: int = 0
+    session_data: int = 0
+    summaries: int = 0
+    pages_vacuumed: int = 0
+    duration: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return self.messages + self.actions + self.session_data + self.summaries
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["rows"] = self.rows
+        return data
+
+
+class RetentionJob:
+    """
+    Enforces a RetentionPolicy on a ContextManager database.
+
+    Call run_once() directly, or start() to run it on a background thread.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        policy: Optional[RetentionPolicy] = None,
+        batch_size: int = 500,
+        pause: float = 0.01,
+        vacuum_pages: int = 1024,
+    ):
+        """
+        Initialize the job.
+
+        Args:
+            path: SQLite database file (the schema must already exist)
+            policy: Limits to enforce (default: RetentionPolicy())
+            batch_size: Rows deleted per transaction
+            pause: Seconds to sleep between batches
+            vacuum_pages: Free pages returned to the filesystem per run
+        """
+        self.path = Path(path)
+        self.policy = policy or RetentionPolicy()
+        self.batch_size = batch_size
+        self.pause = pause
+        self.vacuum_pages = vacuum_pages
+        self.last_report: Optional[PruneReport] = None
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._run_lock = threading.Lock()
+
+    @classmethod
+    def from_context(
+        cls,
+        context: "ContextManager",
+        policy: Optional[RetentionPolicy] = None,
+        **kwargs,
+    ) -> "RetentionJob":
+        """
+        Retention job for a ContextManager's database.
+
+        Args:
+            context: ContextManager created with a persistence_path
+            policy: Limits to enforce
+            **kwargs: Further RetentionJob options
+        """
+        if context._db_path is None:
+            raise ValueError("Retention needs a ContextManager with persistence_path")
+        return cls(context._db_path, policy, **kwargs)
+
+    # Scheduling
+
+    def start(self, interval: float = 3600.0):
+        """
+        Run the job now and then every `interval` seconds in the background.
+
+        Args:
+            interval: Seconds between runs
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval,), name="sqlite-retention", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        """Stop the background thread, finishing the current batch."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self, interval: float):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                logger.error(f"Retention run failed: {e}")
+            self._stop.wait(interval)
+
+    # Pruning
+
+    def run_once(self) -> PruneReport:
+        """
+        Apply the policy once.
+
+        Returns:
+            PruneReport of what was removed
+        """
+        with self._run_lock:
+            start = time.perf_counter()
+            report = PruneReport()
+            db = sqlite3.connect(str(self.path))
+            configure_connection(db)
+            try:
+                self._prune(db, report)
+                report.pages_vacuumed = self._vacuum(db)
+            finally:
+                db.close()
+            report.duration = time.perf_counter() - start
+            self.last_report = report
+
+        if report.rows:
+            logger.info(
+                f"Retention removed {report.messages} messages, {report.actions} actions, "
+                f"{report.session_data} session values, {report.summaries} summaries "
+                f"in {report.duration:.2f}s"
+            )
+        return report
+
+    def _prune(self, db: sqlite3.Connection, report: PruneReport):
+        policy = self.policy
+
+        if policy.max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=policy.max_age_days)).isoformat()
+            for table in _HISTORY_TABLES:
+                removed = self._delete_batched(db, table, "timestamp < ?", (cutoff,))
+                setattr(report, table, getattr(report, table) + removed)
+            report.session_data += self._delete_batched(
+                db, "session_data", "updated_at < ?", (cutoff,), key="rowid"
+            )
+
+        if policy.max_rows is not None:
+            for table in _HISTORY_TABLES:
+                removed = self._trim_to(db, table, policy.max_rows)
+                setattr(report, table, getattr(report, table) + removed)
+
+        if policy.max_bytes is not None:
+            # Rather than deleting a batch at a time until the size drops,
+            # shrink each table in proportion, then measure again (pages
+            # left partly full keep a little over the budget). Only the
+            # history tables are measured: what the trim can't shrink must
+            # not drive it
+            for _ in range(_SIZE_PASSES):
+                size = self._history_bytes(db)
+                if size <= policy.max_bytes or self._stop.is_set():
+                    break
+                fraction = policy.max_bytes / size
+                removed = 0
+                for table in _HISTORY_TABLES:
+                    (count,) = db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+                    removed_here = self._trim_to(db, table, int(count * fraction))
+                    setattr(report, table, getattr(report, table) + removed_here)
+                    removed += removed_here
+                if not removed:
+                    break
+
+        if policy.keep_summaries:
+            report.summaries += self._delete_batched(
+                db,
+                "summaries",
+                "id NOT IN (SELECT MAX(id) FROM summaries GROUP BY session_id)",
+                (),
+            )
+
+    def _delete_batched(
+        self,
+        db: sqlite3.Connection,
+        table: str,
+        where: str,
+        params: tuple,
+        key: str = "id",
+    ) -> int:
+        """Delete matching rows a batch per transaction, oldest first."""
+        total = 0
+        while not self._stop.is_set():
+            with db:
+                count = db.execute(
+                    f"""DELETE FROM {table} WHERE {key} IN (
+                            SELECT {key} FROM {table} WHERE {where} ORDER BY {key} LIMIT ?
+                        )""",
+                    (*params, self.batch_size),
+                ).rowcount
+            total += count
+            if count < self.batch_size:
+                break
+            time.sleep(self.pause)
+        return total
+
+    def _trim_to(self, db: sqlite3.Connection, table: str, keep: int) -> int:
+        """Delete all but the newest `keep` rows of a table."""
+        row = db.execute(
+            f"SELECT id FROM {table} ORDER BY id DESC LIMIT 1 OFFSET ?", (keep,)
+        ).fetchone()
+        if not row:
+            return 0
+        return self._delete_batched(db, table, "id <= ?", (row[0],))
+
+    @staticmethod
+    def _history_bytes(db: sqlite3.Connection) -> int:
+        """Bytes of the pages holding the history tables and their indexes."""
+        placeholders = ",".join("?" * len(_HISTORY_TABLES))
+        try:
+            (size,) = db.execute(
+                f"""SELECT COALESCE(SUM(s.pgsize), 0) FROM dbstat AS s
+                    JOIN sqlite_master AS m ON m.name = s.name
+                    WHERE m.tbl_name IN ({placeholders})""",
+                _HISTORY_TABLES,
+            ).fetchone()
+            return size
+        except sqlite3.OperationalError:
+            # SQLite built without the dbstat table: sum the stored values
+            size = 0
+            for table in _HISTORY_TABLES:
+                columns = [row[1] for row in db.execute(f"PRAGMA table_info({table})")]
+                lengths = " + ".join(
+                    f"COALESCE(length(CAST({column} AS BLOB)), 0)" for column in columns
+                )
+                size += db.execute(f"SELECT COALESCE(SUM({lengths}), 0) FROM {table}").fetchone()[0]
+            return size
+
+    # Compaction
+
+    def _vacuum(self, db: sqlite3.Connection) -> int:
+        """Return up to `vacuum_pages` free pages to the filesystem."""
+        free = db.execute("PRAGMA freelist_count").fetchone()[0]
+        if not free:
+            return 0
+
+        (mode,) = db.execute("PRAGMA auto_vacuum").fetchone()
+        if mode != 2:
+            # Databases created before incremental vacuum was enabled need
+            # one full VACUUM to switch modes
+            logger.info(f"Enabling incremental vacuum on {self.path} (one-time full VACUUM)")
+            db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            db.execute("VACUUM")
+            return free
+
+        db.execute(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})").fetchall()
+        return free - db.execute("PRAGMA freelist_count").fetchone()[0]
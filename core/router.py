@@ -18,10 +18,14 @@ import asyncio
 import json
 import logging
 import re
+import time
 from enum import Enum
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass, field
 
+from .cascade import CascadeStats
+from .structured_output import estimate_num_predict
+
 logger = logging.getLogger(__name__)
 
 
@@ -126,6 +130,10 @@ class IntentRouter:
         model: str = "llama3.2:3b",
         ollama_host: str = "http://localhost:11434",
         temperature: float = 0.1,
+        embedding_router=None,
+        cascade_models: Optional[List[str]] = None,
+        min_confidence: float = 0.5,
+        structured_output: bool = True,
     ):
         """
         Initialize the intent router.
@@ -134,28 +142,60 @@ class IntentRouter:
             model: Ollama model name for routing (smaller = faster).
             ollama_host: Ollama API host URL.
             temperature: LLM temperature (lower = more deterministic).
+            embedding_router: Optional EmbeddingRouter tried before the LLM;
+                queries it can't place confidently fall through.
+            cascade_models: Faster models tried before `model`, smallest
+                first. Answers that fail validation or report a confidence
+                below min_confidence escalate to the next model.
+            min_confidence: Confidence threshold for accepting an answer.
+            structured_output: Constrain answers to the intent JSON schema
+                (Ollama `format`) with num_predict capped to its size.
         """
         self.model = model
         self.ollama_host = ollama_host
         self.temperature = temperature
+        self.embedding_router = embedding_router
+        self.cascade_models = list(cascade_models or [])
+        self.min_confidence = min_confidence
+        self.stats = CascadeStats()
+        self.structured_output = structured_output
         self._llm = None
+        self._cascade_llms: Dict[str, Any] = {}
         
         logger.info(f"IntentRouter initialized with model: {model}")
     
-    def _get_llm(self):
-        """Lazy-load the LLM."""
-        if self._llm is None:
+    def _get_llm(self, model: Optional[str] = None):
+        """Lazy-load the LLM for a model (default: the main routing model)."""
+        model = model or self.model
+        llm = self._llm if model == self.model else self._cascade_llms.get(model)
+        if llm is None:
             try:
                 from langchain_ollama import ChatOllama
-                self._llm = ChatOllama(
-                    model=self.model,
+                constraints = {}
+                if self.structured_output:
+                    # Parameters are a free-form object (a document's text,
+                    # a search query), so they get the whole budget
+                    intent_format = build_intent_format()
+                    constraints = {
+                        "format": intent_format,
+                        "num_predict": estimate_num_predict(
+                            intent_format, text_tokens=256, cap=256
+                        ),
+                    }
+                llm = ChatOllama(
+                    model=model,
                     base_url=self.ollama_host,
                     temperature=self.temperature,
+                    **constraints,
                 )
             except ImportError:
                 logger.error("langchain-ollama not installed")
                 raise
-        return self._llm
+            if model == self.model:
+                self._llm = llm
+            else:
+                self._cascade_llms[model] = llm
+        return llm
     
     async def route_intent(self, user_query: str) -> RouterResult:
         """
@@ -173,42 +213,108 @@ class IntentRouter:
             >>> print(result.category)
             IntentCategory.SYSTEM_CONTROL
         """
-        try:
-            llm = self._get_llm()
-            
-            # Build messages
-            messages = [
-                ("system", ROUTER_SYSTEM_PROMPT),
-                ("human", user_query),
-            ]
-            
-            # Invoke LLM
-            response = await asyncio.to_thread(llm.invoke, messages)
-            raw_response = response.content.strip()
-            
-            logger.debug(f"Router LLM response: {raw_response}")
+        if self.embedding_router is not None:
+            started = time.perf_counter()
+            result = None
+            try:
+                result = await asyncio.to_thread(self.embedding_router.route, user_query)
+            except Exception as e:
+                logger.warning(f"Embedding router error, falling back to LLM: {e}")
+            self.stats.record("embedding", time.perf_counter() - started, escalated=result is None)
+            if result is not None:
+                logger.debug(f"Embedding router hit: {result.action} ({result.confidence:.2f})")
+                return result
+        
+        # Build messages
+        messages = [
+            ("system", ROUTER_SYSTEM_PROMPT),
+            ("human", user_query),
+        ]
+        
+        # Model cascade: smallest model first, escalate rejected answers
+        tiers = [*self.cascade_models, self.model]
+        for tier, model in enumerate(tiers, start=1):
+            last = tier == len(tiers)
+            started = time.perf_counter()
+            try:
+                llm = self._get_llm(model)
+                
+                # Invoke LLM
+                response = await asyncio.to_thread(llm.invoke, messages)
+                raw_response = response.content.strip()
+                
+                logger.debug(f"Router LLM response ({model}): {raw_response}")
+                
+                # Parse JSON response
+                parsed = self._parse_json_response(raw_response)
+            except Exception as e:
+                logger.error(f"Router error ({model}): {e}")
+                self.stats.record(model, time.perf_counter() - started, escalated=not last, failed=last)
+                if last:
+                    return self._fallback_result(user_query)
+                continue
             
-            # Parse JSON response
-            parsed = self._parse_json_response(raw_response)
+            problem = self.validate_intent(parsed)
+            self.stats.record(
+                model, time.perf_counter() - started,
+                escalated=problem is not None and not last,
+                failed=problem is not None and last,
+            )
+            if problem is not None:
+                logger.debug(f"Rejected {model} routing answer: {problem}")
             
-            if parsed:
+            if problem is None or (last and parsed):
                 category = IntentCategory.from_string(
-                    parsed.get("category", "GENERAL_CHAT")
+                    str(parsed.get("category") or "GENERAL_CHAT")
                 )
+                confidence = parsed.get("confidence")
+                if not isinstance(confidence, (int, float)):
+                    confidence = 1.0
+                parameters = parsed.get("parameters")
                 return RouterResult(
                     category=category,
                     action=parsed.get("action"),
-                    parameters=parsed.get("parameters", {}),
-                    confidence=1.0,
+                    parameters=parameters if isinstance(parameters, dict) else {},
+                    # An answer the last tier couldn't validate is only a best guess
+                    confidence=confidence if problem is None else 0.5,
                     raw_query=user_query,
                 )
-            else:
+            if last:
                 logger.warning(f"Failed to parse router response: {raw_response}")
                 return self._fallback_result(user_query)
-                
-        except Exception as e:
-            logger.error(f"Router error: {e}")
-            return self._fallback_result(user_query)
+    
+    def validate_intent(self, parsed: Optional[Dict[str, Any]]) -> Optional[str]:
+        """
+        Check a parsed routing answer.
+        
+        The category must be one of IntentCategory, the action one of the
+        category's ACTION_HANDLERS, and any reported confidence must reach
+        min_confidence.
+        
+        Args:
+            parsed: Parsed JSON answer (None if it didn't parse).
+            
+        Returns:
+            None if the answer is usable, otherwise the reason it isn't.
+        """
+        if not isinstance(parsed, dict):
+            return "Unparseable routing response"
+        
+        category = str(parsed.get("category", "")).upper()
+        if category not in IntentCategory.__members__:
+            return f"Unknown category '{parsed.get('category')}'"
+        
+        action = parsed.get("action")
+        if action not in ACTION_HANDLERS[IntentCategory(category)]:
+            return f"Unknown action '{action}' for {category}"
+        
+        if not isinstance(parsed.get("parameters", {}), dict):
+            return "Parameters must be an object"
+        
+        confidence = parsed.get("confidence")
+        if isinstance(confidence, (int, float)) and confidence < self.min_confidence:
+            return f"Low confidence ({confidence:.2f})"
+        return None
     
     def route_intent_sync(self, user_query: str) -> RouterResult:
         """
@@ -415,6 +521,32 @@ ACTION_HANDLERS = {
 }
 
 
+def build_intent_format() -> Dict[str, Any]:
+    """
+    Build the JSON schema for an intent answer from ACTION_HANDLERS.
+    
+    Each category branch only allows that category's actions, so the
+    model can't produce a category/action pair that has no handler.
+    
+    Returns:
+        JSON schema suitable for Ollama's `format` option.
+    """
+    return {
+        "anyOf": [
+            {
+                "type": "object",
+                "properties": {
+                    "category": {"const": category.value},
+                    "action": {"enum": list(actions)},
+                    "parameters": {"type": "object"},
+                },
+                "required": ["category", "action", "parameters"],
+            }
+            for category, actions in ACTION_HANDLERS.items()
+        ]
+    }
+
+
 def get_handler_for_intent(result: RouterResult) -> Optional[str]:
     """
     Get the handler function path for an intent result.
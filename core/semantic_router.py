@@ -8,9 +8,10 @@ to the appropriate tool/action handler.
 import json
 import logging
 import re
+from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +50,182 @@ class ToolDefinition:
     parameters_schema: Optional[dict] = None
 
 
+# Leading "(a|b|c)" or "(?:a|b|c)" group of plain literals that is not
+# followed by a quantifier - one of its alternatives must be in any match
+_LEADING_GROUP = re.compile(r"^\((?:\?:)?(\w[\w |]*)\)(?![?*{])")
+_LEADING_WORD = re.compile(r"^\w+")
+
+
+def _derive_anchors(pattern: str) -> Optional[list[str]]:
+    """
+    Derive the literals any match of a pattern must contain.
+    
+    Handles patterns that start with a literal word or a group of literal
+    alternatives; returns None when nothing can be proven (the pattern is
+    then always tried).
+    """
+    if _has_top_level_alternation(pattern):
+        return None
+    
+    if group := _LEADING_GROUP.match(pattern):
+        alternatives = group.group(1).split("|")
+        return alternatives if all(alternatives) else None
+    
+    if word := _LEADING_WORD.match(pattern):
+        literal = word.group()
+        # "searchs?" - a quantifier makes the last character optional
+        if pattern[word.end():word.end() + 1] in ("?", "*", "{"):
+            literal = literal[:-1]
+        return [literal] if literal else None
+    
+    return None
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    """True if the pattern has a '|' outside any group or character class."""
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+    return False
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Build a regex alternation shaped like a trie (longest match wins)."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def render(node: dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(c) + render(child) for c, child in sorted(node.items()) if c]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        body = "|".join(branches)
+        return f"(?:{body})?" if terminal else f"(?:{body})"
+    
+    return render(trie)
+
+
+class PatternTable:
+    """
+    Ordered regex table with a keyword prefilter.
+    
+    Each pattern is indexed by its anchor literals - strings that any match
+    must contain. A single scan over the query with a trie-shaped regex
+    finds which anchors occur, and only those patterns (plus any that have
+    no provable anchors) are searched. Candidates are tried in insertion
+    order, so first-match priority is identical to a linear scan while the
+    per-query cost stays flat as plugins add hundreds of patterns.
+    """
+    
+    def __init__(self):
+        self._entries: list[tuple[re.Pattern, IntentCategory, str]] = []
+        self._anchor_index: dict[str, list[int]] = {}
+        self._unanchored: list[int] = []
+        # Rebuilt lazily after additions
+        self._scanner: Optional[re.Pattern] = None
+        self._prefixes: dict[str, list[str]] = {}
+    
+    def add(
+        self,
+        pattern: str,
+        category: IntentCategory,
+        action: str,
+        anchors: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Append a pattern (matched case-insensitively with search()).
+        
+        Args:
+            pattern: Regular expression
+            category: Intent category on match
+            action: Action name on match
+            anchors: Literals one of which every match must contain.
+                     Derived from a leading literal/group when omitted;
+                     patterns without anchors are always tried.
+        """
+        index = len(self._entries)
+        self._entries.append((re.compile(pattern, re.IGNORECASE), category, action))
+        
+        if anchors is None:
+            anchors = _derive_anchors(pattern)
+        
+        if not anchors:
+            self._unanchored.append(index)
+        else:
+            for anchor in {a.lower() for a in anchors}:
+                self._anchor_index.setdefault(anchor, []).append(index)
+        
+        self._scanner = None
+    
+    def _build_scanner(self):
+        anchors = list(self._anchor_index)
+        # Lookahead so overlapping anchor occurrences are all reported
+        self._scanner = re.compile(f"(?=({_trie_regex(anchors)}))") if anchors else None
+        self._prefixes = {
+            anchor: [other for other in anchors if anchor.startswith(other)]
+            for anchor in anchors
+        }
+    
+    def candidates(self, query: str) -> list[int]:
+        """Indices of patterns that could match, in priority order."""
+        if self._scanner is None and self._anchor_index:
+            self._build_scanner()
+        
+        found: set[int] = set(self._unanchored)
+        if self._scanner is not None:
+            seen: set[str] = set()
+            for hit in self._scanner.finditer(query.lower()):
+                longest = hit.group(1)
+                if longest and longest not in seen:
+                    seen.add(longest)
+                    for anchor in self._prefixes[longest]:
+                        found.update(self._anchor_index[anchor])
+        return sorted(found)
+    
+    def match(self, query: str) -> Optional[tuple[re.Match, IntentCategory, str]]:
+        """
+        Find the first pattern (in insertion order) that matches.
+        
+        Returns:
+            (match, category, action) or None
+        """
+        for index in self.candidates(query):
+            pattern, category, action = self._entries[index]
+            if match := pattern.search(query):
+                return match, category, action
+        return None
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __iter__(self) -> Iterator[tuple[re.Pattern, IntentCategory, str]]:
+        return iter(self._entries)
+
+
+_WORD = re.compile(r"\w+")
+
+
 class SemanticRouter:
     """
     Semantic Router for intent classification and tool routing.
@@ -66,7 +243,21 @@ class SemanticRouter:
         """
         self.llm_engine = llm_engine
         self._tools: dict[str, ToolDefinition] = {}
-        self._pattern_matchers: list[tuple[re.Pattern, IntentCategory, str]] = []
+        self._patterns = PatternTable()
+        
+        # Bumped on every registration; the LLM intent prompt is cached
+        # against it so it is only rebuilt when the tool set changes
+        self._tools_version = 0
+        self._intent_prompt: Optional[tuple[int, str]] = None
+        
+        # Routing indexes: category -> tool names (registration order),
+        # trigger word -> tool names, and recent outcomes per tool
+        self._tools_by_category: dict[IntentCategory, list[str]] = {}
+        self._trigger_index: dict[str, set[str]] = {}
+        self._outcomes: dict[str, deque[bool]] = {}
+        self._category_best: dict[IntentCategory, str] = {}
+        self._tool_order: dict[str, int] = {}
+        self.outcome_window = 20
         
         self._register_default_patterns()
         logger.info("Semantic Router initialized")
@@ -94,12 +285,35 @@ class SemanticRouter:
             (r"(next|previous|skip)\s*(track|song)?", IntentCategory.MEDIA_CONTROL, "track_control"),
             
             # Vision queries
-            (r"(what('s| is)|describe|read|look at)\s*(on\s*)?(the\s*)?(screen|display|this)", IntentCategory.VISION_QUERY, "describe_screen"),
-            (r"(find|locate|where('s| is))\s+(.+)\s*(on\s*(the\s*)?(screen|display))?", IntentCategory.VISION_QUERY, "find_element"),
+            (r"(what('s| is)|describe|read|look at)\s*(on\s*)?(the\s*)?(screen|display|this)", IntentCategory.VISION_QUERY, "describe_screen",
+             ["what", "describe", "read", "look at"]),
+            (r"(find|locate|where('s| is))\s+(.+)\s*(on\s*(the\s*)?(screen|display))?", IntentCategory.VISION_QUERY, "find_element",
+             ["find", "locate", "where"]),
         ]
         
-        for pattern, category, action in patterns:
-            self._pattern_matchers.append((re.compile(pattern, re.IGNORECASE), category, action))
+        for pattern, category, action, *anchors in patterns:
+            self._patterns.add(pattern, category, action, anchors[0] if anchors else None)
+    
+    def register_pattern(
+        self,
+        pattern: str,
+        category: IntentCategory,
+        action: str,
+        anchors: Optional[list[str]] = None,
+    ) -> None:
+        """
+        Register a pattern matcher (e.g. from a plugin).
+        
+        Patterns are tried after the defaults, in registration order.
+        
+        Args:
+            pattern: Regular expression (case-insensitive)
+            category: Intent category on match
+            action: Action name on match
+            anchors: Literals one of which every match must contain, used
+                     to skip the pattern cheaply; derived when omitted
+        """
+        self._patterns.add(pattern, category, action, anchors)
     
     def register_tool(
         self,
@@ -129,9 +343,60 @@ class SemanticRouter:
             category=category,
             parameters_schema=parameters_schema,
         )
+        if name in self._tools:
+            self._unindex_tool(self._tools[name])
         self._tools[name] = tool
+        self._index_tool(tool)
+        self._tools_version += 1
         logger.info(f"Registered tool: {name}")
     
+    def _index_tool(self, tool: ToolDefinition) -> None:
+        """Add a tool to the category and trigger-word indexes."""
+        self._tools_by_category.setdefault(tool.category, []).append(tool.name)
+        self._tool_order[tool.name] = self._tools_version
+        for trigger in tool.triggers:
+            for word in _WORD.findall(trigger.lower()):
+                self._trigger_index.setdefault(word, set()).add(tool.name)
+        self._update_category_best(tool.category)
+    
+    def _unindex_tool(self, tool: ToolDefinition) -> None:
+        """Remove a tool from the routing indexes (before re-registration)."""
+        self._tools_by_category[tool.category].remove(tool.name)
+        for names in self._trigger_index.values():
+            names.discard(tool.name)
+        self._update_category_best(tool.category)
+    
+    def _success_rate(self, name: str) -> float:
+        """Recent success rate with a 0.5 prior for tools without history."""
+        outcomes = self._outcomes.get(name, ())
+        return (sum(outcomes) + 1) / (len(outcomes) + 2)
+    
+    def _update_category_best(self, category: IntentCategory) -> None:
+        """Recompute the default tool for a category (best success rate)."""
+        names = self._tools_by_category.get(category)
+        if not names:
+            self._category_best.pop(category, None)
+            return
+        # max() keeps the first registered tool on ties
+        self._category_best[category] = max(names, key=self._success_rate)
+    
+    def record_outcome(self, tool_name: str, success: bool) -> None:
+        """
+        Record whether a tool execution succeeded.
+        
+        Feeds the success-rate component of category ranking.
+        
+        Args:
+            tool_name: Executed tool
+            success: Whether it succeeded
+        """
+        tool = self._tools.get(tool_name)
+        if tool is None:
+            return
+        outcomes = self._outcomes.setdefault(tool_name, deque(maxlen=self.outcome_window))
+        outcomes.append(success)
+        self._update_category_best(tool.category)
+    
     def parse_intent(self, query: str, context: Optional[dict] = None) -> Intent:
         """
         Parse user query to extract intent.
@@ -146,15 +411,15 @@ class SemanticRouter:
         query = query.strip()
         
         # Try pattern matching first (fast path)
-        for pattern, category, action in self._pattern_matchers:
-            if match := pattern.search(query):
-                return Intent(
-                    category=category,
-                    action=action,
-                    parameters={"groups": match.groups()},
-                    confidence=0.9,
-                    raw_query=query,
-                )
+        if matched := self._patterns.match(query):
+            match, category, action = matched
+            return Intent(
+                category=category,
+                action=action,
+                parameters={"groups": match.groups()},
+                confidence=0.9,
+                raw_query=query,
+            )
         
         # Use LLM for complex intent parsing
         if self.llm_engine:
@@ -168,13 +433,14 @@ class SemanticRouter:
             raw_query=query,
         )
     
-    def _llm_parse_intent(self, query: str, context: Optional[dict] = None) -> Intent:
-        """Use LLM to parse complex intents."""
-        tools_description = "\n".join(
-            f"- {t.name}: {t.description}" for t in self._tools.values()
-        )
-        
-        system_prompt = f"""You are an intent classifier for a desktop automation agent.
+    def _get_intent_prompt(self) -> str:
+        """Get the LLM intent prompt, rebuilding it only if tools changed."""
+        if self._intent_prompt is None or self._intent_prompt[0] != self._tools_version:
+            tools_description = "\n".join(
+                f"- {t.name}: {t.description}" for t in self._tools.values()
+            )
+            
+            system_prompt = f"""You are an intent classifier for a desktop automation agent.
 Analyze the user's query and respond with JSON containing:
 - category: one of [SYSTEM_CONTROL, BROWSER_ACTION, FILE_OPERATION, APPLICATION_CONTROL, MEDIA_CONTROL, INFORMATION_QUERY, CONVERSATION, VISION_QUERY]
 - action: specific action to take
@@ -185,7 +451,14 @@ Available tools:
 {tools_description}
 
 Respond ONLY with valid JSON, no explanation."""
-
+            self._intent_prompt = (self._tools_version, system_prompt)
+        
+        return self._intent_prompt[1]
+    
+    def _llm_parse_intent(self, query: str, context: Optional[dict] = None) -> Intent:
+        """Use LLM to parse complex intents."""
+        system_prompt = self._get_intent_prompt()
+        
         try:
             response = self.llm_engine.generate(
                 prompt=query,
@@ -222,18 +495,39 @@ Respond ONLY with valid JSON, no explanation."""
             Tuple of (tool or None, processed parameters)
         """
         # Direct action match
-        for tool in self._tools.values():
-            if tool.name == intent.action:
-                return tool, intent.parameters
+        if tool := self._tools.get(intent.action):
+            return tool, intent.parameters
         
         # Category-based matching
-        category_tools = [t for t in self._tools.values() if t.category == intent.category]
-        if category_tools:
-            # Return first matching tool (could be improved with scoring)
-            return category_tools[0], intent.parameters
+        if name := self._rank_category(intent):
+            return self._tools[name], intent.parameters
         
         return None, intent.parameters
     
+    def _rank_category(self, intent: Intent) -> Optional[str]:
+        """
+        Pick the best tool in the intent's category.
+        
+        Tools whose triggers share words with the query are scored by
+        overlap plus recent success rate; otherwise the category's best
+        tool by success rate is used. Only the trigger-index postings for
+        the query's words are touched, so cost doesn't grow with the
+        number of registered tools.
+        """
+        overlap: dict[str, int] = {}
+        for word in set(_WORD.findall(intent.raw_query.lower())):
+            for name in self._trigger_index.get(word, ()):
+                if self._tools[name].category == intent.category:
+                    overlap[name] = overlap.get(name, 0) + 1
+        
+        if overlap:
+            return max(
+                overlap,
+                key=lambda n: (overlap[n] + self._success_rate(n), -self._tool_order[n]),
+            )
+        
+        return self._category_best.get(intent.category)
+    
     def execute(self, query: str, context: Optional[dict] = None) -> Any:
         """
         Parse, route, and execute a query.
@@ -253,10 +547,13 @@ Respond ONLY with valid JSON, no explanation."""
         if tool:
             logger.info(f"Executing tool: {tool.name}")
             try:
-                return tool.handler(**params)
+                result = tool.handler(**params)
             except Exception as e:
                 logger.error(f"Tool execution failed: {e}")
+                self.record_outcome(tool.name, False)
                 raise
+            self.record_outcome(tool.name, True)
+            return result
         else:
             # Fallback to LLM conversation
             if self.llm_engine:
@@ -0,0 +1,231 @@
+"""
+Session Store - Many Conversations, One Database
+
+A shared deployment serves many users, each with their own conversation.
+SessionStore hands out one ContextManager per session ID:
+
+- All sessions live in one SQLite database; every row carries its
+  session_id, and indexes on (session_id, id) keep per-session queries fast
+- Sessions share the store's connection and write-behind writer
+- Only the `max_resident` most recently used sessions are held by the
+  store. Evicting one just drops the store's reference (its rows are
+  already persisted); the next get() rehydrates it lazily from the
+  database. A manager a caller still holds stays attached and writable,
+  and get() hands that same manager back instead of building a second one
+- Summarizers are per session: pass summarizer_factory and each session
+  gets its own ConversationSummarizer. It is closed when the session is
+  evicted (a caller's evicted manager stops summarizing until get()
+  hands it back with a fresh one) or closed
+
+Screen state is not persisted, so a session that was evicted and
+released by every caller loses it.
+
+Usage:
+    from core.session_store import SessionStore
+
+    store = SessionStore(Path("data/context.db"), max_resident=64)
+    ctx = store.get("user-42")
+    ctx.add_message("user", "hello")
+"""
+
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .context_manager import ContextManager
+from .summarizer import ConversationSummarizer
+from .vector_memory import delete_session_vectors
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SessionStoreStats:
+    """Residency counters for SessionStore."""
+    hits: int = 0
+    rehydrations: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.rehydrations
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        return data
+
+
+class SessionStore:
+    """
+    Per-session ContextManagers over one database, with LRU residency.
+
+    Thread-safe.
+    """
+
+    def __init__(
+        self,
+        persistence_path: Path,
+        max_resident: int = 32,
+        write_behind: bool = True,
+        summarizer_factory: Optional[Callable[[], ConversationSummarizer]] = None,
+        **context_options: Any,
+    ):
+        """
+        Open the store.
+
+        Args:
+            persistence_path: SQLite database shared by all sessions
+            max_resident: Sessions kept in memory at once
+            write_behind: Batch writes on a background thread
+            summarizer_factory: Builds a new ConversationSummarizer for
+                each session (None: no summaries)
+            **context_options: Further ContextManager options for every
+                session (max_context_messages, budget, ...)
+        """
+        if max_resident < 1:
+            raise ValueError("max_resident must be at least 1")
+        if "summarizer" in context_options:
+            raise ValueError(
+                "a summarizer can't be shared between sessions; pass summarizer_factory"
+            )
+        self.max_resident = max_resident
+        self.summarizer_factory = summarizer_factory
+        self.context_options = context_options
+        self.stats = SessionStoreStats()
+
+        # Owns the connection and writer; never handed out as a session
+        self._root = ContextManager(
+            persistence_path=Path(persistence_path),
+            write_behind=write_behind,
+            session_id="",
+        )
+        self._sessions: "OrderedDict[str, ContextManager]" = OrderedDict()
+        # Evicted sessions that callers still hold
+        self._evicted: "weakref.WeakValueDictionary[str, ContextManager]" = (
+            weakref.WeakValueDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> ContextManager:
+        """
+        ContextManager for a session, rehydrated from disk if not resident.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            The session's ContextManager
+        """
+        if not session_id:
+            raise ValueError("session_id must not be empty")
+
+        released = []
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                self.stats.hits += 1
+                return session
+
+            session = self._evicted.pop(session_id, None)
+            if session is not None:
+                # Still in use elsewhere, so its windows are current
+                self.stats.hits += 1
+                if self.summarizer_factory is not None:
+                    session.attach_summarizer(self.summarizer_factory())
+            else:
+                session = ContextManager(
+                    session_id=session_id,
+                    share_database=self._root,
+                    summarizer=self.summarizer_factory() if self.summarizer_factory else None,
+                    **self.context_options,
+                )
+                session.rehydrate()
+                self.stats.rehydrations += 1
+            self._sessions[session_id] = session
+
+            while len(self._sessions) > self.max_resident:
+                evicted_id, evicted = self._sessions.popitem(last=False)
+                released.append(self._detach_summarizer(evicted))
+                self._evicted[evicted_id] = evicted
+                self.stats.evictions += 1
+                logger.debug(f"Evicted session {evicted_id}")
+
+        self._close_summarizers(released)
+        return session
+
+    @staticmethod
+    def _detach_summarizer(session: ContextManager) -> Optional[ConversationSummarizer]:
+        """Take a session's summarizer away from it (close it outside the lock)."""
+        summarizer = session.summarizer
+        session.attach_summarizer(None)
+        return summarizer
+
+    @staticmethod
+    def _close_summarizers(summarizers: List[Optional[ConversationSummarizer]]):
+        """Close detached summarizers, letting queued spans finish first."""
+        for summarizer in summarizers:
+            if summarizer is not None:
+                summarizer.close()
+
+    def __contains__(self, session_id: str) -> bool:
+        """True if the session is resident in the store."""
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        """Number of resident sessions."""
+        return len(self._sessions)
+
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        """
+        Every stored session, most recently active first.
+
+        Returns:
+            List of {"session_id", "messages", "last_active"}
+        """
+        self._root.flush()
+        rows = self._root._db.execute(
+            """SELECT session_id, COUNT(*), MAX(timestamp) FROM messages
+               GROUP BY session_id ORDER BY MAX(timestamp) DESC"""
+        ).fetchall()
+        return [
+            {"session_id": session_id, "messages": count, "last_active": last}
+            for session_id, count, last in rows
+        ]
+
+    def delete_session(self, session_id: str):
+        """Remove a session from memory and the database, including its vector memory."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None) or self._evicted.pop(session_id, None)
+        if session is not None:
+            self._close_summarizers([self._detach_summarizer(session)])
+            session.close()
+        self._root.flush()
+        with self._root._db_lock:
+            db = self._root._db
+            for table in ("messages", "actions", "session_data", "summaries"):
+                db.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+            delete_session_vectors(db, session_id)
+            db.commit()
+
+    def flush(self, timeout=None) -> bool:
+        """Wait until every session's writes are committed."""
+        return self._root.flush(timeout)
+
+    def close(self):
+        """Detach all sessions and close the database."""
+        with self._lock:
+            sessions = [*self._sessions.values(), *self._evicted.values()]
+            self._sessions.clear()
+            self._evicted.clear()
+            released = [self._detach_summarizer(session) for session in sessions]
+        self._close_summarizers(released)
+        for session in sessions:
+            session.close()
+        self._root.close()
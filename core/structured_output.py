@@ -0,0 +1,84 @@
+"""
+Structured Output - Token Budgets for Schema-Constrained Generation
+
+When a call passes a JSON schema as Ollama's `format`, generation is
+constrained to that shape, so the longest possible answer is known up
+front. This module estimates it so `num_predict` can be capped tightly
+instead of using a generous fixed limit. Give free-text strings a
+`maxLength` to bound them; the grammar enforces it and the estimate
+prices the field by it instead of by the free-text budget.
+
+Usage:
+    from core.structured_output import estimate_num_predict
+
+    schema = {"type": "object", "properties": {"level": {"type": "integer"}}}
+    estimate_num_predict(schema)  # small, a handful of tokens
+"""
+
+import json
+import math
+from typing import Any, Dict, Optional
+
+# Conservative average for JSON punctuation, keys and enum values
+CHARS_PER_TOKEN = 3.0
+
+_SCALAR_TOKENS = {"integer": 3, "number": 5, "boolean": 2, "null": 1}
+
+
+def _literal_tokens(value: Any) -> float:
+    return len(json.dumps(value)) / CHARS_PER_TOKEN
+
+
+def _schema_tokens(schema: Dict[str, Any], text_tokens: int) -> float:
+    """Worst-case tokens to emit a value matching the schema."""
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            return max(_schema_tokens(branch, text_tokens) for branch in schema[key])
+    if "const" in schema:
+        return _literal_tokens(schema["const"])
+    if "enum" in schema:
+        return max(_literal_tokens(value) for value in schema["enum"])
+
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        return max(_schema_tokens({**schema, "type": k}, text_tokens) for k in kind)
+    if kind == "object":
+        properties = schema.get("properties")
+        if not properties:
+            return 2 + text_tokens
+        # Every property may be present: key, quotes, colon, comma
+        return 2 + sum(
+            _literal_tokens(name) + 1 + _schema_tokens(prop, text_tokens)
+            for name, prop in properties.items()
+        )
+    if kind == "array":
+        return 2 + text_tokens
+    if kind == "string":
+        if "maxLength" in schema:
+            return 2 + schema["maxLength"] / CHARS_PER_TOKEN
+        return 2 + text_tokens
+    return _SCALAR_TOKENS.get(kind, text_tokens)
+
+
+def estimate_num_predict(
+    schema: Dict[str, Any],
+    text_tokens: int = 32,
+    margin: int = 8,
+    cap: Optional[int] = None,
+) -> int:
+    """
+    Estimate a num_predict limit for a schema-constrained answer.
+
+    Args:
+        schema: JSON schema passed as the request's `format`
+        text_tokens: Budget for each free-text string without a
+                     maxLength (e.g. a parameter that restates the
+                     user's query)
+        margin: Extra tokens for whitespace the model may emit
+        cap: Upper bound on the result
+
+    Returns:
+        Token limit for the request
+    """
+    estimate = math.ceil(_schema_tokens(schema, text_tokens)) + margin
+    return min(estimate, cap) if cap is not None else estimate
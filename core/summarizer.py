@@ -0,0 +1,226 @@
+"""
+Conversation Summarizer - Rolling Summary of Evicted Messages
+
+ContextManager keeps a bounded window of recent messages. Without a
+summary, everything older is simply lost; with a large window, every
+prompt is long. The summarizer folds messages leaving the window into a
+running summary:
+
+- Evicted messages are buffered and handed to a background thread in
+  spans, so summarizing never blocks the request path
+- Each span updates the previous summary (incremental compaction), so the
+  summary stays short no matter how long the conversation runs
+- A failed span is retried together with the next one. What is carried
+  over is capped at `max_carry_tokens` (oldest messages dropped first), so
+  a model that keeps failing can't grow the prompt past its context
+
+Usage:
+    from core.summarizer import ConversationSummarizer, make_llm_summarizer
+
+    summarizer = ConversationSummarizer(make_llm_summarizer(LLMEngine(model="llama3.2:3b")))
+    context = ContextManager(max_context_messages=20, summarizer=summarizer)
+"""
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from .token_budget import MESSAGE_OVERHEAD, TokenEstimator, estimate_tokens, pack_newest_first
+
+if TYPE_CHECKING:
+    from .context_manager import Message
+    from .llm_engine import LLMEngine
+
+logger = logging.getLogger(__name__)
+
+# (previous summary, messages to fold in) -> new summary
+SummarizeFn = Callable[[str, List["Message"]], str]
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a conversation between a user and a desktop assistant.
+Merge the new messages into the existing summary. Keep facts, preferences, names, files and open tasks.
+Drop greetings and small talk. Reply with the updated summary only, in plain text."""
+
+
+def make_llm_summarizer(engine: "LLMEngine", max_words: int = 150) -> SummarizeFn:
+    """
+    Build a summarize function backed by an LLM.
+
+    Args:
+        engine: LLMEngine used for summarization
+        max_words: Target length of the summary
+
+    Returns:
+        Function suitable for ConversationSummarizer
+    """
+    def summarize(previous: str, messages: List["Message"]) -> str:
+        transcript = "\n".join(f"{m.role}: {m.content}" for m in messages)
+        prompt = (
+            f"Existing summary:\n{previous or '(none)'}\n\n"
+            f"New messages:\n{transcript}\n\n"
+            f"Updated summary (at most {max_words} words):"
+        )
+        response = engine.generate(prompt, system_prompt=SUMMARY_SYSTEM_PROMPT)
+        return response.content.strip()
+
+    return summarize
+
+
+@dataclass
+class SummarizerStats:
+    """Counters for background summarization."""
+    spans: int = 0
+    messages: int = 0
+    failures: int = 0
+    dropped: int = 0
+    total_time: float = 0.0
+
+    @property
+    def avg_time(self) -> float:
+        """Average seconds per summarized span."""
+        return self.total_time / self.spans if self.spans else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["avg_time"] = self.avg_time
+        return data
+
+
+class ConversationSummarizer:
+    """
+    Folds evicted messages into a running summary on a background thread.
+
+    Attributes:
+        summary: Current running summary ("" until the first span)
+        stats: SummarizerStats counters
+        on_summary: Optional callback(summary, message_count) run on the
+            worker thread after each update (ContextManager persists here)
+    """
+
+    def __init__(
+        self,
+        summarize: SummarizeFn,
+        span_size: int = 10,
+        summary: str = "",
+        max_carry_tokens: int = 2048,
+        token_estimator: TokenEstimator = estimate_tokens,
+    ):
+        """
+        Initialize the summarizer.
+
+        Args:
+            summarize: Function merging messages into a previous summary
+            span_size: Evicted messages collected before a summary update
+            summary: Summary to continue from (e.g. loaded from disk)
+            max_carry_tokens: Limit for messages carried over from failed
+                spans; the oldest are dropped unsummarized beyond it
+            token_estimator: Callable mapping text to a token count
+        """
+        self.summarize = summarize
+        self.span_size = span_size
+        self.summary = summary
+        self.max_carry_tokens = max_carry_tokens
+        self.token_estimator = token_estimator
+        self.stats = SummarizerStats()
+        self.on_summary: Optional[Callable[[str, int], None]] = None
+
+        self._pending: List["Message"] = []
+        self._carry: List["Message"] = []
+        # (epoch, span) to fold, flush markers (Event) and the stop marker (None)
+        self._queue: queue.Queue = queue.Queue()
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._worker, name="summarizer", daemon=True)
+        self._thread.start()
+
+    def add_evicted(self, message: "Message"):
+        """
+        Buffer a message that left the context window.
+
+        Cheap: summarization happens on the worker once a span is full.
+        """
+        with self._lock:
+            self._pending.append(message)
+            if len(self._pending) < self.span_size:
+                return
+            span, self._pending = self._pending, []
+            self._queue.put((self._epoch, span))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Summarize buffered messages now and wait for the worker.
+
+        Args:
+            timeout: Seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if all queued spans were processed in time
+        """
+        with self._lock:
+            span, self._pending = self._pending, []
+            if span:
+                self._queue.put((self._epoch, span))
+
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def reset(self, summary: str = ""):
+        """Drop buffered messages and start a new summary."""
+        with self._lock:
+            self._pending = []
+            self._carry = []
+            self.summary = summary
+            self._epoch += 1
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            self._fold(*item)
+
+    def _fold(self, epoch: int, span: List["Message"]):
+        with self._lock:
+            if epoch != self._epoch:
+                # Queued before reset()
+                return
+            messages = self._carry + span
+            previous = self.summary
+
+        start = time.perf_counter()
+        try:
+            summary = self.summarize(previous, messages)
+        except Exception as e:
+            logger.warning(f"Summarizing {len(messages)} messages failed, will retry: {e}")
+            costs = [self.token_estimator(m.content) + MESSAGE_OVERHEAD for m in messages]
+            carry = pack_newest_first(messages, costs, self.max_carry_tokens)
+            with self._lock:
+                if epoch == self._epoch:
+                    self._carry = carry
+                    self.stats.dropped += len(messages) - len(carry)
+                self.stats.failures += 1
+            return
+
+        with self._lock:
+            if epoch != self._epoch:
+                # reset() while this span was summarizing
+                return
+            self._carry = []
+            self.summary = summary
+            self.stats.spans += 1
+            self.stats.messages += len(messages)
+            self.stats.total_time += time.perf_counter() - start
+
+        if self.on_summary is not None:
+            self.on_summary(summary, len(messages))
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Stop the worker thread (buffered messages are not summarized)."""
+        self._queue.put(None)
+        self._thread.join(timeout)
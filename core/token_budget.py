@@ -0,0 +1,150 @@
+"""
+Token Budget - Bounded Prompt Assembly
+
+Prompt evaluation time grows with prompt length, and anything beyond the
+model's context window is silently truncated by Ollama. This module gives
+each part of a prompt (system prompt, conversation summary, screen state,
+action history, conversation) a token budget, so the assembled prompt has a known upper
+bound.
+
+Token counts come from a pluggable estimator: any callable mapping text to
+a token count. The default is a character heuristic, which is close enough
+for budgeting without loading a tokenizer.
+
+Usage:
+    from core.token_budget import ContextBudget, pack_newest_first
+
+    budget = ContextBudget(total=8192, response_reserve=1024)
+    kept = pack_newest_first(messages, costs, budget=2000)
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+
+# Average characters per token for English text with Llama-style tokenizers
+CHARS_PER_TOKEN = 4.0
+
+# Role markers and separators the chat template adds around each message
+MESSAGE_OVERHEAD = 4
+
+TokenEstimator = Callable[[str], int]
+
+T = TypeVar("T")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated tokens (at least 1 for non-empty text)
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+@dataclass
+class ContextBudget:
+    """
+    Token limits for each section of an assembled prompt.
+
+    Attributes:
+        total: Model context window (num_ctx)
+        response_reserve: Tokens left free for the reply
+        system: Limit for the system prompt
+        summary: Limit for the running summary of older messages
+        recall: Limit for older messages recalled by full-text search
+        screen: Limit for the screen state section
+        actions: Limit for the recent actions section
+        messages: Limit for conversation messages; None means whatever
+            the other sections left unused
+    """
+    total: int = 8192
+    response_reserve: int = 1024
+    system: int = 1024
+    summary: int = 256
+    recall: int = 256
+    screen: int = 512
+    actions: int = 256
+    messages: Optional[int] = None
+
+    @property
+    def prompt_limit(self) -> int:
+        """Tokens available for the whole prompt."""
+        return max(0, self.total - self.response_reserve)
+
+
+@dataclass
+class AssembledContext:
+    """
+    A prompt built within a ContextBudget.
+
+    Attributes:
+        messages: Chat messages ready for the LLM API
+        section_tokens: Estimated tokens used per section
+        dropped_messages: Older messages left out to fit the budget
+    """
+    messages: List[Dict[str, str]]
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+    dropped_messages: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.section_tokens.values())
+
+
+def pack_newest_first(items: Sequence[T], costs: Sequence[int], budget: int) -> List[T]:
+    """
+    Keep the most recent items that fit in a budget.
+
+    Packing walks back from the newest item and stops at the first one
+    that doesn't fit, so the kept items are a contiguous, most recent
+    slice (a conversation with gaps reads worse than a shorter one).
+
+    Args:
+        items: Items in chronological order
+        costs: Token cost of each item
+        budget: Tokens available
+
+    Returns:
+        Kept items, in chronological order
+    """
+    used = 0
+    start = len(items)
+    for i in range(len(items) - 1, -1, -1):
+        if used + costs[i] > budget:
+            break
+        used += costs[i]
+        start = i
+    return list(items[start:])
+
+
+def truncate_to_budget(text: str, budget: int, estimator: TokenEstimator = estimate_tokens) -> str:
+    """
+    Cut a text so it fits a token budget.
+
+    Args:
+        text: Text to shorten
+        budget: Tokens available
+        estimator: Token estimator
+
+    Returns:
+        The text, or its longest prefix within budget followed by "..."
+    """
+    if estimator(text) <= budget:
+        return text
+    if budget <= 0:
+        return ""
+
+    # Binary search on the prefix length: estimators needn't be linear
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimator(text[:mid] + "...") <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + "..." if low else ""
@@ -0,0 +1,591 @@
+"""
+Vector Memory - Long-Term Semantic Recall
+
+Embeds stored messages and actions so the agent can recall relevant
+history by meaning, not just by recency or shared words:
+
+- Vectors are stored as float32 blobs in ContextManager's SQLite file
+  (table memory_vectors), the source of truth
+- A flat float32 file next to the database mirrors them row by row and is
+  memory-mapped as a NumPy matrix, so a search is one batched product
+  without loading blobs from SQLite
+- New rows are appended to both; nothing is rebuilt. The mirror file is
+  regenerated from SQLite only if it doesn't match (e.g. after a crash)
+- Past `ivf_threshold` vectors, an inverted-file index (k-means coarse
+  quantizer) limits each search to the rows of the nearest clusters
+- Every vector carries the session_id of the row it was embedded from, and
+  a store opened from a session's ContextManager only recalls that session
+- delete_session_vectors() removes a deleted session's vectors; an open
+  store notices the change and reloads before its next add or search
+
+Usage:
+    from core.vector_memory import VectorMemory
+
+    memory = VectorMemory.from_context(context_manager, engine.embed)
+    memory.sync()  # embed messages/actions stored since the last sync
+    for hit in memory.search("that spreadsheet from last week", k=5):
+        print(hit.similarity, hit.text)
+"""
+
+import itertools
+import logging
+import re
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .context_manager import DEFAULT_SESSION
+
+if TYPE_CHECKING:
+    from .context_manager import ContextManager
+
+logger = logging.getLogger(__name__)
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+SOURCES = ("message", "action", "note")
+
+# Rows scored per block in a flat search, to bound temporary memory
+_SEARCH_CHUNK = 65536
+
+
+@dataclass
+class MemoryHit:
+    """A recalled memory."""
+    source: str
+    source_id: Optional[int]
+    text: str
+    similarity: float
+
+
+def delete_session_vectors(db: sqlite3.Connection, session_id: str) -> int:
+    """
+    Delete a session's vectors, renumbering the remaining rows so each
+    model's rows stay contiguous (row i is mirror row i). Mirror files go
+    stale and are rebuilt by the next store that opens or refreshes.
+
+    The caller commits.
+
+    Args:
+        db: Connection to a database that may hold memory_vectors
+        session_id: Session whose vectors to delete
+
+    Returns:
+        Number of vectors deleted
+    """
+    exists = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memory_vectors'"
+    ).fetchone()
+    if not exists:
+        return 0
+    deleted = db.execute(
+        "DELETE FROM memory_vectors WHERE session_id = ?", (session_id,)
+    ).rowcount
+    if deleted:
+        # Through negative numbers, so no step collides with UNIQUE (model, row)
+        db.execute(
+            """UPDATE memory_vectors SET row = -1 - (
+                   SELECT COUNT(*) FROM memory_vectors AS m
+                   WHERE m.model = memory_vectors.model AND m.row < memory_vectors.row)"""
+        )
+        db.execute("UPDATE memory_vectors SET row = -1 - row")
+    return deleted
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+class IVFIndex:
+    """
+    Inverted-file index: rows grouped by their nearest k-means centroid.
+
+    A search scores the query against the centroids and then only the rows
+    of the `nprobe` closest clusters. Approximate: a true neighbour in an
+    unprobed cluster is missed.
+    """
+
+    def __init__(self, centroids: np.ndarray):
+        self.centroids = centroids
+        self.lists: List[np.ndarray] = [np.zeros(0, dtype=np.int64) for _ in range(len(centroids))]
+        self.size = 0
+
+    @classmethod
+    def train(
+        cls,
+        matrix: np.ndarray,
+        nlist: int,
+        iterations: int = 10,
+        sample_size: Optional[int] = None,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """
+        Run spherical k-means on a sample of the rows, then assign all rows.
+
+        Args:
+            matrix: Normalized vectors (may be memory-mapped)
+            nlist: Number of clusters
+            iterations: k-means iterations
+            sample_size: Rows used for training (default: 64 per cluster)
+            seed: Random seed
+
+        Returns:
+            Trained index containing every row of `matrix`
+        """
+        rng = np.random.default_rng(seed)
+        n = len(matrix)
+        nlist = max(1, min(nlist, n))
+        sample_size = min(n, sample_size or nlist * 64)
+        sample = np.asarray(matrix[np.sort(rng.choice(n, sample_size, replace=False))])
+
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = _normalize(centroids)
+
+        index = cls(centroids.astype(np.float32))
+        for start in range(0, n, _SEARCH_CHUNK):
+            block = np.asarray(matrix[start:start + _SEARCH_CHUNK])
+            index.add(np.arange(start, start + len(block)), block)
+        return index
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray):
+        """Assign new rows to their nearest centroid."""
+        assign = np.argmax(vectors @ self.centroids.T, axis=1)
+        for c in np.unique(assign):
+            self.lists[c] = np.concatenate([self.lists[c], rows[assign == c]])
+        self.size += len(rows)
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Rows in the nprobe clusters closest to the query."""
+        probes = _top_k(self.centroids @ query, nprobe)
+        return np.concatenate([self.lists[c] for c in probes])
+
+
+class VectorMemory:
+    """
+    Embedded messages/actions in SQLite, searched via a memory-mapped matrix.
+
+    Not thread-safe: use from one thread (or guard with a lock).
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        embed: EmbedFn,
+        model: str = "nomic-embed-text",
+        matrix_path: Optional[Path] = None,
+        ivf_threshold: int = 100_000,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        batch_size: int = 64,
+        context: Optional["ContextManager"] = None,
+    ):
+        """
+        Open (or create) the vector store.
+
+        Args:
+            db_path: SQLite file (usually ContextManager's persistence_path)
+            embed: Batch embedding function (e.g. LLMEngine.embed)
+            model: Embedding model; vectors of other models are ignored
+            matrix_path: Memory-mapped mirror file (default: next to db_path)
+            ivf_threshold: Vector count from which searches use the IVF index
+            nlist: IVF clusters (default: sqrt of the vector count)
+            nprobe: IVF clusters scanned per search
+            batch_size: Texts per embedding request
+            context: ContextManager whose pending writes sync() flushes
+                first; its session_id scopes add() and search()
+        """
+        self.db_path = Path(db_path)
+        self._embed = embed
+        self.model = model
+        safe_model = re.sub(r"[^\w.-]+", "_", model)
+        self.matrix_path = Path(matrix_path) if matrix_path else self.db_path.with_name(
+            f"{self.db_path.stem}.{safe_model}.f32"
+        )
+        self.ivf_threshold = ivf_threshold
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.batch_size = batch_size
+        self.context = context
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS memory_vectors (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                model TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                source_id INTEGER,
+                session_id TEXT NOT NULL DEFAULT 'default',
+                text TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                created_at TEXT NOT NULL,
+                UNIQUE (model, row)
+            );
+            CREATE INDEX IF NOT EXISTS idx_memory_vectors_source
+                ON memory_vectors(model, source, source_id);
+        """)
+        self._migrate()
+        self._db.commit()
+
+        self.dim = 0
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._sources = np.zeros(0, dtype=np.int8)
+        # Per-row session, as codes into _session_codes
+        self._sessions = np.zeros(0, dtype=np.int32)
+        self._session_codes: Dict[str, int] = {}
+        self._ivf: Optional[IVFIndex] = None
+        # (COUNT(*), MAX(id)) as last loaded, to spot changes by other connections
+        self._signature: Optional[tuple] = None
+        self._data_version = None
+        self._load()
+
+    @classmethod
+    def from_context(cls, context: "ContextManager", embed: EmbedFn, **kwargs) -> "VectorMemory":
+        """
+        Vector memory stored in a ContextManager's database.
+
+        Args:
+            context: ContextManager created with a persistence_path
+            embed: Batch embedding function
+            **kwargs: Further VectorMemory options
+        """
+        if context._db_path is None:
+            raise ValueError("Vector memory needs a ContextManager with persistence_path")
+        return cls(context._db_path, embed, context=context, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    @property
+    def session_id(self) -> Optional[str]:
+        """Session searched by default (None: every session)."""
+        return self.context.session_id if self.context is not None else None
+
+    # Storage
+
+    def _migrate(self):
+        """Add session_id to stores created before sessions, filled from the source rows."""
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(memory_vectors)")}
+        if "session_id" in columns:
+            return
+        self._db.execute(
+            "ALTER TABLE memory_vectors ADD COLUMN session_id TEXT NOT NULL DEFAULT 'default'"
+        )
+        for source, table in (("message", "messages"), ("action", "actions")):
+            try:
+                self._db.execute(
+                    f"""UPDATE memory_vectors SET session_id = COALESCE(
+                            (SELECT session_id FROM {table} WHERE id = memory_vectors.source_id),
+                            session_id)
+                        WHERE source = ?""",
+                    (source,),
+                )
+            except sqlite3.OperationalError:
+                # No ContextManager tables (or no sessions in them) here
+                continue
+
+    def _session_code(self, session_id: str) -> int:
+        return self._session_codes.setdefault(session_id, len(self._session_codes))
+
+    def _current_signature(self) -> tuple:
+        return self._db.execute(
+            "SELECT COUNT(*), MAX(id) FROM memory_vectors WHERE model = ?", (self.model,)
+        ).fetchone()
+
+    def _refresh(self):
+        """Reload if another connection deleted or added vectors since the last load."""
+        (version,) = self._db.execute("PRAGMA data_version").fetchone()
+        if version == self._data_version:
+            return
+        self._data_version = version
+        if self._current_signature() != self._signature:
+            logger.info("Vector store changed on disk, reloading")
+            # Unmap first: the mirror file may be replaced
+            self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+            self._ivf = None
+            self._load()
+
+    def _load(self):
+        """Map the mirror file, regenerating it if it doesn't match SQLite."""
+        (self._data_version,) = self._db.execute("PRAGMA data_version").fetchone()
+        self._signature = self._current_signature()
+        count, dim = self._db.execute(
+            "SELECT COUNT(*), MAX(length(vector)) / 4 FROM memory_vectors WHERE model = ?",
+            (self.model,),
+        ).fetchone()
+        self.dim = int(dim or 0)
+        codes = self._db.execute(
+            "SELECT source, session_id FROM memory_vectors WHERE model = ? ORDER BY row",
+            (self.model,),
+        ).fetchall()
+        self._sources = np.array([SOURCES.index(s) for s, _ in codes], dtype=np.int8)
+        self._sessions = np.array(
+            [self._session_code(session) for _, session in codes], dtype=np.int32
+        )
+
+        expected = count * self.dim * 4
+        actual = self.matrix_path.stat().st_size if self.matrix_path.exists() else 0
+        if actual != expected:
+            logger.info(f"Rebuilding vector mirror {self.matrix_path} from SQLite ({count} rows)")
+            self._rebuild_mirror()
+        self._map()
+
+    def _rebuild_mirror(self):
+        self.matrix_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.matrix_path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            for (blob,) in self._db.execute(
+                "SELECT vector FROM memory_vectors WHERE model = ? ORDER BY row", (self.model,)
+            ):
+                f.write(blob)
+        tmp.replace(self.matrix_path)
+
+    def _map(self):
+        count = len(self._sources)
+        if count == 0:
+            self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+        else:
+            self.matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+
+        if count >= self.ivf_threshold:
+            if self._ivf is None or count >= 2 * self._ivf.size:
+                # (Re)train once the store has doubled since the last training
+                nlist = self.nlist or int(np.sqrt(count))
+                self._ivf = IVFIndex.train(self.matrix, nlist)
+        else:
+            self._ivf = None
+
+    def add(
+        self,
+        texts: Sequence[str],
+        source: str = "note",
+        source_ids: Optional[Sequence[Optional[int]]] = None,
+        vectors: Optional[Any] = None,
+        session_id: Optional[str] = None,
+    ) -> int:
+        """
+        Embed texts and append them to the store.
+
+        Args:
+            texts: Texts to remember
+            source: "message", "action" or "note"
+            source_ids: Row ids in the source table, one per text
+            vectors: Precomputed embeddings (skips calling embed)
+            session_id: Session the texts belong to (default: the
+                context's session, else the default session)
+
+        Returns:
+            Number of vectors added
+        """
+        texts = list(texts)
+        if not texts:
+            return 0
+        self._refresh()
+        if source not in SOURCES:
+            raise ValueError(f"Unknown memory source: {source}")
+        source_ids = list(source_ids) if source_ids is not None else [None] * len(texts)
+        if session_id is None:
+            session_id = self.session_id if self.session_id is not None else DEFAULT_SESSION
+
+        if vectors is None:
+            vectors = []
+            for start in range(0, len(texts), self.batch_size):
+                vectors.extend(self._embed(texts[start:start + self.batch_size]))
+        block = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1))
+        if self.dim and block.shape[1] != self.dim:
+            raise ValueError(f"Embedding size {block.shape[1]} doesn't match the store ({self.dim})")
+        self.dim = block.shape[1]
+
+        first_row = len(self)
+        now = datetime.now().isoformat()
+        with self._db:
+            self._db.executemany(
+                """INSERT INTO memory_vectors
+                   (model, row, source, source_id, session_id, text, vector, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (self.model, first_row + i, source, source_ids[i], session_id, text,
+                     block[i].tobytes(), now)
+                    for i, text in enumerate(texts)
+                ],
+            )
+        self._signature = self._current_signature()
+        with open(self.matrix_path, "ab") as f:
+            f.write(block.tobytes())
+
+        self._sources = np.concatenate([
+            self._sources, np.full(len(texts), SOURCES.index(source), dtype=np.int8)
+        ])
+        self._sessions = np.concatenate([
+            self._sessions, np.full(len(texts), self._session_code(session_id), dtype=np.int32)
+        ])
+        ivf = self._ivf
+        self._map()
+        if ivf is not None and self._ivf is ivf:
+            ivf.add(np.arange(first_row, len(self)), block)
+        return len(texts)
+
+    def sync(self) -> int:
+        """
+        Embed messages and actions stored since the last sync (of every
+        session; each vector keeps its row's session_id).
+
+        Returns:
+            Number of vectors added
+        """
+        if self.context is not None:
+            self.context.flush()
+
+        added = 0
+        tables = {
+            "message": """SELECT id, session_id, role || ': ' || content
+                          FROM messages WHERE id > ? ORDER BY id""",
+            "action": """SELECT id, session_id, tool_name || ' ' || action_type || ' ' ||
+                                COALESCE(parameters, '') || ' -> ' || COALESCE(result, '')
+                         FROM actions WHERE id > ? ORDER BY id""",
+        }
+        for source, query in tables.items():
+            (last,) = self._db.execute(
+                "SELECT COALESCE(MAX(source_id), 0) FROM memory_vectors WHERE model = ? AND source = ?",
+                (self.model, source),
+            ).fetchone()
+            try:
+                rows = self._db.execute(query, (last,)).fetchall()
+            except sqlite3.OperationalError:
+                # No ContextManager tables in this database
+                continue
+            # Runs of one session in id order, so a failed batch never
+            # leaves a gap below MAX(source_id)
+            for session_id, run in itertools.groupby(rows, key=lambda row: row[1]):
+                run = list(run)
+                added += self.add(
+                    [text for _, _, text in run], source, [id_ for id_, _, _ in run],
+                    session_id=session_id,
+                )
+        return added
+
+    # Search
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        source: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> List[MemoryHit]:
+        """
+        Recall the stored texts most similar to a query.
+
+        Args:
+            query: Text to look for
+            k: Maximum results
+            source: Only "message", "action" or "note" entries
+            session_id: Only this session's entries (default: the
+                context's session; every session without a context)
+
+        Returns:
+            MemoryHits, most similar first
+        """
+        self._refresh()
+        if len(self) == 0:
+            return []
+        return self.search_vector(self._embed([query])[0], k, source, session_id)
+
+    def search_vector(
+        self,
+        vector: Any,
+        k: int = 5,
+        source: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> List[MemoryHit]:
+        """Like search(), with a precomputed query embedding."""
+        self._refresh()
+        if len(self) == 0:
+            return []
+        query = _normalize(np.asarray(vector, dtype=np.float32).reshape(1, -1))[0]
+        code = SOURCES.index(source) if source else None
+        if session_id is None:
+            session_id = self.session_id
+        session = None
+        if session_id is not None:
+            session = self._session_codes.get(session_id)
+            if session is None:
+                return []
+
+        if self._ivf is not None:
+            rows = np.sort(self._ivf.candidates(query, self.nprobe))
+            if code is not None:
+                rows = rows[self._sources[rows] == code]
+            if session is not None:
+                rows = rows[self._sessions[rows] == session]
+            scores = np.asarray(self.matrix[rows]) @ query
+            order = _top_k(scores, k)
+            best = rows[order]
+            best_scores = {int(rows[i]): float(scores[i]) for i in order}
+        else:
+            best, best_scores = self._flat_search(query, k, code, session)
+
+        return self._hits([int(r) for r in best], best_scores)
+
+    def _flat_search(self, query: np.ndarray, k: int, code: Optional[int], session: Optional[int]):
+        """Exact top-k, scoring the matrix in chunks."""
+        rows_found: List[np.ndarray] = []
+        scores_found: List[np.ndarray] = []
+        for start in range(0, len(self), _SEARCH_CHUNK):
+            scores = np.asarray(self.matrix[start:start + _SEARCH_CHUNK]) @ query
+            stop = start + len(scores)
+            if code is not None:
+                scores = np.where(self._sources[start:stop] == code, scores, -np.inf)
+            if session is not None:
+                scores = np.where(self._sessions[start:stop] == session, scores, -np.inf)
+            top = _top_k(scores, k)
+            rows_found.append(top + start)
+            scores_found.append(scores[top])
+
+        rows = np.concatenate(rows_found)
+        scores = np.concatenate(scores_found)
+        keep = np.isfinite(scores)
+        rows, scores = rows[keep], scores[keep]
+        order = _top_k(scores, k)
+        return rows[order], {int(rows[i]): float(scores[i]) for i in order}
+
+    def _hits(self, rows: List[int], scores: Dict[int, float]) -> List[MemoryHit]:
+        if not rows:
+            return []
+        placeholders = ",".join("?" * len(rows))
+        meta = {
+            row: (source, source_id, text)
+            for row, source, source_id, text in self._db.execute(
+                f"""SELECT row, source, source_id, text FROM memory_vectors
+                    WHERE model = ? AND row IN ({placeholders})""",
+                [self.model, *rows],
+            )
+        }
+        return [MemoryHit(*meta[row], similarity=scores[row]) for row in rows if row in meta]
+
+    def close(self):
+        """Release the memory map and database connection."""
+        self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self._db.close()
@@ -0,0 +1,261 @@
+"""
+Visual Answer Cache - Instant Answers for Unchanged Screens
+
+Asking "what's on my screen?" again while nothing has changed costs a
+multi-second vision inference for the same answer. This cache keys
+answers on the frame plus the normalized question:
+
+- By default a stored answer is reused only for a frame with the same
+  content digest (BLAKE2 of the encoded, downscaled frame), i.e. the
+  exact same screen
+- Optionally (`max_distance`), frames whose dHash is within that many
+  bits (Hamming distance) also match. dHash shrinks the frame to a
+  (hash_size + 1) x hash_size grayscale thumbnail and records whether
+  each pixel is brighter than its right-hand neighbour. It tolerates a
+  blinking cursor, but it is blind to text: replacing a line of text
+  with a traceback can leave the hash unchanged, so only enable it for
+  questions where small changes don't matter
+- Entries expire after `ttl` seconds and the cache is LRU-bounded
+
+Usage:
+    from core.visual_cache import VisualAnswerCache
+
+    cache = VisualAnswerCache(ttl=60)
+    frame_hash = cache.frame_hash(jpeg_bytes)
+    if (answer := cache.get(frame_hash, question)) is None:
+        answer = ask_vision_model(jpeg_bytes, question)
+        cache.put(frame_hash, question, answer)
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from utils.config import VisionConfig
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return _WHITESPACE.sub(" ", question).strip().lower().rstrip("?!. ")
+
+
+def dhash(image: Any, hash_size: int = 16) -> int:
+    """
+    Difference hash of an image.
+
+    Args:
+        image: Encoded image bytes (PNG/JPEG) or a PIL Image
+        hash_size: Bits per side; the hash has hash_size ** 2 bits
+
+    Returns:
+        Hash as an integer
+    """
+    from PIL import Image
+
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = Image.open(BytesIO(image))
+        # JPEG can decode at 1/2..1/8 scale, far cheaper than a full decode
+        image.draft("L", (hash_size * 8, hash_size * 8))
+
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BOX)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits."""
+    return (a ^ b).bit_count()
+
+
+@dataclass
+class VisualCacheStats:
+    """Hit/miss counters for VisualAnswerCache."""
+    hits: int = 0
+    misses: int = 0
+    expirations: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        return data
+
+
+class FrameKey(NamedTuple):
+    """Identity of a frame: exact content digest and optional dHash."""
+    digest: bytes
+    perceptual: Optional[int] = None
+
+
+@dataclass
+class _Entry:
+    frame_hash: FrameKey
+    answer: str
+    created_at: float
+
+
+class VisualAnswerCache:
+    """
+    Answers to questions about the screen, matched by frame content.
+
+    Thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_distance: Optional[int] = None,
+        ttl: Optional[float] = 60.0,
+        max_entries: int = 64,
+        hash_size: int = 16,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_distance: Largest dHash Hamming distance that still counts
+                as the same screen (out of hash_size ** 2 bits). None
+                (default) requires identical frame content
+            ttl: Seconds before an answer expires (None = never)
+            max_entries: Maximum cached answers
+            hash_size: dHash size (see dhash())
+        """
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hash_size = hash_size
+        self.stats = VisualCacheStats()
+
+        # (model, question) -> entries for that question, oldest first
+        self._entries: "OrderedDict[tuple, list[_Entry]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: "VisionConfig", **kwargs) -> "VisualAnswerCache":
+        """
+        Cache matching frames as the vision settings ask.
+
+        Args:
+            config: VisionConfig (answer_cache_max_distance)
+            **kwargs: Further VisualAnswerCache options
+        """
+        return cls(max_distance=config.answer_cache_max_distance, **kwargs)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def frame_hash(self, image: Any) -> FrameKey:
+        """Key of a frame (encoded bytes or PIL Image)."""
+        content = image if isinstance(image, (bytes, bytearray, memoryview)) else image.tobytes()
+        digest = hashlib.blake2b(content, digest_size=16).digest()
+        perceptual = dhash(image, self.hash_size) if self.max_distance is not None else None
+        return FrameKey(digest, perceptual)
+
+    def _distance(self, a: FrameKey, b: FrameKey) -> Optional[int]:
+        """0 for the same content, the dHash distance if within range, else None."""
+        if a.digest == b.digest:
+            return 0
+        if self.max_distance is None or a.perceptual is None or b.perceptual is None:
+            return None
+        distance = hamming(a.perceptual, b.perceptual)
+        return distance if distance <= self.max_distance else None
+
+    def get(self, frame_hash: FrameKey, question: str, model: str = "") -> Optional[str]:
+        """
+        Cached answer for a question about the same frame.
+
+        Args:
+            frame_hash: Key from frame_hash()
+            question: The user's question
+            model: Vision model the answer must come from
+
+        Returns:
+            The answer, or None on a miss
+        """
+        key = (model, normalize_question(question))
+        now = time.monotonic()
+        with self._lock:
+            entries = self._entries.get(key)
+            if entries:
+                self._expire(key, entries, now)
+            best = None
+            for entry in self._entries.get(key, []):
+                distance = self._distance(entry.frame_hash, frame_hash)
+                if distance is not None and (best is None or distance < best[0]):
+                    best = (distance, entry)
+            if best is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            logger.debug(f"Visual cache hit (distance {best[0]})")
+            return best[1].answer
+
+    def put(self, frame_hash: FrameKey, question: str, answer: str, model: str = ""):
+        """
+        Store an answer.
+
+        Args:
+            frame_hash: Key from frame_hash()
+            question: The user's question
+            answer: The vision model's answer
+            model: Vision model that answered
+        """
+        key = (model, normalize_question(question))
+        with self._lock:
+            entries = self._entries.setdefault(key, [])
+            # A newer answer replaces one for the same screen
+            kept = [e for e in entries if self._distance(e.frame_hash, frame_hash) is None]
+            self._size -= len(entries) - len(kept)
+            kept.append(_Entry(frame_hash, answer, time.monotonic()))
+            self._entries[key] = kept
+            self._entries.move_to_end(key)
+            self._size += 1
+
+            while self._size > self.max_entries:
+                oldest_key, oldest = next(iter(self._entries.items()))
+                oldest.pop(0)
+                self._size -= 1
+                self.stats.evictions += 1
+                if not oldest:
+                    del self._entries[oldest_key]
+
+    def clear(self):
+        """Drop every cached answer."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _expire(self, key: tuple, entries: list, now: float):
+        if self.ttl is None:
+            return
+        fresh = [e for e in entries if now - e.created_at < self.ttl]
+        expired = len(entries) - len(fresh)
+        if expired:
+            self.stats.expirations += expired
+            self._size -= expired
+            if fresh:
+                self._entries[key] = fresh
+            else:
+                del self._entries[key]
@@ -14,7 +14,6 @@ Your AI, Your Machine, Your Rules.
 """
 
 import argparse
-import os
 import sys
 from pathlib import Path
 from typing import Optional
@@ -27,6 +26,13 @@ from typing import Optional
 from app.core.registry import ToolRegistry
 from app.core.router import SemanticRouter
 from app.utils.result import CommandResult
+from app.core.route_memo import RouteMemo
+from app.core.speculative import Speculation, SpeculativeChat
+from core.llm_cache import ResponseCache
+from core.model_residency import ModelResidencyManager
+from core.visual_cache import VisualAnswerCache
+from perception.capture_service import CaptureService
+from utils.config import load_config
 
 # System control tools
 from app.services.system.volume import VolumeTool
@@ -56,6 +62,15 @@ from app.services.voice.listener import VoiceListener
 # CONFIGURATION
 # =============================================================================
 
+# Persistent state (caches, memory) lives next to the entry point
+DATA_DIR = Path(__file__).parent / "data"
+
+# Ollama models used by the router, ChatTool and VisionTool
+ROUTER_MODEL = "llama3.2:3b"
+CHAT_MODEL = "llama3.2:3b"
+VISION_MODEL = "llama3.2-vision"
+
+
 def parse_args() -> argparse.Namespace:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
@@ -66,6 +81,7 @@ Examples:
     python main.py                    # Start in text mode
     python main.py --voice            # Start with voice interaction  
     python main.py --debug --voice    # Voice mode with debug logging
+    python main.py --capture          # Keep recent screens for visual queries
         """,
     )
     
@@ -81,6 +97,29 @@ Examples:
         help="Enable debug logging",
     )
     
+    parser.add_argument(
+        "--capture",
+        action="store_true",
+        help="Sample the screen in the background (vision.background_capture)",
+    )
+    
+    speculation = parser.add_mutually_exclusive_group()
+    speculation.add_argument(
+        "--speculate",
+        dest="speculate",
+        action="store_const",
+        const=True,
+        help="Start chat replies while routing is still running "
+             "(needs OLLAMA_NUM_PARALLEL > 1 when both use the same model)",
+    )
+    speculation.add_argument(
+        "--no-speculate",
+        dest="speculate",
+        action="store_const",
+        const=False,
+        help="Never start chat replies before routing has finished",
+    )
+    
     return parser.parse_args()
 
 
@@ -99,16 +138,32 @@ class SovereignAgent:
     - TextToSpeech: Text-to-speech (mouth)
     """
     
-    def __init__(self, debug: bool = False):
+    def __init__(
+        self,
+        debug: bool = False,
+        speculate: Optional[bool] = None,
+        capture: Optional[bool] = None,
+    ):
         """
         Initialize The Sovereign Desktop Agent.
         
         Args:
             debug: Enable debug mode with verbose logging.
+            speculate: Start generating a chat reply while the router is
+                still deciding, and cancel it if a tool is picked. None
+                enables it only when chat and routing use different
+                models; with one model a single-slot Ollama would queue
+                the routing request behind the speculative reply.
+            capture: Sample the screen in the background for visual
+                queries (None = vision.background_capture from config).
         """
         self.debug = debug
+        self.speculate = CHAT_MODEL != ROUTER_MODEL if speculate is None else speculate
+        self.capture = capture
         
         # Initialize components
+        self._init_residency()
+        self._init_capture()
         self._init_registry()
         self._init_router()
         self._init_voice()
@@ -121,6 +176,30 @@ class SovereignAgent:
         print(f"  Router Model: {self.router.model}")
         print()
     
+    def _init_residency(self):
+        """Start loading models in the background so the first command isn't cold."""
+        self.residency = ModelResidencyManager(
+            models=dict.fromkeys([ROUTER_MODEL, CHAT_MODEL, VISION_MODEL])
+        )
+        self.residency.prewarm(background=True)
+        self.residency.start()
+    
+    def _init_capture(self):
+        """Sample the screen in the background so visual queries don't wait on a capture."""
+        vision_config = load_config().vision
+        enabled = vision_config.background_capture if self.capture is None else self.capture
+        self.capture_service = CaptureService.from_config(vision_config) if enabled else None
+        if self.capture_service is not None:
+            self.capture_service.start()
+    
+    def shutdown(self):
+        """Stop background work started by the agent."""
+        if self.capture_service is not None:
+            self.capture_service.stop()
+        if self.speculative_chat is not None:
+            self.speculative_chat.shutdown()
+        self.residency.close()
+    
     def _init_registry(self):
         """Initialize and populate the tool registry."""
         self.registry = ToolRegistry()
@@ -134,12 +213,22 @@ class SovereignAgent:
         self.registry.register_tool(WordWriterTool())
         self.registry.register_tool(ExcelReaderTool())
         
-        # Register Vision tools
-        self.registry.register_tool(ScreenCaptureTool())
-        self.registry.register_tool(VisionTool())
+        # Register Vision tools (a repeated question about an identical
+        # screen is answered from the cache)
+        vision_config = load_config().vision
+        answer_cache = (
+            VisualAnswerCache.from_config(vision_config) if vision_config.answer_cache else None
+        )
+        self.registry.register_tool(ScreenCaptureTool(service=self.capture_service))
+        self.registry.register_tool(
+            VisionTool(model=VISION_MODEL, residency=self.residency, cache=answer_cache)
+        )
         
-        # Register AI tools
-        self.registry.register_tool(ChatTool())
+        # Register AI tools (multi-turn: follow-ups see earlier replies and
+        # only the new message is evaluated each turn)
+        self.registry.register_tool(
+            ChatTool(model=CHAT_MODEL, residency=self.residency, multi_turn=True)
+        )
         
         # Register Web tools
         self.registry.register_tool(BrowserTool())
@@ -150,7 +239,24 @@ class SovereignAgent:
     
     def _init_router(self):
         """Initialize the semantic router."""
-        self.router = SemanticRouter(self.registry)
+        # Routing is near-deterministic, so repeated commands are served
+        # from a persistent response cache instead of a fresh LLM call
+        self.route_cache = ResponseCache(persistence_path=DATA_DIR / "route_cache.db")
+        # Templates of commands whose tools ran successfully skip the LLM
+        self.route_memo = RouteMemo(persistence_path=DATA_DIR / "route_memo.db")
+        self.router = SemanticRouter(
+            self.registry,
+            model=ROUTER_MODEL,
+            cache=self.route_cache,
+            memo=self.route_memo,
+            residency=self.residency,
+        )
+        
+        # Conversational turns: overlap the chat reply with routing
+        chat_tool = self.registry.get_tool("general_chat")
+        self.speculative_chat = (
+            SpeculativeChat(chat_tool) if self.speculate and chat_tool is not None else None
+        )
         
         if self.debug:
             print(f"[DEBUG] Router initialized with model: {self.router.model}")
@@ -187,8 +293,21 @@ class SovereignAgent:
         if self.debug:
             print(f"\n[DEBUG] Processing: '{user_query}'")
         
-        # Step 1: Route the command
-        decision = self.router.route(user_query)
+        # Step 1: Route the command (speculating on a chat reply if the LLM is needed)
+        speculation = None
+        if self.speculative_chat is not None:
+            speculation = self.speculative_chat.prepare(user_query)
+        
+        try:
+            return self._dispatch(user_query, speculation)
+        finally:
+            if speculation is not None:
+                speculation.cancel()
+    
+    def _dispatch(self, user_query: str, speculation: Optional[Speculation]) -> str:
+        """Route and execute a command (see process_command)."""
+        before_llm = speculation.start if speculation is not None else None
+        decision = self.router.route(user_query, before_llm=before_llm)
         
         tool_name = decision.get("tool_name")
         parameters = decision.get("parameters", {})
@@ -196,6 +315,10 @@ class SovereignAgent:
         if self.debug:
             print(f"[DEBUG] Routed to: {tool_name}")
             print(f"[DEBUG] Parameters: {parameters}")
+            if "source" in decision:
+                detail = decision.get("rule") or decision.get("template", "-")
+                print(f"[DEBUG] Route source: {decision['source']} ({detail})")
+            print(f"[DEBUG] Model residency: {self.residency.get_stats()}")
         
         # Step 2: Handle routing errors
         if "error" in decision:
@@ -203,7 +326,7 @@ class SovereignAgent:
         
         # Step 3: Handle general chat (no tool needed)
         if tool_name == "general_chat":
-            return self._handle_chat(user_query)
+            return self._handle_chat(user_query, speculation)
         
         # Step 3.5: Handle visual queries (screen analysis)
         if tool_name == "visual_query":
@@ -220,6 +343,7 @@ class SovereignAgent:
             return f"I don't have a tool called '{tool_name}'"
         
         result: CommandResult = tool.execute(**parameters)
+        self.router.record_outcome(user_query, decision, result)
         
         # Step 5: Format the response
         if result.success:
@@ -227,12 +351,13 @@ class SovereignAgent:
         else:
             return f"Sorry, that didn't work: {result.error}"
     
-    def _handle_chat(self, query: str) -> str:
+    def _handle_chat(self, query: str, speculation: Optional[Speculation] = None) -> str:
         """
         Handle general chat queries using the ChatTool.
         
         Args:
             query: The user's question or message.
+            speculation: Speculative reply started during routing, if any.
             
         Returns:
             LLM-generated response string.
@@ -242,7 +367,12 @@ class SovereignAgent:
         if chat_tool is None:
             return "I'm your desktop assistant. I can control volume, brightness, launch apps, analyze your screen, and work with Office documents."
         
-        result = chat_tool.execute(query=query)
+        if speculation is not None:
+            result = speculation.result()
+            if self.debug:
+                print(f"[DEBUG] Speculation: {self.speculative_chat.stats.to_dict()}")
+        else:
+            result = chat_tool.execute(query=query)
         
         if result.success:
             return result.data.get("response", "I'm not sure how to respond to that.")
@@ -253,10 +383,10 @@ class SovereignAgent:
         """
         Handle visual queries (screen analysis).
         
-        Two-step process:
-        1. Capture screenshot
+        Two-step process, entirely in memory:
+        1. Take the capture service's latest frame (or capture the
+           screen) as downscaled JPEG bytes
         2. Analyze with vision model
-        3. Cleanup temp file
         
         Args:
             parameters: Dict with 'query' key containing the user's question.
@@ -274,15 +404,16 @@ class SovereignAgent:
         if screen_tool is None:
             return "Screen capture tool not available."
         
-        screen_result = screen_tool.execute()
+        screen_result = screen_tool.execute(in_memory=True)
         
         if not screen_result.success:
             return f"I couldn't capture the screen: {screen_result.error}"
         
-        image_path = screen_result.data["path"]
+        image_bytes = screen_result.data["image_bytes"]
         
         if self.debug:
-            print(f"[DEBUG] Screenshot saved: {image_path}")
+            age = screen_result.data["age"]
+            print(f"[DEBUG] Screenshot: {len(image_bytes) / 1024:.0f} KB JPEG, {age:.1f}s old")
             print(f"[DEBUG] Analyzing with vision model...")
         
         # Step 2: Analyze Image
@@ -291,18 +422,10 @@ class SovereignAgent:
             return "Vision analysis tool not available."
         
         vision_result = vision_tool.execute(
-            image_path=image_path,
+            image_bytes=image_bytes,
             query=user_query
         )
         
-        # Step 3: Cleanup temp file
-        try:
-            os.remove(image_path)
-            if self.debug:
-                print(f"[DEBUG] Cleaned up temp file: {image_path}")
-        except Exception:
-            pass  # Ignore cleanup errors
-        
         # Return result
         if vision_result.success:
             return vision_result.data["response"]
@@ -388,42 +511,45 @@ class SovereignAgent:
         """Run in text interaction mode."""
         print("📝 Text Mode - Type your commands. Type 'quit' to exit.\n")
         
-        while True:
-            try:
-                user_input = input("You: ").strip()
-                
-                if not user_input:
-                    continue
-                
-                if user_input.lower() in ("quit", "exit", "bye", "q"):
-                    print("Goodbye!")
+        try:
+            while True:
+                try:
+                    user_input = input("You: ").strip()
+                    
+                    if not user_input:
+                        continue
+                    
+                    if user_input.lower() in ("quit", "exit", "bye", "q"):
+                        print("Goodbye!")
+                        break
+                    
+                    response = self.process_command(user_input)
+                    print(f"AI: {response}\n")
+                    
+                except KeyboardInterrupt:
+                    print("\nGoodbye!")
                     break
-                
-                response = self.process_command(user_input)
-                print(f"AI: {response}\n")
-                
-            except KeyboardInterrupt:
-                print("\nGoodbye!")
-                break
-            except Exception as e:
-                if self.debug:
-                    import traceback
-                    traceback.print_exc()
-                print(f"Error: {e}")
+                except Exception as e:
+                    if self.debug:
+                        import traceback
+                        traceback.print_exc()
+                    print(f"Error: {e}")
+        finally:
+            self.shutdown()
     
     def run_voice_mode(self):
         """Run in voice interaction mode."""
         print("🎤 Voice Mode - Speak your commands. Press Ctrl+C to exit.\n")
         
-        # Initialize the listener
-        if not self.ears.initialize():
-            print("❌ Failed to initialize voice listener.")
-            print("   Make sure you have a microphone and the Vosk model installed.")
-            return
-        
-        self.speak("Sovereign Desktop is ready. How can I help you?")
-        
         try:
+            # Initialize the listener
+            if not self.ears.initialize():
+                print("❌ Failed to initialize voice listener.")
+                print("   Make sure you have a microphone and the Vosk model installed.")
+                return
+            
+            self.speak("Sovereign Desktop is ready. How can I help you?")
+            
             while True:
                 # Listen for user speech
                 print("Listening...", end="\r")
@@ -449,6 +575,7 @@ class SovereignAgent:
             self.speak("Goodbye!")
         finally:
             self.ears.close()
+            self.shutdown()
 
 
 # =============================================================================
@@ -461,7 +588,11 @@ def main():
     
     try:
         # Initialize the agent
-        agent = SovereignAgent(debug=args.debug)
+        agent = SovereignAgent(
+            debug=args.debug,
+            speculate=args.speculate,
+            capture=args.capture or None,
+        )
         
         # Run in appropriate mode
         if args.voice:
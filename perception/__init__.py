@@ -3,17 +3,20 @@ The Sovereign Desktop - Perception Module
 
 This module handles sensory input:
 - Vision: Screen capture and processing
+- Capture Service: Background screen sampling into a ring buffer
 - OCR: Text extraction from screen
 - Listeners: Event monitoring (keyboard, mouse)
 """
 
 from .vision import VisionProcessor, ScreenCapture
+from .capture_service import CaptureService
 from .ocr import OCREngine
 from .listeners import EventListener, KeyboardListener, MouseListener
 
 __all__ = [
     "VisionProcessor",
     "ScreenCapture",
+    "CaptureService",
     "OCREngine",
     "EventListener",
     "KeyboardListener",
@@ -0,0 +1,277 @@
+"""
+Capture Service - Background Screen Sampling into a Ring Buffer
+
+Capturing on demand puts grab + encode latency on the critical path of
+every visual query, and nothing is known about what was on screen a few
+seconds earlier. CaptureService samples the screen in the background:
+
+- Every `interval` seconds (vision.capture_interval) it grabs a frame
+  and diffs it against the last stored one (ScreenCapture.capture_changes)
+- Only frames that differ from it by at least `min_change` of their area
+  (vision.capture_min_change) are JPEG-encoded and stored, so an idle
+  screen, a blinking caret or a ticking clock costs a diff per tick and
+  small changes accumulate until they are worth storing
+- Frames live in a ring buffer bounded by count and by total bytes;
+  the oldest frames are dropped first
+
+An unchanged screen keeps the last stored frame current: latest() returns
+it as long as the screen was last seen identical to it recently enough.
+A check that found changes too small to store does not count.
+
+Usage:
+    from perception.capture_service import CaptureService
+    
+    service = CaptureService.from_config(load_config().vision)
+    service.start()
+    frame = service.latest(max_age=2.0)  # CapturedFrame or None
+    earlier = service.frame_at(seconds_ago=5)
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+from .vision import DEFAULT_JPEG_QUALITY, DEFAULT_MAX_RESOLUTION, ScreenCapture
+
+if TYPE_CHECKING:
+    from utils.config import VisionConfig
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CapturedFrame:
+    """A stored screen frame, JPEG-encoded for the vision model."""
+    jpeg: bytes
+    width: int
+    height: int
+    timestamp: datetime
+    captured_at: float
+    changed_fraction: float
+    monitor_index: int = 1
+
+
+@dataclass
+class CaptureStats:
+    """Counters for CaptureService."""
+    checks: int = 0
+    stored: int = 0
+    dropped: int = 0
+    errors: int = 0
+    buffered_bytes: int = 0
+    
+    @property
+    def store_rate(self) -> float:
+        return self.stored / self.checks if self.checks else 0.0
+    
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["store_rate"] = self.store_rate
+        return data
+
+
+class CaptureService:
+    """
+    Samples the screen on a background thread into a bounded ring buffer.
+    
+    Thread-safe; the capture itself only ever runs on the service thread.
+    """
+    
+    def __init__(
+        self,
+        interval: float = 1.0,
+        max_frames: int = 30,
+        max_bytes: int = 32 * 1024 * 1024,
+        min_change: float = 0.0,
+        monitor_index: int = 1,
+        max_resolution: Tuple[int, int] = DEFAULT_MAX_RESOLUTION,
+        quality: int = DEFAULT_JPEG_QUALITY,
+        capture_factory: Callable[[], ScreenCapture] = ScreenCapture,
+    ):
+        """
+        Initialize the service (call start() to begin sampling).
+        
+        Args:
+            interval: Seconds between checks
+            max_frames: Most frames kept
+            max_bytes: Most encoded bytes kept across all frames
+            min_change: Fraction of the screen that must differ from the
+                        last stored frame to store a new one
+            monitor_index: Monitor to sample (1 = primary)
+            max_resolution: Maximum stored resolution (width, height)
+            quality: JPEG quality (1-100)
+            capture_factory: Creates the ScreenCapture (on the service thread)
+        """
+        self.interval = interval
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.min_change = min_change
+        self.monitor_index = monitor_index
+        self.max_resolution = max_resolution
+        self.quality = quality
+        self.stats = CaptureStats()
+        
+        self._capture_factory = capture_factory
+        self._frames: deque[CapturedFrame] = deque()
+        self._last_check: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @classmethod
+    def from_config(cls, config: "VisionConfig", **kwargs) -> "CaptureService":
+        """
+        Service sampling at the configured vision settings.
+        
+        Args:
+            config: VisionConfig (capture_interval, max_resolution,
+                    capture_min_change)
+            **kwargs: Further CaptureService options
+        """
+        return cls(
+            interval=config.capture_interval,
+            max_resolution=tuple(config.max_resolution),
+            min_change=config.capture_min_change,
+            **kwargs,
+        )
+    
+    # Lifecycle
+    
+    def start(self):
+        """Start sampling in the background."""
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="screen-capture", daemon=True)
+        self._thread.start()
+        logger.info(f"Capture service started (every {self.interval}s)")
+    
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Stop sampling; buffered frames are kept."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def _run(self):
+        try:
+            # mss handles are bound to the thread that created them
+            capture = self._capture_factory()
+        except Exception as e:
+            logger.error(f"Capture service could not start: {e}")
+            self.stats.errors += 1
+            return
+        
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.sample(capture)
+            except Exception as e:
+                self.stats.errors += 1
+                logger.warning(f"Screen sample failed: {e}")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+    
+    # Sampling
+    
+    def sample(self, capture: ScreenCapture) -> Optional[CapturedFrame]:
+        """
+        Check the screen once, storing a frame if it changed enough.
+        
+        Args:
+            capture: ScreenCapture to grab with
+            
+        Returns:
+            The stored frame, or None if the screen didn't change enough
+        """
+        min_change = self.min_change if self._frames else 0.0
+        changes = capture.capture_changes(self.monitor_index, min_change)
+        now = time.monotonic()
+        self.stats.checks += 1
+        
+        frame = None
+        if changes.screenshot is not None:
+            screenshot = changes.screenshot
+            frame = CapturedFrame(
+                jpeg=screenshot.jpeg(self.max_resolution, self.quality),
+                width=changes.width,
+                height=changes.height,
+                timestamp=changes.timestamp,
+                captured_at=now,
+                changed_fraction=changes.changed_fraction,
+                monitor_index=self.monitor_index,
+            )
+        
+        with self._lock:
+            # The stored frame is only current if the screen still matches it
+            if frame is not None or not changes.changed:
+                self._last_check = now
+            if frame is not None:
+                self._push(frame)
+        return frame
+    
+    def _push(self, frame: CapturedFrame):
+        self._frames.append(frame)
+        self.stats.stored += 1
+        self.stats.buffered_bytes += len(frame.jpeg)
+        # Always keep the newest frame, even if it alone exceeds max_bytes
+        while len(self._frames) > 1 and (
+            len(self._frames) > self.max_frames or self.stats.buffered_bytes > self.max_bytes
+        ):
+            dropped = self._frames.popleft()
+            self.stats.buffered_bytes -= len(dropped.jpeg)
+            self.stats.dropped += 1
+    
+    # Access
+    
+    def latest(self, max_age: Optional[float] = None) -> Optional[CapturedFrame]:
+        """
+        The current screen, if the service has seen it recently.
+        
+        Args:
+            max_age: Longest time in seconds since the screen was last
+                     seen matching the frame (None = any age)
+            
+        Returns:
+            Newest frame (still current if the screen hasn't changed since),
+            or None if there is none or the last check is too old
+        """
+        with self._lock:
+            if not self._frames:
+                return None
+            if max_age is not None and time.monotonic() - self._last_check > max_age:
+                return None
+            return self._frames[-1]
+    
+    def frame_at(self, seconds_ago: float) -> Optional[CapturedFrame]:
+        """
+        What was on screen `seconds_ago` seconds ago.
+        
+        Args:
+            seconds_ago: How far back to look
+            
+        Returns:
+            The newest frame stored at or before that moment, or None if
+            the buffer doesn't reach back that far
+        """
+        target = time.monotonic() - seconds_ago
+        with self._lock:
+            for frame in reversed(self._frames):
+                if frame.captured_at <= target:
+                    return frame
+        return None
+    
+    def frames(self) -> list[CapturedFrame]:
+        """All buffered frames, oldest first."""
+        with self._lock:
+            return list(self._frames)
+    
+    def __len__(self) -> int:
+        return len(self._frames)
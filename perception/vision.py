@@ -3,15 +3,21 @@ Vision Processing - Screen Capture and Image Processing
 
 Handles screen capture, image preprocessing, and vision-related
 utilities for the multimodal LLM.
+
+Continuous capture (ScreenCapture.capture_changes) keeps the previous raw
+frame and reports the tiles that changed, so downstream OCR/vision can
+skip unchanged screens and process only dirty regions.
 """
 
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from io import BytesIO
 from pathlib import Path
 from typing import Optional, Tuple
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 # Lazy imports for optional dependencies
@@ -33,6 +39,63 @@ def _ensure_pil():
         PIL_Image = Image
 
 
+# Encoding applied to every image sent to the vision model
+DEFAULT_MAX_RESOLUTION = (1920, 1080)
+DEFAULT_JPEG_QUALITY = 85
+
+
+def frame_to_image(bgra, size: Tuple[int, int]):
+    """
+    Convert a raw BGRA frame (as grabbed by mss) to a PIL RGB image.
+    
+    The channels are reordered into a new RGB buffer in a single pass;
+    there is no PNG encode/decode round trip.
+    
+    Args:
+        bgra: Pixel buffer, 4 bytes per pixel
+        size: (width, height)
+        
+    Returns:
+        PIL Image
+    """
+    _ensure_pil()
+    return PIL_Image.frombuffer("RGB", size, bgra, "raw", "BGRX", 0, 1)
+
+
+def encode_for_llm(
+    img,
+    max_resolution: Tuple[int, int] = DEFAULT_MAX_RESOLUTION,
+    quality: int = DEFAULT_JPEG_QUALITY,
+    resize: bool = True,
+) -> bytes:
+    """
+    Downscale and JPEG-encode an image for the vision model.
+    
+    Args:
+        img: PIL Image
+        max_resolution: Maximum output resolution (width, height)
+        quality: JPEG quality (1-100)
+        resize: Whether to downscale to max_resolution
+        
+    Returns:
+        JPEG bytes
+    """
+    _ensure_pil()
+    
+    # Convert to RGB if necessary
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    
+    # Resize if needed
+    if resize:
+        img.thumbnail(max_resolution, PIL_Image.Resampling.LANCZOS)
+    
+    # Compress to JPEG
+    buffer = BytesIO()
+    img.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
 @dataclass
 class CaptureRegion:
     """Defines a screen region to capture."""
@@ -52,26 +115,232 @@ class CaptureRegion:
 
 @dataclass
 class Screenshot:
-    """Captured screenshot with metadata."""
-    image_bytes: bytes
+    """
+    Captured screenshot with metadata.
+    
+    Holds the raw BGRA frame as grabbed. Nothing is encoded up front:
+    `pixels` is a zero-copy NumPy view of the buffer, and the PNG, JPEG
+    and base64 encodings are computed on first use and cached, so callers
+    that only need pixels (OCR, diffing, hashing) never pay for encoding.
+    The buffer must not be modified after capture.
+    """
+    bgra: bytes
     width: int
     height: int
     timestamp: datetime
     region: Optional[CaptureRegion] = None
     monitor_index: int = 0
+    _pixels: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _encoded: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    
+    @property
+    def size(self) -> Tuple[int, int]:
+        return (self.width, self.height)
+    
+    @property
+    def pixels(self) -> np.ndarray:
+        """(height, width, 4) BGRA view of the frame, without copying."""
+        if self._pixels is None:
+            view = np.frombuffer(memoryview(self.bgra), dtype=np.uint8)
+            self._pixels = view.reshape(self.height, self.width, 4)
+        return self._pixels
+    
+    def to_image(self):
+        """PIL RGB image decoded from the frame into a new buffer."""
+        return frame_to_image(self.bgra, self.size)
+    
+    @property
+    def image_bytes(self) -> bytes:
+        """Full-resolution PNG encoding."""
+        return self.png
+    
+    @property
+    def png(self) -> bytes:
+        """Full-resolution PNG encoding (cached)."""
+        if "png" not in self._encoded:
+            buffer = BytesIO()
+            self.to_image().save(buffer, format="PNG", optimize=True)
+            self._encoded["png"] = buffer.getvalue()
+        return self._encoded["png"]
+    
+    def jpeg(
+        self,
+        max_resolution: Tuple[int, int] = DEFAULT_MAX_RESOLUTION,
+        quality: int = DEFAULT_JPEG_QUALITY,
+    ) -> bytes:
+        """
+        Downscaled JPEG encoding for the vision model (cached per settings).
+        
+        Args:
+            max_resolution: Maximum output resolution (width, height)
+            quality: JPEG quality (1-100)
+        """
+        key = ("jpeg", tuple(max_resolution), quality)
+        if key not in self._encoded:
+            self._encoded[key] = encode_for_llm(self.to_image(), max_resolution, quality)
+        return self._encoded[key]
     
     def save(self, path: Path) -> Path:
-        """Save screenshot to file."""
+        """Save screenshot to file (PNG)."""
         path = Path(path)
         path.parent.mkdir(parents=True, exist_ok=True)
         with open(path, "wb") as f:
-            f.write(self.image_bytes)
+            f.write(self.png)
         return path
     
     def to_base64(self) -> str:
-        """Convert to base64 string."""
-        import base64
-        return base64.b64encode(self.image_bytes).decode("utf-8")
+        """Convert the PNG encoding to a base64 string (cached)."""
+        if "base64" not in self._encoded:
+            import base64
+            self._encoded["base64"] = base64.b64encode(self.png).decode("utf-8")
+        return self._encoded["base64"]
+
+
+@dataclass
+class FrameChanges:
+    """What changed on a monitor since the previous continuous capture."""
+    regions: list[CaptureRegion]
+    changed_fraction: float
+    width: int
+    height: int
+    timestamp: datetime
+    screenshot: Optional[Screenshot] = None
+    
+    @property
+    def changed(self) -> bool:
+        return bool(self.regions)
+
+
+class FrameDiffer:
+    """
+    Tile-level change detection between consecutive BGRA frames.
+    
+    The frame is split into `tile_size` squares; a tile is dirty if any
+    pixel differs from the previous frame (by more than `tolerance` in any
+    channel, if set). Dirty tiles are merged into rectangles. Identical
+    frames are detected with a single buffer comparison, so an idle screen
+    costs almost nothing.
+    """
+    
+    def __init__(self, tile_size: int = 32, tolerance: int = 0):
+        """
+        Initialize the differ.
+        
+        Args:
+            tile_size: Tile edge in pixels
+            tolerance: Per-channel difference ignored as noise (0 = exact)
+        """
+        self.tile_size = tile_size
+        self.tolerance = tolerance
+        self._previous: Optional[bytes] = None
+        self._size: Optional[Tuple[int, int]] = None
+    
+    def reset(self):
+        """Forget the previous frame; the next one is reported fully dirty."""
+        self._previous = None
+        self._size = None
+    
+    def update(self, bgra, size: Tuple[int, int]) -> list[CaptureRegion]:
+        """
+        Compare a frame with the previous one and remember it.
+        
+        Args:
+            bgra: Raw frame, 4 bytes per pixel. It is kept (not copied)
+                  for the next comparison, so it must not be modified.
+            size: (width, height)
+            
+        Returns:
+            Dirty rectangles in frame coordinates (the whole frame if there
+            is no previous frame of the same size)
+        """
+        regions = self.compare(bgra, size)
+        self.keep(bgra, size)
+        return regions
+    
+    def compare(self, bgra, size: Tuple[int, int]) -> list[CaptureRegion]:
+        """
+        Compare a frame with the remembered one without replacing it.
+        
+        Args:
+            bgra: Raw frame, 4 bytes per pixel
+            size: (width, height)
+            
+        Returns:
+            Dirty rectangles, as for update()
+        """
+        width, height = size
+        previous = self._previous
+        if previous is None or self._size != size:
+            return [CaptureRegion(0, 0, width, height)]
+        if previous == bgra:
+            return []
+        return self._merge(self.dirty_tiles(previous, bgra, size), size)
+    
+    def keep(self, bgra, size: Tuple[int, int]):
+        """Remember a frame (by reference) as the one to compare against."""
+        self._previous = bgra
+        self._size = size
+    
+    def dirty_tiles(self, previous, current, size: Tuple[int, int]) -> np.ndarray:
+        """
+        Boolean (rows, cols) grid of tiles that differ between two frames.
+        
+        Args:
+            previous: Previous BGRA frame
+            current: Current BGRA frame
+            size: (width, height) of both
+        """
+        width, height = size
+        if self.tolerance:
+            a = np.frombuffer(previous, dtype=np.uint8).reshape(height, width, 4)
+            b = np.frombuffer(current, dtype=np.uint8).reshape(height, width, 4)
+            # Alpha is constant in mss frames; compare B, G and R only
+            diff = np.abs(a[..., :3].astype(np.int16) - b[..., :3]).max(axis=2)
+            changed = diff > self.tolerance
+        else:
+            # One 32-bit compare per pixel
+            a = np.frombuffer(previous, dtype=np.uint32).reshape(height, width)
+            b = np.frombuffer(current, dtype=np.uint32).reshape(height, width)
+            changed = a != b
+        
+        tile = self.tile_size
+        rows = -(-height // tile)
+        cols = -(-width // tile)
+        padded = np.zeros((rows * tile, cols * tile), dtype=bool)
+        padded[:height, :width] = changed
+        return padded.reshape(rows, tile, cols, tile).any(axis=(1, 3))
+    
+    def _merge(self, tiles: np.ndarray, size: Tuple[int, int]) -> list[CaptureRegion]:
+        """Merge dirty tiles into rectangles: runs per row, stacked when aligned."""
+        width, height = size
+        tile = self.tile_size
+        regions: list[CaptureRegion] = []
+        # (first col, last col) -> region still growing downwards
+        open_runs: dict[Tuple[int, int], CaptureRegion] = {}
+        
+        for row in range(tiles.shape[0]):
+            cols = np.flatnonzero(tiles[row])
+            runs = []
+            if len(cols):
+                breaks = np.flatnonzero(np.diff(cols) > 1)
+                starts = np.concatenate([[cols[0]], cols[breaks + 1]])
+                ends = np.concatenate([cols[breaks], [cols[-1]]])
+                runs = list(zip(starts.tolist(), ends.tolist()))
+            
+            top = row * tile
+            bottom = min(top + tile, height)
+            next_runs = {}
+            for start, end in runs:
+                region = open_runs.pop((start, end), None)
+                if region is not None:
+                    region.height = bottom - region.top
+                else:
+                    left = start * tile
+                    region = CaptureRegion(left, top, min((end + 1) * tile, width) - left, bottom - top)
+                    regions.append(region)
+                next_runs[(start, end)] = region
+            open_runs = next_runs
+        return regions
 
 
 class ScreenCapture:
@@ -82,10 +351,19 @@ class ScreenCapture:
     multiple monitor support.
     """
     
-    def __init__(self):
-        """Initialize the screen capture."""
+    def __init__(self, tile_size: int = 32, tolerance: int = 0):
+        """
+        Initialize the screen capture.
+        
+        Args:
+            tile_size: Tile edge used by capture_changes()
+            tolerance: Per-channel noise ignored by capture_changes()
+        """
         _ensure_mss()
         self._sct = mss.mss()
+        self.tile_size = tile_size
+        self.tolerance = tolerance
+        self._differs: dict[int, FrameDiffer] = {}
         logger.info("Screen capture initialized")
     
     @property
@@ -112,6 +390,45 @@ class ScreenCapture:
         monitor = self._sct.monitors[monitor_index]
         return self._capture_region(monitor, monitor_index)
     
+    def capture_changes(self, monitor_index: int = 1, min_change: float = 0.0) -> FrameChanges:
+        """
+        Continuous capture: grab a monitor and report what changed.
+        
+        A reference raw frame of each monitor is kept, and the new frame
+        is compared with it tile by tile. The first call reports the whole
+        frame. A frame that changed less than `min_change` does not replace
+        the reference, so small changes add up until they cross it.
+        
+        Args:
+            monitor_index: Monitor to capture (1 = primary, 0 = all)
+            min_change: Changed fraction of the frame needed to make it
+                        the new reference
+            
+        Returns:
+            FrameChanges with the dirty rectangles (frame coordinates) and,
+            if the frame became the new reference, its Screenshot
+        """
+        monitor = self._sct.monitors[monitor_index]
+        sct_img = self._sct.grab(monitor)
+        
+        differ = self._differs.get(monitor_index)
+        if differ is None:
+            differ = self._differs[monitor_index] = FrameDiffer(self.tile_size, self.tolerance)
+        regions = differ.compare(sct_img.raw, sct_img.size)
+        
+        area = sct_img.width * sct_img.height
+        changes = FrameChanges(
+            regions=regions,
+            changed_fraction=sum(r.width * r.height for r in regions) / area if area else 0.0,
+            width=sct_img.width,
+            height=sct_img.height,
+            timestamp=datetime.now(),
+        )
+        if regions and changes.changed_fraction >= min_change:
+            differ.keep(sct_img.raw, sct_img.size)
+            changes.screenshot = self._to_screenshot(sct_img, monitor_index)
+        return changes
+    
     def capture_region(self, region: CaptureRegion) -> Screenshot:
         """
         Capture a specific screen region.
@@ -159,17 +476,18 @@ class ScreenCapture:
     ) -> Screenshot:
         """Internal capture method."""
         sct_img = self._sct.grab(monitor_dict)
-        
-        # Convert to PNG bytes
-        _ensure_pil()
-        img = PIL_Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
-        
-        buffer = BytesIO()
-        img.save(buffer, format="PNG", optimize=True)
-        image_bytes = buffer.getvalue()
-        
+        return self._to_screenshot(sct_img, monitor_index, region)
+    
+    def _to_screenshot(
+        self,
+        sct_img,
+        monitor_index: int = 0,
+        region: Optional[CaptureRegion] = None,
+    ) -> Screenshot:
+        """Wrap an mss frame in a Screenshot, keeping its raw buffer."""
+        # mss' .bgra property copies the frame; .raw is the buffer itself
         return Screenshot(
-            image_bytes=image_bytes,
+            bgra=sct_img.raw,
             width=sct_img.width,
             height=sct_img.height,
             timestamp=datetime.now(),
@@ -193,8 +511,8 @@ class VisionProcessor:
     
     def __init__(
         self,
-        max_resolution: Tuple[int, int] = (1920, 1080),
-        quality: int = 85,
+        max_resolution: Tuple[int, int] = DEFAULT_MAX_RESOLUTION,
+        quality: int = DEFAULT_JPEG_QUALITY,
     ):
         """
         Initialize the vision processor.
@@ -205,10 +523,17 @@ class VisionProcessor:
         """
         self.max_resolution = max_resolution
         self.quality = quality
-        self._capture = ScreenCapture()
+        self._capture: Optional[ScreenCapture] = None
         
         logger.info(f"Vision processor initialized (max: {max_resolution})")
     
+    @property
+    def capture(self) -> ScreenCapture:
+        """Screen capture, created on first use."""
+        if self._capture is None:
+            self._capture = ScreenCapture()
+        return self._capture
+    
     def capture_and_process(
         self,
         region: Optional[CaptureRegion] = None,
@@ -225,11 +550,11 @@ class VisionProcessor:
             Processed image bytes (JPEG)
         """
         if region:
-            screenshot = self._capture.capture_region(region)
+            screenshot = self.capture.capture_region(region)
         else:
-            screenshot = self._capture.capture_full()
+            screenshot = self.capture.capture_full()
         
-        return self.process_image(screenshot.image_bytes, resize)
+        return self.process_frame(screenshot.bgra, screenshot.size, resize)
     
     def process_image(self, image_bytes: bytes, resize: bool = True) -> bytes:
         """
@@ -245,20 +570,21 @@ class VisionProcessor:
         _ensure_pil()
         
         img = PIL_Image.open(BytesIO(image_bytes))
+        return encode_for_llm(img, self.max_resolution, self.quality, resize)
+    
+    def process_frame(self, bgra, size: Tuple[int, int], resize: bool = True) -> bytes:
+        """
+        Process a raw BGRA frame for LLM input, without an intermediate PNG.
         
-        # Convert to RGB if necessary
-        if img.mode in ("RGBA", "P"):
-            img = img.convert("RGB")
-        
-        # Resize if needed
-        if resize:
-            img.thumbnail(self.max_resolution, PIL_Image.Resampling.LANCZOS)
-        
-        # Compress to JPEG
-        buffer = BytesIO()
-        img.save(buffer, format="JPEG", quality=self.quality, optimize=True)
-        
-        return buffer.getvalue()
+        Args:
+            bgra: Pixel buffer as grabbed by mss
+            size: (width, height)
+            resize: Whether to resize
+            
+        Returns:
+            Processed image bytes (JPEG)
+        """
+        return encode_for_llm(frame_to_image(bgra, size), self.max_resolution, self.quality, resize)
     
     def get_screen_for_llm(self) -> bytes:
         """Convenience method to get ready-for-LLM screenshot."""
@@ -0,0 +1,173 @@
+"""
+Shared fixtures for the test suite.
+
+Provides a local fake Ollama HTTP server so LLM clients can be exercised
+without a running model.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+_VOCABULARY = [
+    "volume", "mute", "brightness", "open", "close", "chrome", "notepad",
+    "search", "word", "excel", "weather", "screen", "set", "launch",
+]
+
+
+def _bag_of_words(text: str) -> list[float]:
+    """Deterministic toy embedding: word counts over a tiny vocabulary."""
+    words = text.lower().replace("%", " ").split()
+    return [float(sum(w.strip("'\"?.,!") == v for w in words)) for v in _VOCABULARY] + [0.1]
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """Minimal Ollama API stand-in recording requests and concurrency."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _FakeOllamaHandler)
+        self.delay = 0.0
+        self.chunk_delay = 0.0
+        self.load_duration = 0
+        # Generate requests carrying a context get a 400 while set
+        self.reject_context = False
+        self.reply = "ok"
+        self.embed = _bag_of_words
+        self.requests: list[tuple[str, dict]] = []
+        self.active = 0
+        self.peak_concurrency = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+    def reply_for(self, path: str, payload: dict) -> str:
+        return self.reply(path, payload) if callable(self.reply) else self.reply
+
+    def paths(self) -> list[str]:
+        return [path for path, _ in self.requests]
+
+
+class _FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, data: dict, status: int = 200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "llama3.2-vision:latest"}, {"name": "llama3.2:3b"}]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        server: FakeOllamaServer = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        with server._lock:
+            server.requests.append((self.path, payload))
+            server.active += 1
+            server.peak_concurrency = max(server.peak_concurrency, server.active)
+        try:
+            time.sleep(server.delay)
+            self._respond(server, payload)
+        finally:
+            with server._lock:
+                server.active -= 1
+
+    def _respond(self, server: FakeOllamaServer, payload: dict):
+        model = payload.get("model", "")
+
+        if self.path == "/api/embed":
+            inputs = payload.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            vectors = [server.embed(text) for text in inputs]
+            self._send_json({"model": model, "embeddings": vectors})
+            return
+
+        if self.path not in ("/api/generate", "/api/chat"):
+            self._send_json({"error": "not found"}, status=404)
+            return
+
+        if self.path == "/api/generate" and payload.get("context") and server.reject_context:
+            self._send_json({"error": "invalid context"}, status=400)
+            return
+
+        text = server.reply_for(self.path, payload)
+        words = text.split(" ")
+
+        # One "token" per word: only what isn't already in the context is evaluated
+        if self.path == "/api/chat":
+            prompt = " ".join(m.get("content", "") for m in payload.get("messages", []))
+        else:
+            prompt = " ".join(filter(None, [payload.get("system"), payload.get("prompt", "")]))
+        prompt_tokens = len(prompt.split())
+
+        def frame(content: str, done: bool) -> dict:
+            data = {"model": model, "done": done}
+            if self.path == "/api/chat":
+                data["message"] = {"role": "assistant", "content": content}
+            else:
+                data["response"] = content
+            if done:
+                data["eval_count"] = len(words)
+                data["prompt_eval_count"] = prompt_tokens
+                if self.path == "/api/generate":
+                    context = payload.get("context") or []
+                    data["context"] = context + list(range(prompt_tokens + len(words)))
+                data["load_duration"] = server.load_duration
+            return data
+
+        if not payload.get("stream", True):
+            self._send_json(frame(text, True))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, word in enumerate(words):
+                piece = word if i == 0 else f" {word}"
+                self._write_chunk(json.dumps(frame(piece, False)) + "\n")
+                time.sleep(server.chunk_delay)
+            self._write_chunk(json.dumps(frame("", True)) + "\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _write_chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+@pytest.fixture
+def fake_ollama():
+    """Run a fake Ollama server on a random local port."""
+    server = FakeOllamaServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,165 @@
+"""
+Tests for the background screen capture service.
+"""
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.system.screen_capture import ScreenCaptureTool
+from perception import vision
+from perception.capture_service import CaptureService
+from perception.vision import ScreenCapture
+from utils.config import VisionConfig
+
+
+class _FakeGrab:
+    def __init__(self, frame):
+        self.raw = bytearray(frame.tobytes())
+        self.height, self.width = frame.shape[:2]
+        self.size = (self.width, self.height)
+
+
+class _FakeMSS:
+    monitors = [{}, {"left": 0, "top": 0, "width": 64, "height": 64}]
+
+    def __init__(self):
+        rng = np.random.default_rng(0)
+        self.frame = rng.integers(0, 255, size=(64, 64, 4), dtype=np.uint8)
+
+    def grab(self, monitor):
+        return _FakeGrab(self.frame)
+
+    def close(self):
+        pass
+
+
+class _DesktopMSS(_FakeMSS):
+    monitors = [{}, {"left": 0, "top": 0, "width": 1920, "height": 1080}]
+
+    def __init__(self):
+        self.frame = np.full((1080, 1920, 4), 200, dtype=np.uint8)
+
+
+def _capture(monkeypatch) -> ScreenCapture:
+    monkeypatch.setattr(vision, "mss", SimpleNamespace(mss=_FakeMSS))
+    return ScreenCapture(tile_size=16)
+
+
+class TestCaptureService:
+    """Tests for CaptureService."""
+
+    def test_stores_only_changed_frames(self, monkeypatch):
+        """Test idle checks store nothing and small changes respect min_change."""
+        capture = _capture(monkeypatch)
+        service = CaptureService(min_change=0.2)
+
+        assert service.sample(capture) is not None
+        assert service.sample(capture) is None
+
+        capture._sct.frame[0, 0] = 0  # one tile: 1/16 of the screen
+        assert service.sample(capture) is None
+        capture._sct.frame[:32] = 0
+        stored = service.sample(capture)
+        assert stored is not None and stored.changed_fraction >= 0.5
+
+        assert len(service) == 2
+        assert service.stats.checks == 4 and service.stats.stored == 2
+        assert stored.jpeg[:2] == b"\xff\xd8"
+
+    def test_small_changes_accumulate(self, monkeypatch):
+        """Test changes below min_change add up against the last stored frame."""
+        capture = _capture(monkeypatch)
+        service = CaptureService(min_change=0.25)
+        service.sample(capture)
+
+        stored = []
+        for tile in range(4):  # one more tile (1/16 of the screen) per tick
+            capture._sct.frame[tile * 16, 0] ^= 0xFF
+            stored.append(service.sample(capture))
+        assert stored[:3] == [None, None, None]
+        assert stored[3] is not None and stored[3].changed_fraction == 0.25
+
+    def test_config_ignores_cursor_sized_changes(self, monkeypatch):
+        """Test the configured threshold skips a blinking caret but stores a new window."""
+        monkeypatch.setattr(vision, "mss", SimpleNamespace(mss=_DesktopMSS))
+        capture = ScreenCapture()
+        service = CaptureService.from_config(VisionConfig())
+        assert service.min_change == VisionConfig.capture_min_change > 0
+        service.sample(capture)
+
+        capture._sct.frame[500:518, 700:702] ^= 0xFF  # caret
+        assert service.sample(capture) is None
+        capture._sct.frame[100:400, 100:500] = 40  # window
+        assert service.sample(capture) is not None
+
+    def test_dropped_changes_are_not_current(self, monkeypatch):
+        """Test latest(max_age) won't vouch for a frame the screen has moved away from."""
+        capture = _capture(monkeypatch)
+        service = CaptureService(min_change=0.5)
+        service.sample(capture)
+        service._last_check -= 30
+
+        capture._sct.frame[0, 0] ^= 0xFF
+        assert service.sample(capture) is None
+        assert service.latest(max_age=1.0) is None
+
+        capture._sct.frame[0, 0] ^= 0xFF  # back to the stored frame
+        service.sample(capture)
+        assert service.latest(max_age=1.0) is not None
+
+    def test_ring_buffer_bounds(self, monkeypatch):
+        """Test the buffer drops the oldest frames by count and by bytes."""
+        capture = _capture(monkeypatch)
+        service = CaptureService(max_frames=3)
+        for i in range(5):
+            capture._sct.frame[:, :, 0] = i * 40
+            service.sample(capture)
+        assert len(service) == 3
+        assert service.stats.dropped == 2
+        assert service.stats.buffered_bytes == sum(len(f.jpeg) for f in service.frames())
+
+        frame_size = len(service.latest().jpeg)
+        service.max_bytes = frame_size  # room for a single frame
+        capture._sct.frame[:, :, 1] = 7
+        service.sample(capture)
+        assert len(service) == 1
+
+    def test_latest_and_history(self, monkeypatch):
+        """Test latest() honours max_age and frame_at() looks back in time."""
+        capture = _capture(monkeypatch)
+        service = CaptureService()
+        assert service.latest() is None
+
+        first = service.sample(capture)
+        first.captured_at -= 10  # pretend it was stored 10s ago
+        capture._sct.frame[:] = 0
+        second = service.sample(capture)
+
+        assert service.latest(max_age=1.0) is second
+        assert service.frame_at(seconds_ago=5) is first
+        assert service.frame_at(seconds_ago=60) is None
+
+        service._last_check -= 30
+        assert service.latest(max_age=1.0) is None
+        assert service.latest() is second
+
+    def test_background_thread_feeds_tool(self, monkeypatch):
+        """Test the running service answers in-memory captures without grabbing."""
+        monkeypatch.setattr(vision, "mss", SimpleNamespace(mss=_FakeMSS))
+        service = CaptureService(interval=0.01, capture_factory=lambda: ScreenCapture(tile_size=16))
+        service.start()
+        try:
+            deadline = time.monotonic() + 5
+            while service.latest() is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            tool = ScreenCaptureTool(service=service)
+            result = tool.execute(in_memory=True)
+            assert result.success
+            assert result.data["image_bytes"] is service.latest().jpeg
+            assert result.data["width"] == 64
+        finally:
+            service.stop()
+        assert not service.is_running
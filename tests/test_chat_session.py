@@ -0,0 +1,203 @@
+"""
+Tests for multi-turn chat sessions reusing Ollama's context.
+"""
+
+import threading
+
+from app.core.speculative import SpeculativeChat
+from app.services.ai.chat import ChatTool
+from core.chat_session import CONTEXT_MODE, HISTORY_MODE
+from core.llm_engine import LLMEngine
+from core.model_residency import NANOSECONDS, ModelResidencyManager
+from core.token_budget import MESSAGE_OVERHEAD, estimate_tokens
+
+
+class TestChatSession:
+    """Tests for ChatSession."""
+
+    def test_context_reused_between_turns(self, fake_ollama):
+        """Test later turns send the previous context instead of the history."""
+        fake_ollama.reply = "short answer here"
+        session = LLMEngine(host=fake_ollama.url).session(system_prompt="Be very brief please.")
+
+        for message in ("first question", "second question", "third question"):
+            assert session.send(message).content == "short answer here"
+
+        generate = [payload for path, payload in fake_ollama.requests]
+        assert fake_ollama.paths() == ["/api/generate"] * 3
+        assert generate[0]["system"] == "Be very brief please."
+        assert "context" not in generate[0]
+        assert "system" not in generate[1] and "system" not in generate[2]
+        assert len(generate[2]["context"]) > len(generate[1]["context"])
+
+        stats = session.get_stats()
+        assert stats["context_turns"] == 3
+        # Only the new message is evaluated, so the cost doesn't grow per turn
+        assert [t["prompt_tokens"] for t in stats["per_turn"]] == [6, 2, 2]
+
+    def test_rejected_context_falls_back_to_history(self, fake_ollama):
+        """Test a failed context request is retried with the full history."""
+        fake_ollama.reply = "fine"
+        session = LLMEngine(host=fake_ollama.url).session(system_prompt="System.")
+        session.send("hello")
+
+        fake_ollama.reject_context = True
+        assert session.send("and again").content == "fine"
+        session.send("once more")
+
+        assert fake_ollama.paths() == [
+            "/api/generate", "/api/generate", "/api/chat", "/api/chat",
+        ]
+        messages = fake_ollama.requests[-1][1]["messages"]
+        assert [m["role"] for m in messages] == [
+            "system", "user", "assistant", "user", "assistant", "user",
+        ]
+        assert [m["content"] for m in messages[1::2]] == ["hello", "and again", "once more"]
+
+        stats = session.get_stats()
+        assert stats["fallbacks"] == 1
+        assert [t["mode"] for t in stats["per_turn"]] == [CONTEXT_MODE, HISTORY_MODE, HISTORY_MODE]
+
+    def test_history_mode_fits_context_window(self, fake_ollama):
+        """Test a long conversation past the window sends only its newest turns."""
+        fake_ollama.reply = " ".join(["reply"] * 20)
+        engine = LLMEngine(host=fake_ollama.url, context_length=300)
+        session = engine.session(system_prompt="Be brief.", context_margin=20)
+
+        for i in range(30):
+            session.send(f"question number {i} " + "padding " * 10)
+
+        assert session.mode == HISTORY_MODE
+        assert len(session.turns) == 30
+        chats = [payload["messages"] for path, payload in fake_ollama.requests if path == "/api/chat"]
+        for messages in chats:
+            assert sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages) <= 300 - 20
+            assert messages[0]["content"] == "Be brief."
+        assert chats[-1][-1]["content"].startswith("question number 29")
+        assert len(chats[-1]) < 2 * 30
+
+        # Trimming goes down to half the window, so the next turns share a prefix
+        firsts = [messages[1]["content"] for messages in chats]
+        assert sum(a == b for a, b in zip(firsts, firsts[1:])) > len(chats) / 2
+
+    def test_model_change_invalidates_context(self, fake_ollama):
+        """Test a context from another model isn't reused."""
+        engine = LLMEngine(host=fake_ollama.url, model="small")
+        session = engine.session()
+        session.send("hi")
+        assert session.mode == CONTEXT_MODE
+
+        engine.model = "large"
+        assert session.mode == HISTORY_MODE
+        session.send("hi again")
+        assert fake_ollama.paths()[-1] == "/api/chat"
+
+    def test_cancelled_and_discarded_turns(self, fake_ollama):
+        """Test cancelled replies aren't committed and discarded ones are removed."""
+        fake_ollama.reply = " ".join(f"w{i}" for i in range(50))
+        fake_ollama.chunk_delay = 0.01
+        session = LLMEngine(host=fake_ollama.url).session()
+
+        cancel = threading.Event()
+        threading.Timer(0.05, cancel.set).start()
+        response, turn = session.exchange("long one", cancel_event=cancel)
+        assert not response.done and turn is None
+        assert session.turns == []
+
+        fake_ollama.chunk_delay = 0.0
+        _, kept = session.exchange("keep")
+        _, dropped = session.exchange("drop")
+        assert session.discard(dropped.turn_id)
+        assert [t.user for t in session.turns] == ["keep"]
+
+        # The newest turn's removal restores the context from before it
+        assert session.mode == CONTEXT_MODE
+        session.exchange("next")
+        assert fake_ollama.paths()[-1] == "/api/generate"
+
+        # An older turn is baked into the context, so history takes over
+        assert session.discard(kept.turn_id)
+        assert session.mode == HISTORY_MODE
+
+
+class TestChatToolMultiTurn:
+    """Tests for ChatTool's multi-turn mode."""
+
+    def test_turns_share_context(self, fake_ollama):
+        """Test consecutive chats continue one conversation."""
+        fake_ollama.reply = "sure thing"
+        tool = ChatTool(multi_turn=True, host=fake_ollama.url)
+
+        first = tool.execute(query="what is python")
+        second = tool.execute(query="who made it")
+
+        assert first.success and second.success
+        assert second.data["response"] == "sure thing"
+        assert second.data["turn_id"] == first.data["turn_id"] + 1
+        follow_up = fake_ollama.requests[1][1]
+        assert follow_up["prompt"] == "who made it"
+        assert follow_up["context"] and "system" not in follow_up
+
+    def test_cold_start_recorded(self, fake_ollama):
+        """Test a multi-turn reply reports Ollama's load time to residency stats."""
+        residency = ModelResidencyManager(host=fake_ollama.url, cold_start_threshold=0.5)
+        tool = ChatTool(multi_turn=True, host=fake_ollama.url, residency=residency)
+
+        fake_ollama.load_duration = 2 * NANOSECONDS
+        assert tool.execute(query="hello").success
+        fake_ollama.load_duration = 0
+        assert tool.execute(query="how are you").success
+
+        stats = residency.get_stats()[tool.model]
+        assert stats["cold_starts"] == 1
+
+    def test_unused_speculation_is_discarded(self, fake_ollama):
+        """Test a speculative reply that routing threw away leaves no turn."""
+        tool = ChatTool(multi_turn=True, host=fake_ollama.url)
+        speculative = SpeculativeChat(tool)
+
+        speculation = speculative.prepare("turn the volume up")
+        speculation.start()
+        speculation._future.result(timeout=5)
+        speculation.cancel()
+
+        assert tool.session.turns == []
+        speculative.shutdown()
+
+    def test_cancelled_speculation_after_next_turn(self, fake_ollama):
+        """Test a speculation discarded after the next turn committed leaves that turn's context alone."""
+        tool = ChatTool(multi_turn=True, host=fake_ollama.url)
+        tool.execute(query="hello")
+        speculative = SpeculativeChat(tool)
+
+        speculation = speculative.prepare("turn the volume up")
+        speculation.start()
+        speculation._future.result(timeout=5)
+        # The next real turn runs before the cancelled speculation is cleaned up
+        tool.execute(query="what is python")
+        speculated, real = fake_ollama.requests[-2][1], fake_ollama.requests[-1][1]
+        assert real["context"] == speculated["context"]  # not extended by the speculation
+        speculation.cancel()
+        speculative.shutdown()
+
+        assert [t.user for t in tool.session.turns] == ["hello", "what is python"]
+        assert tool.session.mode == CONTEXT_MODE
+        tool.execute(query="who made it")
+        assert fake_ollama.paths()[-1] == "/api/generate"
+
+    def test_used_speculation_is_committed(self, fake_ollama):
+        """Test a speculative reply joins the conversation once it is used."""
+        tool = ChatTool(multi_turn=True, host=fake_ollama.url)
+        speculative = SpeculativeChat(tool)
+
+        speculation = speculative.prepare("tell me a joke")
+        speculation.start()
+        speculation._future.result(timeout=5)
+        assert tool.session.turns == []
+
+        result = speculation.result()
+        speculation.cancel()
+        speculative.shutdown()
+
+        assert [t.turn_id for t in tool.session.turns] == [result.data["turn_id"]]
+        assert tool.session.mode == CONTEXT_MODE
@@ -0,0 +1,109 @@
+"""
+Tests for full-text search over conversation and action history.
+"""
+
+import sqlite3
+
+from core.context_manager import ContextManager
+
+
+def _context(tmp_path, **kwargs) -> ContextManager:
+    ctx = ContextManager(persistence_path=tmp_path / "context.db", **kwargs)
+    ctx.add_message("user", "open the quarterly budget spreadsheet in excel")
+    ctx.add_message("assistant", "Opened budget.xlsx")
+    ctx.add_message("user", "what's the weather like today")
+    ctx.add_message("user", "play some jazz music")
+    ctx.add_message("user", "budget budget budget for the trip")
+    ctx.record_action("read_excel", "excel_reader", {"path": "budget.xlsx"}, "3 sheets", success=True)
+    ctx.record_action("launch_app", "app_launcher", {"app_name": "spotify"}, "not found", success=False)
+    return ctx
+
+
+class TestContextSearch:
+    """Tests for ContextManager.search_messages / search_actions."""
+
+    def test_messages_ranked(self, tmp_path):
+        """Test results are ranked by relevance and stemmed."""
+        ctx = _context(tmp_path)
+
+        results = ctx.search_messages("budget")
+        assert results[0]["content"] == "budget budget budget for the trip"
+        assert len(results) == 3
+        assert results[0]["score"] >= results[1]["score"]
+        assert "[budget]" in results[0]["snippet"]
+
+        # Porter stemming: "opening" matches "open" and "Opened"
+        assert len(ctx.search_messages("opening")) == 2
+        assert [r["role"] for r in ctx.search_messages("opening", role="assistant")] == ["assistant"]
+        ctx.close()
+
+    def test_paging(self, tmp_path):
+        """Test limit/offset page through the ranked results."""
+        ctx = _context(tmp_path)
+
+        everything = ctx.search_messages("budget", limit=10)
+        pages = ctx.search_messages("budget", limit=2) + ctx.search_messages("budget", limit=2, offset=2)
+        assert [r["id"] for r in pages] == [r["id"] for r in everything]
+        ctx.close()
+
+    def test_actions_searchable(self, tmp_path):
+        """Test actions match on tool, parameters and result."""
+        ctx = _context(tmp_path)
+
+        assert [a["tool_name"] for a in ctx.search_actions("spotify")] == ["app_launcher"]
+        hits = ctx.search_actions("budget xlsx", match_all=True)
+        assert hits[0]["parameters"] == {"path": "budget.xlsx"}
+        assert ctx.search_actions("spotify", success=True) == []
+        ctx.close()
+
+    def test_user_text_is_safe(self, tmp_path):
+        """Test FTS operators and punctuation in queries don't raise."""
+        ctx = _context(tmp_path)
+
+        assert ctx.search_messages('what"s (the) AND weather -NOT*')
+        assert ctx.search_messages("?!") == []
+        ctx.close()
+
+    def test_index_follows_deletes_and_backfills(self, tmp_path):
+        """Test triggers keep the index in sync and old databases get indexed."""
+        path = tmp_path / "old.db"
+        with sqlite3.connect(str(path)) as db:
+            db.execute(
+                "CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT, role TEXT NOT NULL, "
+                "content TEXT NOT NULL, timestamp TEXT NOT NULL, metadata TEXT)"
+            )
+            db.execute(
+                "INSERT INTO messages (role, content, timestamp) VALUES ('user', 'remember the milk', '2026-01-01')"
+            )
+
+        ctx = ContextManager(persistence_path=path)
+        assert [r["content"] for r in ctx.search_messages("milk")] == ["remember the milk"]
+
+        ctx._db.execute("DELETE FROM messages")
+        ctx._db.commit()
+        assert ctx.search_messages("milk") == []
+        ctx.close()
+
+    def test_write_behind_and_fallback(self, tmp_path):
+        """Test queued writes are searchable and LIKE search works without FTS5."""
+        ctx = _context(tmp_path, write_behind=True, flush_interval=60.0)
+        assert len(ctx.search_messages("jazz")) == 1
+
+        ctx._search_enabled = False
+        assert [r["content"] for r in ctx.search_messages("JAZZ")] == ["play some jazz music"]
+        assert [a["tool_name"] for a in ctx.search_actions("spotify")] == ["app_launcher"]
+        ctx.close()
+
+    def test_assemble_recalls_old_messages(self, tmp_path):
+        """Test assemble() adds relevant messages that left the window."""
+        ctx = ContextManager(persistence_path=tmp_path / "context.db", max_context_messages=2)
+        ctx.add_message("user", "my flight to Lisbon leaves at 9am")
+        for i in range(4):
+            ctx.add_message("user", f"filler message {i}")
+
+        assembled = ctx.assemble(query="when does the Lisbon flight leave", recall=3)
+        system = assembled.messages[0]["content"]
+        assert "## Related Earlier Messages\n- user: my flight to Lisbon leaves at 9am" in system
+        assert "recall" in assembled.section_tokens
+        assert "filler" not in system
+        ctx.close()
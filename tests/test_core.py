@@ -2,8 +2,17 @@
 Tests for core module.
 """
 
+import asyncio
+import json
+import sys
+from types import SimpleNamespace
+
 import pytest
 from core.context_manager import ContextManager, Message
+from core.token_budget import ContextBudget
+from core.router import ACTION_HANDLERS, IntentRouter, build_intent_format
+from core.structured_output import estimate_num_predict
+from core.semantic_router import Intent, IntentCategory, SemanticRouter
 
 
 class TestContextManager:
@@ -59,3 +68,201 @@ class TestContextManager:
         assert len(history) == 1
         assert history[0].tool_name == "windows_control"
         assert history[0].success is True
+    
+    def test_messages_packed_by_tokens(self):
+        """Test token-limited messages keep the newest and cache counts."""
+        calls = []
+        
+        def words(text):
+            calls.append(text)
+            return len(text.split())
+        
+        ctx = ContextManager(token_estimator=words)
+        for i in range(6):
+            ctx.add_message("user", f"message number {i}")  # 3 + 4 overhead
+        
+        messages = ctx.get_messages_for_llm(max_tokens=22)
+        assert [m["content"] for m in messages] == [f"message number {i}" for i in (3, 4, 5)]
+        
+        ctx.get_messages_for_llm(max_tokens=22)
+        assert len(calls) == 6
+        
+        ctx.set_token_estimator(lambda text: 1)
+        assert len(ctx.get_messages_for_llm(max_tokens=22)) == 4
+    
+    def test_assemble_within_budget(self):
+        """Test each section is cut to its budget and the total is bounded."""
+        ctx = ContextManager()
+        ctx.update_screen_state("notepad.exe", "Untitled", ocr_text="x" * 2000)
+        for i in range(10):
+            ctx.record_action("open", f"tool_{i}", {}, "ok", success=True)
+        for i in range(100):
+            ctx.add_message("user" if i % 2 == 0 else "assistant", f"turn {i} " + "word " * 40)
+        
+        budget = ContextBudget(total=2048, response_reserve=512, system=20, screen=50, actions=30)
+        assembled = ctx.assemble(system_prompt="Be helpful. " * 50, include_actions=10, budget=budget)
+        
+        tokens = assembled.section_tokens
+        assert tokens["system"] <= 20
+        assert tokens["screen"] <= 50
+        assert tokens["actions"] <= 30
+        assert assembled.total_tokens <= budget.prompt_limit
+        assert assembled.dropped_messages > 0
+        
+        system = assembled.messages[0]["content"]
+        assert "tool_9" in system and "tool_0" not in system
+        assert assembled.messages[-1]["content"].startswith("turn 99 ")
+
+
+class TestSemanticRouter:
+    """Tests for the core SemanticRouter."""
+    
+    def test_intent_prompt_cached(self):
+        """Test the LLM intent prompt is rebuilt only on registration."""
+        router = SemanticRouter()
+        router.register_tool("first", "First tool", handler=lambda: None)
+        
+        prompt = router._get_intent_prompt()
+        assert router._get_intent_prompt() is prompt
+        
+        router.register_tool("second", "Second tool", handler=lambda: None)
+        rebuilt = router._get_intent_prompt()
+        
+        assert rebuilt is not prompt
+        assert "- second: Second tool" in rebuilt
+    
+    def test_pattern_table_preserves_priority(self):
+        """Test the prefiltered table returns the same first match as a linear scan."""
+        router = SemanticRouter()
+        router.register_pattern(r"(open|show)\s+settings", IntentCategory.SYSTEM_CONTROL, "plugin_settings")
+        router.register_pattern(r"remind me (.+)", IntentCategory.UNKNOWN, "plugin_reminder")
+        
+        queries = [
+            "open notepad",
+            "open settings",
+            "please reopen chrome",
+            "remind me to stretch",
+            "what's on the screen",
+            "GO TO example.com",
+            "hello there",
+        ]
+        for query in queries:
+            expected = None
+            for pattern, category, action in router._patterns:
+                if pattern.search(query):
+                    expected = (category, action)
+                    break
+            matched = router._patterns.match(query)
+            assert (matched[1:] if matched else None) == expected, query
+        
+        assert router.parse_intent("remind me to stretch").action == "plugin_reminder"
+        assert router.parse_intent("open settings").action == "open_application"
+    
+    def test_pattern_table_skips_unrelated_patterns(self):
+        """Test only patterns whose anchors occur in the query are searched."""
+        router = SemanticRouter()
+        for i in range(200):
+            router.register_pattern(rf"(verb{i}|alt{i})\s+(.+)", IntentCategory.UNKNOWN, f"action_{i}")
+        router.register_pattern(r"\d+ reasons", IntentCategory.UNKNOWN, "unanchored")
+        
+        candidates = router._patterns.candidates("verb7 something")
+        
+        assert len(candidates) == 2
+        assert router.parse_intent("verb7 something").action == "action_7"
+        assert router.parse_intent("give me 3 reasons").action == "unanchored"
+    
+    def test_route_by_name_and_category(self):
+        """Test direct name lookup, trigger scoring and success-rate ranking."""
+        router = SemanticRouter()
+        router.register_tool("play_music", "Plays music", handler=lambda **kw: "music",
+                             triggers=["play some music"], category=IntentCategory.MEDIA_CONTROL)
+        router.register_tool("play_video", "Plays video", handler=lambda **kw: "video",
+                             triggers=["play a video clip"], category=IntentCategory.MEDIA_CONTROL)
+        
+        def intent(action, query):
+            return Intent(category=IntentCategory.MEDIA_CONTROL, action=action, raw_query=query)
+        
+        assert router.route(intent("play_video", "x"))[0].name == "play_video"
+        assert router.route(intent("playback", "play a video"))[0].name == "play_video"
+        assert router.route(intent("playback", "play something"))[0].name == "play_music"
+        
+        # Repeated failures demote the category default
+        for _ in range(3):
+            router.record_outcome("play_music", False)
+        assert router.route(intent("playback", "play something"))[0].name == "play_video"
+        
+        assert router.route(Intent(category=IntentCategory.FILE_OPERATION, action="x"))[0] is None
+
+
+class _ScriptedChatModel:
+    """ChatOllama stand-in returning a fixed JSON answer."""
+
+    def __init__(self, answer: dict):
+        self.answer = answer
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return SimpleNamespace(content=json.dumps(self.answer))
+
+
+class TestIntentRouterCascade:
+    """Tests for the IntentRouter model cascade."""
+
+    def _router(self, small_answer, big_answer):
+        router = IntentRouter(model="big", cascade_models=["small"])
+        router._cascade_llms["small"] = _ScriptedChatModel(small_answer)
+        router._llm = _ScriptedChatModel(big_answer)
+        return router
+
+    def test_valid_small_answer_accepted(self):
+        """Test the first tier answers when its JSON validates."""
+        answer = {"category": "SYSTEM_CONTROL", "action": "mute", "parameters": {}}
+        router = self._router(answer, answer)
+
+        result = asyncio.run(router.route_intent("Mute"))
+
+        assert result.action == "mute"
+        assert router._llm.calls == 0
+        assert router.stats.get("small").accepted == 1
+
+    def test_unknown_action_escalates(self):
+        """Test an action outside ACTION_HANDLERS escalates to the next model."""
+        router = self._router(
+            {"category": "SYSTEM_CONTROL", "action": "silence", "parameters": {}},
+            {"category": "SYSTEM_CONTROL", "action": "mute", "parameters": {}},
+        )
+
+        result = asyncio.run(router.route_intent("Mute"))
+
+        assert result.action == "mute"
+        assert router.stats.get("small").escalated == 1
+        assert router.stats.get("big").accepted == 1
+
+    def test_intent_format_matches_handlers(self):
+        """Test the intent schema only allows actions with handlers."""
+        branches = build_intent_format()["anyOf"]
+        system = next(b for b in branches if b["properties"]["category"]["const"] == "SYSTEM_CONTROL")
+
+        assert len(branches) == len(ACTION_HANDLERS)
+        assert "mute" in system["properties"]["action"]["enum"]
+
+    def test_free_form_parameters_get_whole_budget(self, monkeypatch):
+        """Test num_predict leaves room for free-text parameters like a document's text."""
+        made = []
+        monkeypatch.setitem(
+            sys.modules, "langchain_ollama",
+            SimpleNamespace(ChatOllama=lambda **kwargs: made.append(kwargs) or kwargs),
+        )
+        IntentRouter()._get_llm()
+
+        assert made[0]["format"] == build_intent_format()
+        assert made[0]["num_predict"] == 256
+
+    def test_max_length_bounds_string_estimate(self):
+        """Test a string with maxLength is priced by it, not the free-text budget."""
+        unbounded = {"type": "object", "properties": {"text": {"type": "string"}}}
+        bounded = {"type": "object", "properties": {"text": {"type": "string", "maxLength": 30}}}
+
+        assert estimate_num_predict(unbounded, text_tokens=200) > 200
+        assert estimate_num_predict(bounded, text_tokens=200) < 30
@@ -0,0 +1,69 @@
+"""
+Tests for write-behind SQLite persistence.
+"""
+
+import sqlite3
+
+from core.context_manager import ContextManager
+from core.db_writer import WriteBehindWriter
+
+
+def _count(path, table):
+    with sqlite3.connect(str(path)) as db:
+        return db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+class TestWriteBehindWriter:
+    """Tests for WriteBehindWriter and ContextManager's write-behind mode."""
+
+    def test_writes_batched_into_transactions(self, tmp_path):
+        """Test queued writes are committed together and visible after flush."""
+        path = tmp_path / "context.db"
+        ctx = ContextManager(persistence_path=path, write_behind=True, flush_interval=1.0)
+
+        for i in range(50):
+            ctx.add_message("user", f"message {i}")
+            ctx.record_action("open", "launcher", {"i": i}, "ok", success=True)
+        ctx.set("theme", "dark")
+
+        assert ctx.flush(timeout=5)
+        assert _count(path, "messages") == 50
+        assert _count(path, "actions") == 50
+        # 101 statements, far fewer commits
+        assert ctx._writer.stats.statements == 101
+        assert ctx._writer.stats.batches <= 2
+        ctx.close()
+
+    def test_close_drains_queue(self, tmp_path):
+        """Test close() commits writes still waiting for their batch."""
+        path = tmp_path / "context.db"
+        ctx = ContextManager(persistence_path=path, write_behind=True, flush_interval=60.0)
+        ctx.add_message("user", "pending")
+        ctx.close()
+
+        assert _count(path, "messages") == 1
+
+    def test_reads_see_queued_writes(self, tmp_path):
+        """Test queries flush pending writes first."""
+        ctx = ContextManager(persistence_path=tmp_path / "context.db", write_behind=True, flush_interval=60.0)
+        ctx.add_message("user", "open notepad")
+        ctx.record_action("launch_app", "app_launcher", {"app_name": "notepad"}, "ok", success=True)
+
+        routes = ctx.get_successful_routes()
+        assert [r["query"] for r in routes] == ["open notepad"]
+        ctx.close()
+
+    def test_failed_statement_does_not_drop_batch(self, tmp_path):
+        """Test a bad statement is dropped alone when its batch fails."""
+        path = tmp_path / "plain.db"
+        with sqlite3.connect(str(path)) as db:
+            db.execute("CREATE TABLE items (name TEXT NOT NULL)")
+
+        writer = WriteBehindWriter(path, flush_interval=1.0)
+        writer.execute("INSERT INTO items (name) VALUES (?)", ("a",))
+        writer.execute("INSERT INTO items (name) VALUES (?)", (None,))
+        writer.execute("INSERT INTO items (name) VALUES (?)", ("b",))
+        writer.close()
+
+        assert _count(path, "items") == 2
+        assert writer.stats.failed == 1
@@ -0,0 +1,127 @@
+"""
+Tests for the embedding nearest-neighbour router.
+"""
+
+import asyncio
+
+from core.context_manager import ContextManager
+from core.embedding_router import EmbeddingRouter
+from core.llm_engine import LLMEngine
+from core.router import IntentCategory, IntentRouter
+
+
+class _CountingEmbed:
+    """Wraps an embed function and records how many texts it embedded."""
+
+    def __init__(self, embed):
+        self._embed = embed
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return self._embed(texts)
+
+
+def _router(fake_ollama, **kwargs):
+    engine = LLMEngine(host=fake_ollama.url)
+    embed = _CountingEmbed(engine.embed)
+    return EmbeddingRouter(embed, **kwargs), embed
+
+
+class TestEmbeddingRouter:
+    """Tests for EmbeddingRouter."""
+
+    def test_router_examples_parsed(self, fake_ollama):
+        """Test few-shot examples are lifted out of the system prompt."""
+        router, _ = _router(fake_ollama)
+
+        count = router.add_router_examples()
+        router.build()
+
+        assert count == 8
+        assert "Mute" in router.index.texts
+        assert router.index.labels[router.index.texts.index("Open Chrome")] == {
+            "category": "APP_CONTROL",
+            "action": "open_app",
+            "parameters": {"app_name": "chrome"},
+        }
+
+    def test_route_thresholds(self, fake_ollama):
+        """Test confident matches route and weak ones escalate."""
+        router, _ = _router(fake_ollama, threshold=0.8)
+        router.add_router_examples()
+        router.build()
+
+        muted = router.route("mute please")
+        assert muted.category == IntentCategory.SYSTEM_CONTROL
+        assert muted.action == "mute"
+        assert muted.confidence >= 0.8
+
+        # Unrelated query: below threshold
+        assert router.route("search weather notepad") is None
+
+        # Close to a parameterized exemplar but not a near-duplicate
+        assert router.route("open chrome and notepad") is None
+        assert router.route("Open Chrome").parameters == {"app_name": "chrome"}
+
+    def test_parameters_come_from_the_query(self, fake_ollama):
+        """Test matches never answer with parameters the query didn't give."""
+        router, _ = _router(fake_ollama)
+        router.add_router_examples()
+        router.add_action_handlers()
+        router.build()
+
+        # Numbers are refilled from the query, not replayed from the exemplar
+        assert router.route("set volume to 30").parameters == {"value": 30}
+        assert router.route("set volume to 30 or 40") is None
+        assert router.route("set volume") is None
+
+        # Action descriptions carry no parameters, so only parameterless actions route
+        assert router.route("set brightness to 70") is None
+        assert router.route("get brightness").action == "get_brightness"
+
+    def test_index_reused_across_restarts(self, fake_ollama, tmp_path):
+        """Test a rebuilt router only embeds exemplars it hasn't seen."""
+        path = tmp_path / "intent_index.npz"
+
+        first, first_embed = _router(fake_ollama, index_path=path)
+        first.add_router_examples()
+        assert first.build() == 8
+        assert path.exists()
+
+        second, second_embed = _router(fake_ollama, index_path=path)
+        second.add_router_examples()
+        second.add_exemplar("set brightness", "SYSTEM_CONTROL", "set_brightness")
+        assert second.build() == 1
+        assert second_embed.texts == ["set brightness"]
+        assert len(second.index) == 9
+        assert second.route("mute").action == "mute"
+
+    def test_action_history_seed(self, fake_ollama, tmp_path):
+        """Test successful past routes become exemplars."""
+        context = ContextManager(persistence_path=tmp_path / "context.db")
+        context.add_message("user", "launch notepad")
+        context.record_action("APP_CONTROL", "open_app", {"app_name": "notepad"}, "ok", True)
+        context.add_message("user", "close excel")
+        context.record_action("APP_CONTROL", "close_app", {"app_name": "excel"}, None, False)
+        context.add_message("user", "what is on my screen")
+        context.record_action("vision", "analyze_screen", {}, "ok", True)
+
+        router, _ = _router(fake_ollama)
+        assert router.add_action_history(context) == 1
+        router.build()
+
+        assert router.index.texts == ["launch notepad"]
+        assert router.route("launch notepad").parameters == {"app_name": "notepad"}
+
+    def test_intent_router_uses_embeddings_first(self, fake_ollama):
+        """Test IntentRouter answers from the embedding router without an LLM."""
+        router, _ = _router(fake_ollama)
+        router.add_router_examples()
+        router.build()
+        intent_router = IntentRouter(embedding_router=router)
+
+        result = asyncio.run(intent_router.route_intent("Mute"))
+
+        assert result.action == "mute"
+        assert intent_router._llm is None
@@ -0,0 +1,120 @@
+"""
+Tests for the LLM response cache.
+"""
+
+import time
+
+from app.core.registry import ToolRegistry
+from app.core.router import SemanticRouter
+from core.llm_cache import ResponseCache
+from core.llm_engine import LLMEngine
+
+
+class _FakeOllamaModule:
+    """Stands in for the ollama package inside SemanticRouter."""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.calls = 0
+
+    def chat(self, **kwargs):
+        self.calls += 1
+        return {"message": {"content": self.content}}
+
+
+class TestResponseCache:
+    """Tests for ResponseCache."""
+
+    def test_key_normalizes_whitespace(self):
+        """Test prompts differing only in whitespace share a key."""
+        a = ResponseCache.make_key("m", "set  volume to 50 ", {"temperature": 0.1})
+        b = ResponseCache.make_key("m", "set volume to 50", {"temperature": 0.1})
+        c = ResponseCache.make_key("m", "set volume to 50", {"temperature": 0.7})
+
+        assert a == b
+        assert a != c
+
+    def test_lru_eviction(self):
+        """Test the memory tier evicts the least recently used entry."""
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats.evictions == 1
+        assert cache.stats.hits == 2
+        assert cache.stats.misses == 1
+
+    def test_ttl_expiry(self):
+        """Test entries expire after the TTL."""
+        cache = ResponseCache(ttl=0.05)
+        cache.put("k", "v")
+        time.sleep(0.1)
+
+        assert cache.get("k") is None
+        assert cache.stats.expirations == 1
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Test the SQLite tier serves entries to a fresh instance."""
+        path = tmp_path / "cache.db"
+        first = ResponseCache(persistence_path=path)
+        first.put("k", {"content": "hi"})
+        first.close()
+
+        second = ResponseCache(persistence_path=path)
+
+        assert second.get("k") == {"content": "hi"}
+        assert second.stats.disk_hits == 1
+        assert second.get("k") == {"content": "hi"}
+        assert second.stats.memory_hits == 1
+
+    def test_disk_size_bound(self, tmp_path):
+        """Test the SQLite tier keeps at most max_disk_entries rows."""
+        cache = ResponseCache(max_entries=1, persistence_path=tmp_path / "c.db", max_disk_entries=3)
+        for i in range(5):
+            cache.put(f"k{i}", i)
+
+        (count,) = cache._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        assert count == 3
+        assert cache.get("k0") is None
+
+
+class TestCachedCallers:
+    """Tests for the cache in front of LLMEngine and SemanticRouter."""
+
+    def test_llm_engine_cache_hit(self, fake_ollama):
+        """Test repeated deterministic calls skip the server."""
+        engine = LLMEngine(host=fake_ollama.url, temperature=0.0, cache=ResponseCache())
+
+        first = engine.chat([{"role": "user", "content": "mute"}])
+        second = engine.chat([{"role": "user", "content": "mute"}])
+
+        assert first == second
+        assert len(fake_ollama.requests) == 1
+
+    def test_router_cache_hit(self):
+        """Test the router only calls Ollama once for a repeated command."""
+        router = SemanticRouter(ToolRegistry(), cache=ResponseCache())
+        fake = _FakeOllamaModule('{"tool_name": "general_chat", "parameters": {"message": "hi"}}')
+        router._ollama = fake
+
+        first = router.route("hi")
+        second = router.route("hi")
+
+        assert first == second
+        assert fake.calls == 1
+        assert router.cache.stats.hits == 1
+
+    def test_router_does_not_cache_parse_errors(self):
+        """Test unparseable answers are not replayed from the cache."""
+        router = SemanticRouter(ToolRegistry(), cache=ResponseCache())
+        fake = _FakeOllamaModule("not json")
+        router._ollama = fake
+
+        router.route("hi")
+        router.route("hi")
+
+        assert fake.calls == 2
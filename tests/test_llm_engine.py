@@ -0,0 +1,136 @@
+"""
+Tests for the LLM engines against a local fake Ollama server.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from core.llm_cache import ResponseCache
+from core.llm_engine import AsyncLLMEngine, LLMEngine
+
+
+class TestAsyncLLMEngine:
+    """Tests for AsyncLLMEngine."""
+
+    def test_generate_and_chat(self, fake_ollama):
+        """Test non-streaming generate and chat calls."""
+        fake_ollama.reply = "hello there"
+
+        async def run():
+            async with AsyncLLMEngine(host=fake_ollama.url) as engine:
+                generated = await engine.generate("hi", system_prompt="be brief")
+                chatted = await engine.chat(
+                    [{"role": "user", "content": "hi"}], model="llama3.2:3b"
+                )
+                return generated, chatted
+
+        generated, chatted = asyncio.run(run())
+
+        assert generated.content == "hello there"
+        assert generated.tokens_used == 2
+        assert chatted.content == "hello there"
+        assert chatted.model == "llama3.2:3b"
+
+        path, payload = fake_ollama.requests[0]
+        assert path == "/api/generate"
+        assert payload["system"] == "be brief"
+        assert payload["stream"] is False
+
+    def test_streaming(self, fake_ollama):
+        """Test streamed chunks are yielded in order."""
+        fake_ollama.reply = "one two three"
+
+        async def run():
+            async with AsyncLLMEngine(host=fake_ollama.url) as engine:
+                gen = [c async for c in engine.stream_generate("count")]
+                chat = [c async for c in engine.stream_chat([{"role": "user", "content": "count"}])]
+                return gen, chat, engine.stats
+
+        gen, chat, stats = asyncio.run(run())
+
+        assert "".join(gen) == "one two three"
+        assert "".join(chat) == "one two three"
+        assert stats.in_flight == 0
+        assert stats.total_requests == 2
+
+    def test_concurrency_limit(self, fake_ollama):
+        """Test requests overlap but never exceed the in-flight limit."""
+        fake_ollama.delay = 0.2
+
+        async def run():
+            async with AsyncLLMEngine(host=fake_ollama.url, max_concurrency=2) as engine:
+                await asyncio.gather(*(engine.generate(f"q{i}") for i in range(6)))
+                return engine.stats
+
+        stats = asyncio.run(run())
+
+        assert fake_ollama.peak_concurrency == 2
+        assert stats.peak_in_flight == 2
+        assert stats.peak_waiting >= 3
+        assert stats.total_requests == 6
+        assert stats.waiting == 0
+        assert stats.avg_wait_time > 0
+
+    def test_http_error_counts_failure(self, fake_ollama):
+        """Test failed requests are counted and re-raised."""
+        async def run():
+            async with AsyncLLMEngine(host=fake_ollama.url) as engine:
+                with pytest.raises(Exception):
+                    await engine._post("/api/missing", {})
+                return engine.stats
+
+        stats = asyncio.run(run())
+
+        assert stats.failed_requests == 1
+        assert stats.in_flight == 0
+
+    def test_invalid_concurrency(self):
+        """Test the limiter rejects a zero-sized pool."""
+        with pytest.raises(ValueError):
+            AsyncLLMEngine(max_concurrency=0)
+
+
+class TestLLMEngine:
+    """Tests for the blocking LLMEngine."""
+
+    def test_generate(self, fake_ollama):
+        """Test blocking generate against the fake server."""
+        fake_ollama.reply = "sync reply"
+        engine = LLMEngine(host=fake_ollama.url)
+
+        response = engine.generate("hi")
+
+        assert response.content == "sync reply"
+        assert engine.is_available()
+
+    def test_cancel_event(self, fake_ollama):
+        """Test a cancelled call stops early and isn't cached."""
+        fake_ollama.reply = " ".join(f"w{i}" for i in range(50))
+        fake_ollama.chunk_delay = 0.01
+        engine = LLMEngine(host=fake_ollama.url, cache=ResponseCache())
+        cancel = threading.Event()
+        threading.Timer(0.1, cancel.set).start()
+
+        response = engine.chat([{"role": "user", "content": "talk"}], cancel_event=cancel)
+
+        assert response.done is False
+        assert 0 < response.tokens_used < 50
+        assert len(engine.cache) == 0
+
+        fake_ollama.chunk_delay = 0.0
+        again = engine.chat([{"role": "user", "content": "talk"}], cancel_event=threading.Event())
+        assert again.done is True
+        assert len(fake_ollama.requests) == 2
+
+    def test_cancel_event_completes(self, fake_ollama):
+        """Test an uncancelled call through the cancellable path is complete."""
+        fake_ollama.reply = "all of it"
+        engine = LLMEngine(host=fake_ollama.url)
+
+        response = engine.generate("hi", cancel_event=threading.Event())
+
+        assert response.content == "all of it"
+        assert response.done is True
+        assert response.tokens_used == 3
+
@@ -0,0 +1,98 @@
+"""
+Tests for the Ollama model residency manager.
+"""
+
+from core.model_residency import NANOSECONDS, ModelResidencyManager
+
+
+class TestModelResidencyManager:
+    """Tests for ModelResidencyManager."""
+
+    def test_prewarm_loads_models(self, fake_ollama):
+        """Test pre-warming sends an empty generate with keep_alive."""
+        fake_ollama.load_duration = 2 * NANOSECONDS
+        residency = ModelResidencyManager(
+            host=fake_ollama.url, models=["router", "vision"], default_keep_alive=120
+        )
+
+        residency.prewarm()
+
+        warmed = [payload for path, payload in fake_ollama.requests if path == "/api/generate"]
+        assert [p["model"] for p in warmed] == ["router", "vision"]
+        assert all(p["prompt"] == "" and p["keep_alive"] == 120 for p in warmed)
+        stats = residency.get_stats()
+        assert stats["router"]["warm_pings"] == 1
+        assert stats["router"]["warm_load_time"] == 2.0
+        residency.close()
+
+    def test_prewarm_stops_with_manager(self, fake_ollama):
+        """Test a stopped manager doesn't keep pre-warming."""
+        residency = ModelResidencyManager(host=fake_ollama.url, models=["router", "vision"])
+        residency.stop()
+
+        residency.prewarm()
+
+        assert fake_ollama.requests == []
+        residency.close()
+
+    def test_keep_alive_follows_usage(self, monkeypatch):
+        """Test keep_alive tracks the gap between uses within bounds."""
+        clock = [1000.0]
+        monkeypatch.setattr("core.model_residency.time.time", lambda: clock[0])
+        residency = ModelResidencyManager(
+            models=["chat"], default_keep_alive=300, min_keep_alive=60, max_keep_alive=900
+        )
+
+        assert residency.keep_alive("chat") == 300
+        for gap in (0, 100, 100):
+            clock[0] += gap
+            residency.record_use("chat")
+        assert residency.keep_alive("chat") == 200
+
+        clock[0] += 5000
+        residency.record_use("chat")
+        assert residency.keep_alive("chat") == 900
+
+        for _ in range(20):
+            clock[0] += 1
+            residency.record_use("chat")
+        assert residency.keep_alive("chat") == 60
+        residency.close()
+
+    def test_cold_starts_counted(self):
+        """Test load_duration over the threshold counts as a cold start."""
+        residency = ModelResidencyManager(cold_start_threshold=0.5)
+
+        residency.record_use("vision", load_duration=3 * NANOSECONDS)
+        residency.record_use("vision", load_duration=NANOSECONDS // 100)
+        residency.record_use("vision")
+
+        stats = residency.get_stats()["vision"]
+        assert stats["uses"] == 3
+        assert stats["cold_starts"] == 1
+        assert round(stats["total_load_time"], 2) == 3.01
+        residency.close()
+
+    def test_warm_before_predicted_use(self, monkeypatch):
+        """Test a model is pinged just before a use it would miss residency for."""
+        clock = [0.0]
+        monkeypatch.setattr("core.model_residency.time.time", lambda: clock[0])
+        residency = ModelResidencyManager(
+            models=["vision"], min_keep_alive=60, max_keep_alive=600, warm_lead=30
+        )
+
+        # Used every 1000s: keep_alive caps at 600s, so it would unload first
+        for _ in range(3):
+            residency.record_use("vision")
+            clock[0] += 1000
+        clock[0] -= 1000
+
+        assert residency.due_for_warming(now=clock[0] + 500) == []
+        assert residency.due_for_warming(now=clock[0] + 980) == ["vision"]
+
+        # A ping extends residency past the predicted use: no second ping
+        clock[0] += 980
+        with residency._lock:
+            residency._usage["vision"].last_touched = clock[0]
+        assert residency.due_for_warming(now=clock[0] + 10) == []
+        residency.close()
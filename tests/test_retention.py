@@ -0,0 +1,142 @@
+"""
+Tests for retention and compaction of the context database.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+from core.context_manager import ContextManager
+from core.retention import RetentionJob, RetentionPolicy
+
+
+def _count(path, table):
+    with sqlite3.connect(str(path)) as db:
+        return db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def _fill(ctx: ContextManager, rows: int, days_ago: float = 0):
+    timestamp = (datetime.now() - timedelta(days=days_ago)).isoformat()
+    with ctx._db:
+        ctx._db.executemany(
+            "INSERT INTO messages (role, content, timestamp) VALUES ('user', ?, ?)",
+            [(f"message {i} " + "x" * 200, timestamp) for i in range(rows)],
+        )
+        ctx._db.executemany(
+            """INSERT INTO actions (timestamp, action_type, tool_name, success)
+               VALUES (?, 'open', 'launcher', 1)""",
+            [(timestamp,) for _ in range(rows)],
+        )
+
+
+class TestRetention:
+    """Tests for RetentionJob."""
+
+    def test_age_and_row_limits(self, tmp_path):
+        """Test old rows and rows beyond the cap are deleted, newest kept."""
+        path = tmp_path / "context.db"
+        ctx = ContextManager(persistence_path=path)
+        _fill(ctx, 120, days_ago=40)
+        _fill(ctx, 80)
+        ctx.set("theme", "dark")
+        ctx._db.execute("UPDATE session_data SET updated_at = '2000-01-01'")
+        ctx._db.commit()
+
+        job = RetentionJob.from_context(ctx, RetentionPolicy(max_age_days=30, max_rows=50), batch_size=7, pause=0)
+        report = job.run_once()
+
+        assert report.messages == 150 and report.actions == 150
+        assert report.session_data == 1
+        assert _count(path, "messages") == 50
+        (first,) = ctx._db.execute("SELECT MIN(id) FROM messages").fetchone()
+        assert first == 151
+        # The full-text index follows the deletes
+        assert len(ctx.search_messages("message", limit=100)) == 50
+        ctx.close()
+
+    def test_only_latest_summary_kept(self, tmp_path):
+        """Test superseded running summaries are removed per session."""
+        path = tmp_path / "context.db"
+        ctx = ContextManager(persistence_path=path)
+        for session, text in [("a", "one"), ("a", "two"), ("b", "three"), ("a", "four")]:
+            ctx._db.execute(
+                "INSERT INTO summaries (session_id, summary, message_count, created_at) VALUES (?, ?, 1, '')",
+                (session, text),
+            )
+        ctx._db.commit()
+
+        RetentionJob(path, RetentionPolicy(max_age_days=None, max_rows=None)).run_once()
+        rows = ctx._db.execute("SELECT session_id, summary FROM summaries ORDER BY id").fetchall()
+        assert rows == [("b", "three"), ("a", "four")]
+        ctx.close()
+
+    def test_size_limit_and_incremental_vacuum(self, tmp_path):
+        """Test the size cap deletes oldest rows and freed pages are released."""
+        path = tmp_path / "context.db"
+        ctx = ContextManager(persistence_path=path)
+        assert ctx._db.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        _fill(ctx, 2000)
+        ctx.close()
+        size_before = path.stat().st_size
+
+        job = RetentionJob(path, RetentionPolicy(max_age_days=None, max_rows=None, max_bytes=size_before // 4), pause=0)
+        report = job.run_once()
+
+        assert 0 < _count(path, "messages") < 2000
+        assert report.pages_vacuumed > 0
+        with sqlite3.connect(str(path)) as db:
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        assert path.stat().st_size < size_before
+
+    def test_size_limit_ignores_unpruned_tables(self, tmp_path):
+        """Test a large table retention never prunes doesn't keep shrinking history."""
+        path = tmp_path / "context.db"
+        ctx = ContextManager(persistence_path=path)
+        _fill(ctx, 2000)
+        with ctx._db:
+            ctx._db.execute("CREATE TABLE blobs (data BLOB)")
+            ctx._db.executemany("INSERT INTO blobs VALUES (?)", [(b"\0" * 3072,) for _ in range(2000)])
+        history = RetentionJob._history_bytes(ctx._db)
+        ctx.close()
+
+        policy = RetentionPolicy(max_age_days=None, max_rows=None, max_bytes=history // 2)
+        job = RetentionJob(path, policy, pause=0)
+        first = job.run_once()
+        assert 600 < _count(path, "messages") < 1400
+        assert first.messages == first.actions
+
+        second = job.run_once()
+        assert second.messages == 0 and second.actions == 0
+        assert _count(path, "blobs") == 2000
+
+    def test_old_database_switched_to_incremental(self, tmp_path):
+        """Test a database without auto_vacuum is converted once."""
+        path = tmp_path / "old.db"
+        with sqlite3.connect(str(path)) as db:
+            db.execute("CREATE TABLE placeholder (x)")
+        ctx = ContextManager(persistence_path=path)
+        assert ctx._db.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+        _fill(ctx, 300, days_ago=10)
+        ctx.close()
+
+        RetentionJob(path, RetentionPolicy(max_age_days=1), pause=0).run_once()
+        with sqlite3.connect(str(path)) as db:
+            assert db.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+            assert db.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+    def test_background_job(self, tmp_path):
+        """Test start() runs the job on its own thread."""
+        path = tmp_path / "context.db"
+        ctx = ContextManager(persistence_path=path)
+        _fill(ctx, 10, days_ago=5)
+
+        job = RetentionJob(path, RetentionPolicy(max_age_days=1))
+        job.start(interval=60)
+        for _ in range(100):
+            if job.last_report is not None:
+                break
+            job._stop.wait(0.05)
+        job.stop()
+
+        assert job.last_report.messages == 10
+        assert _count(path, "messages") == 0
+        ctx.close()
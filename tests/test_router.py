@@ -0,0 +1,420 @@
+"""
+Tests for the app-level SemanticRouter.
+"""
+
+import json
+
+from app.core.registry import ToolRegistry
+from app.core.route_memo import RouteMemo
+from app.core.router import SemanticRouter
+from app.interfaces.tool import BaseTool
+from app.services.ai.chat import ChatTool
+from app.services.ai.vision import VisionTool
+from app.services.office.excel import ExcelReaderTool
+from app.services.office.word import WordWriterTool
+from app.services.system.brightness import BrightnessTool
+from app.services.system.launcher import AppLauncherTool
+from app.services.system.screen_capture import ScreenCaptureTool
+from app.services.system.volume import VolumeTool
+from app.services.web.browser import BrowserTool
+from core.llm_cache import ResponseCache
+
+
+class _EchoTool(BaseTool):
+    """Minimal tool for routing tests."""
+
+    def __init__(self, name: str = "echo"):
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return f"Echoes its parameters ({self._name})."
+
+    def _run(self, **kwargs):
+        return kwargs
+
+
+class _BrokenTool(_EchoTool):
+    """Tool whose execution always fails."""
+
+    def _run(self, **kwargs):
+        raise RuntimeError("device unavailable")
+
+
+class _FailingOllama:
+    """Ollama stand-in that fails loudly if the LLM is reached."""
+
+    def chat(self, **kwargs):
+        raise RuntimeError("LLM called")
+
+
+class _ScriptedOllama:
+    """Ollama stand-in answering every chat with a fixed decision."""
+
+    def __init__(self, decision: dict):
+        self.decision = decision
+        self.calls = 0
+
+    def chat(self, **kwargs):
+        self.calls += 1
+        return {"message": {"content": json.dumps(self.decision)}}
+
+
+class TestSystemPromptCache:
+    """Tests for the cached router system prompt."""
+
+    def test_prompt_reused_until_registry_changes(self):
+        """Test the prompt is built once per registry version."""
+        registry = ToolRegistry()
+        registry.register_tool(_EchoTool("first"))
+        router = SemanticRouter(registry)
+
+        prompt = router._get_system_prompt()
+        assert router._get_system_prompt() is prompt
+
+        registry.register_tool(_EchoTool("second"))
+        rebuilt = router._get_system_prompt()
+
+        assert rebuilt is not prompt
+        assert "second" in rebuilt
+
+    def test_registry_version_bumps(self):
+        """Test register_tool bumps the registry version."""
+        registry = ToolRegistry()
+        before = registry.version
+        registry.register_tool(_EchoTool())
+
+        assert registry.version == before + 1
+
+
+class TestFastPath:
+    """Tests for the deterministic fast path in front of the LLM."""
+
+    def _router(self, *tool_names):
+        registry = ToolRegistry()
+        for name in tool_names:
+            registry.register_tool(_EchoTool(name))
+        router = SemanticRouter(registry)
+        router._ollama = _FailingOllama()
+        return router
+
+    def test_resolves_without_llm(self):
+        """Test common commands route without touching Ollama."""
+        router = self._router(
+            "set_volume", "set_brightness", "launch_app",
+            "capture_screen", "analyze_image", "browse_web",
+        )
+
+        cases = [
+            ("Set volume to 60", "set_volume", {"level": 60}),
+            ("volume 75%", "set_volume", {"level": 75}),
+            ("Mute the audio", "set_volume", {"mute": True}),
+            ("unmute", "set_volume", {"mute": False}),
+            ("What's the current volume?", "set_volume", {"action": "get"}),
+            ("brightness 80", "set_brightness", {"level": 80}),
+            ("Set screen brightness to 100%", "set_brightness", {"level": 100}),
+            ("Open Notepad", "launch_app", {"app_name": "notepad"}),
+            ("launch google chrome", "launch_app", {"app_name": "google chrome"}),
+            ("What's on my screen?", "visual_query", {"query": "What's on my screen?"}),
+            ("search for python tutorials", "browse_web",
+             {"task_description": "search for python tutorials"}),
+            ("go to github.com", "browse_web", {"task_description": "go to github.com"}),
+        ]
+        for query, tool_name, parameters in cases:
+            decision = router.route(query)
+            assert decision["tool_name"] == tool_name, query
+            assert decision["parameters"] == parameters, query
+            assert decision["source"] == "fast_path"
+
+        stats = router.fast_path.get_stats()
+        assert stats["total_hits"] == len(cases)
+        assert stats["hits"]["volume_level"] == 2
+
+    def test_falls_back_to_llm(self):
+        """Test ambiguous commands and unavailable tools reach the LLM."""
+        router = self._router("set_volume")
+
+        for query in ("open a new document", "what is a car?", "Open Notepad"):
+            decision = router.route(query)
+            assert "Routing error" in decision["error"], query
+
+        assert router.fast_path.get_stats()["misses"] == 3
+
+    def test_rejects_unknown_apps_and_levels(self):
+        """Test only known app names and in-range levels bypass the LLM."""
+        router = self._router("set_volume", "set_brightness", "launch_app")
+
+        queries = (
+            "open downloads folder", "start timer", "run tests", "open excel file",
+            "set volume to 150", "brightness 101",
+        )
+        for query in queries:
+            decision = router.route(query)
+            assert decision.get("source") != "fast_path", query
+        assert router.fast_path.get_stats()["total_hits"] == 0
+
+        assert router.route("open the excel app")["parameters"] == {"app_name": "excel"}
+
+    def test_can_be_disabled(self):
+        """Test use_fast_path=False always uses the LLM."""
+        registry = ToolRegistry()
+        registry.register_tool(_EchoTool("set_volume"))
+        router = SemanticRouter(registry, use_fast_path=False)
+        router._ollama = _FailingOllama()
+
+        assert "error" in router.route("volume 50")
+
+
+class TestRouteMemo:
+    """Tests for memoized routes learned from successful executions."""
+
+    def _router(self, decision, memo, tool_cls=_EchoTool):
+        registry = ToolRegistry()
+        registry.register_tool(tool_cls(decision["tool_name"]))
+        router = SemanticRouter(registry, use_fast_path=False, memo=memo)
+        router._ollama = _ScriptedOllama(decision)
+        return router
+
+    def test_number_slots_skip_llm(self):
+        """Test a learned template is refilled with the new query's numbers."""
+        memo = RouteMemo()
+        router = self._router(
+            {"tool_name": "set_volume", "parameters": {"level": 30, "label": "30"}}, memo
+        )
+
+        assert router.route_and_execute("Volume 30 please").success
+        assert router._ollama.calls == 1
+
+        decision = router.route("volume 70 please")
+
+        assert decision["source"] == "memo"
+        assert decision["parameters"] == {"level": 70, "label": "70"}
+        assert router._ollama.calls == 1
+        assert memo.get_stats()["hits"] == 1
+
+    def test_query_marker(self):
+        """Test parameters echoing the whole query are refilled verbatim."""
+        memo = RouteMemo()
+        memo.remember("Describe this window", {
+            "tool_name": "visual_query", "parameters": {"query": "Describe this window"},
+        })
+
+        decision = memo.recall("describe this window!")
+
+        assert decision["parameters"] == {"query": "describe this window!"}
+
+    def test_only_successful_routes_are_kept(self):
+        """Test failures are not memoized and failing memo routes are dropped."""
+        memo = RouteMemo()
+        router = self._router(
+            {"tool_name": "broken", "parameters": {}}, memo, tool_cls=_BrokenTool
+        )
+
+        assert not router.route_and_execute("do the thing").success
+        assert "do the thing" not in memo
+
+        memo.remember("do the thing", {"tool_name": "broken", "parameters": {}})
+        assert router.route("do the thing")["source"] == "memo"
+        router.route_and_execute("do the thing")
+        assert "do the thing" not in memo
+
+    def test_untemplatable_parameters_skipped(self):
+        """Test values derived from query numbers in other ways aren't replayed."""
+        memo = RouteMemo()
+
+        assert not memo.remember("volume up 10", {"tool_name": "set_volume", "parameters": {"level": 60}})
+        assert not memo.remember("write 42 apples", {"tool_name": "w", "parameters": {"text": "42 apples!"}})
+        assert memo.remember("open notepad", {"tool_name": "launch_app", "parameters": {"app_name": "notepad"}})
+
+    def test_lru_and_persistence(self, tmp_path):
+        """Test the memo is bounded and survives a restart."""
+        path = tmp_path / "route_memo.db"
+        memo = RouteMemo(max_entries=2, persistence_path=path)
+        for app in ("notepad", "chrome", "excel"):
+            memo.remember(f"open {app}", {"tool_name": "launch_app", "parameters": {"app_name": app}})
+        memo.close()
+
+        reloaded = RouteMemo(max_entries=2, persistence_path=path)
+
+        assert len(reloaded) == 2
+        assert "open notepad" not in reloaded
+        assert reloaded.recall("Open Excel")["parameters"] == {"app_name": "excel"}
+
+
+class _PerModelOllama:
+    """Ollama stand-in answering with a fixed decision per model."""
+
+    def __init__(self, decisions: dict):
+        self.decisions = decisions
+        self.models = []
+
+    def chat(self, model, **kwargs):
+        self.models.append(model)
+        return {"message": {"content": json.dumps(self.decisions[model])}}
+
+
+class _LevelTool(_EchoTool):
+    """Tool with a parameter schema."""
+
+    @property
+    def parameters(self):
+        return {
+            "type": "object",
+            "properties": {"level": {"type": "integer", "minimum": 0, "maximum": 100}},
+            "required": ["level"],
+        }
+
+
+class TestCascade:
+    """Tests for the tiered model cascade."""
+
+    def _router(self, decisions, **kwargs):
+        registry = ToolRegistry()
+        registry.register_tool(_LevelTool("set_volume"))
+        router = SemanticRouter(
+            registry, model="big", cascade_models=["small"], use_fast_path=False, **kwargs
+        )
+        router._ollama = _PerModelOllama(decisions)
+        return router
+
+    def test_small_model_accepted(self):
+        """Test a valid answer from the first tier is used as is."""
+        good = {"tool_name": "set_volume", "parameters": {"level": 40}}
+        router = self._router({"small": good, "big": good})
+
+        decision = router.route("make it quieter")
+
+        assert decision["source"] == "small"
+        assert router._ollama.models == ["small"]
+        assert router.stats.get("small").accepted == 1
+
+    def test_escalates_invalid_answers(self):
+        """Test unknown tools, bad parameters and low confidence escalate."""
+        big = {"tool_name": "set_volume", "parameters": {"level": 40}}
+        rejected = [
+            {"tool_name": "set_vol", "parameters": {"level": 40}},
+            {"tool_name": "set_volume", "parameters": {"level": "forty"}},
+            {"tool_name": "set_volume", "parameters": {}},
+            {"tool_name": "set_volume", "parameters": {"level": 40}, "confidence": 0.2},
+        ]
+        for small in rejected:
+            router = self._router({"small": small, "big": big})
+
+            decision = router.route("make it quieter")
+
+            assert decision["source"] == "big", small
+            assert router._ollama.models == ["small", "big"]
+            stats = router.stats.to_dict()
+            assert stats["small"]["escalation_rate"] == 1.0
+            assert stats["big"]["accepted"] == 1
+
+    def test_last_tier_answer_kept_with_warning(self):
+        """Test the final model's invalid answer is returned, flagged."""
+        bad = {"tool_name": "set_vol", "parameters": {}}
+        router = self._router({"small": bad, "big": bad})
+
+        decision = router.route("make it quieter")
+
+        assert decision["tool_name"] == "set_vol"
+        assert "not found" in decision["warning"]
+        assert router.stats.get("big").failed == 1
+
+    def test_rejected_answers_not_cached(self):
+        """Test a cheap tier's rejected answer isn't replayed from the cache."""
+        cache = ResponseCache()
+        small = {"tool_name": "set_vol", "parameters": {}}
+        big = {"tool_name": "set_volume", "parameters": {"level": 40}}
+        router = self._router({"small": small, "big": big}, cache=cache)
+
+        router.route("make it quieter")
+        router.route("make it quieter")
+
+        assert router._ollama.models == ["small", "big", "small"]
+
+
+class _RecordingOllama(_ScriptedOllama):
+    """Scripted Ollama stand-in that keeps the request arguments."""
+
+    def chat(self, **kwargs):
+        self.last_request = kwargs
+        return super().chat(**kwargs)
+
+
+class TestStructuredOutput:
+    """Tests for schema-constrained routing requests."""
+
+    def _router(self, **kwargs):
+        registry = ToolRegistry()
+        registry.register_tool(_LevelTool("set_volume"))
+        registry.register_tool(_EchoTool("launch_app"))
+        router = SemanticRouter(registry, use_fast_path=False, **kwargs)
+        router._ollama = _RecordingOllama({"tool_name": "set_volume", "parameters": {"level": 5}})
+        return router
+
+    def test_format_built_from_registry(self):
+        """Test every routable tool gets a branch with its parameter schema."""
+        router = self._router()
+        router.route("make it quieter")
+
+        request = router._ollama.last_request
+        branches = {
+            b["properties"]["tool_name"]["const"]: b["properties"]["parameters"]
+            for b in request["format"]["anyOf"]
+        }
+
+        assert set(branches) == {"set_volume", "launch_app", "general_chat"}
+        assert branches["set_volume"]["properties"]["level"]["maximum"] == 100
+        assert branches["set_volume"]["additionalProperties"] is False
+        assert branches["launch_app"] == {"type": "object"}
+
+    def test_free_text_not_sized_from_query(self):
+        """Test a short query doesn't cut off unbounded string parameters."""
+        router = self._router()
+        router.route("hi")
+
+        assert router._ollama.last_request["options"]["num_predict"] == SemanticRouter.MAX_ROUTING_TOKENS
+
+    def test_num_predict_sized_from_field_lengths(self):
+        """Test tools whose strings have a maxLength get a tighter limit, dictated text the whole budget."""
+        registry = ToolRegistry()
+        for tool in (
+            VolumeTool(), BrightnessTool(), AppLauncherTool(),
+            ExcelReaderTool(), ScreenCaptureTool(), VisionTool(), ChatTool(), BrowserTool(),
+        ):
+            registry.register_tool(tool)
+        router = SemanticRouter(registry, use_fast_path=False)
+        router._ollama = _RecordingOllama({"tool_name": "set_volume", "parameters": {"level": 5}})
+        router.route("hi")
+
+        num_predict = router._ollama.last_request["options"]["num_predict"]
+        assert 0 < num_predict < SemanticRouter.MAX_ROUTING_TOKENS
+
+        # A document's text is unbounded, so it isn't cut short
+        registry.register_tool(WordWriterTool())
+        router.route("hi")
+        assert router._ollama.last_request["options"]["num_predict"] == SemanticRouter.MAX_ROUTING_TOKENS
+
+    def test_format_tracks_registry_version(self):
+        """Test the format is cached until a tool is registered."""
+        router = self._router()
+        fmt = router._get_routing_format()
+        assert router._get_routing_format() is fmt
+
+        router.registry.register_tool(_EchoTool("capture_screen"))
+        router.registry.register_tool(_EchoTool("analyze_image"))
+        names = [b["properties"]["tool_name"]["const"] for b in router._get_routing_format()["anyOf"]]
+
+        assert "visual_query" in names
+
+    def test_can_be_disabled(self):
+        """Test structured_output=False sends free-form requests."""
+        router = self._router(structured_output=False)
+        router.route("make it quieter")
+
+        request = router._ollama.last_request
+        assert "format" not in request
+        assert request["options"]["num_predict"] == SemanticRouter.MAX_ROUTING_TOKENS
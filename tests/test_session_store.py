@@ -0,0 +1,183 @@
+"""
+Tests for the multi-session store.
+"""
+
+import sqlite3
+
+import pytest
+
+from core.context_manager import ContextManager
+from core.session_store import SessionStore
+from core.summarizer import ConversationSummarizer
+
+
+def _joining_summarizer(previous, messages):
+    """Toy summary: the contents of every folded message, in order."""
+    return " | ".join(filter(None, [previous] + [m.content for m in messages]))
+
+
+class TestSessionStore:
+    """Tests for SessionStore."""
+
+    def test_sessions_are_isolated(self, tmp_path):
+        """Test sessions share a database but not history, data or search."""
+        store = SessionStore(tmp_path / "context.db")
+        alice = store.get("alice")
+        bob = store.get("bob")
+
+        alice.add_message("user", "book a flight to Lisbon")
+        alice.set("city", "Lisbon")
+        bob.add_message("user", "order a pizza")
+        bob.record_action("launch_app", "app_launcher", {"app_name": "browser"}, "ok", success=True)
+
+        assert [m.content for m in alice.get_messages()] == ["book a flight to Lisbon"]
+        assert bob.get("city") is None
+        assert bob.get_action_history() and not alice.get_action_history()
+        assert alice.search_messages("pizza") == []
+        assert [r["content"] for r in bob.search_messages("pizza")] == ["order a pizza"]
+
+        sessions = {s["session_id"]: s["messages"] for s in store.list_sessions()}
+        assert sessions == {"alice": 1, "bob": 1}
+        store.close()
+
+    def test_lru_eviction_and_rehydration(self, tmp_path):
+        """Test cold sessions leave memory and come back from disk intact."""
+        store = SessionStore(tmp_path / "context.db", max_resident=2, max_context_messages=3)
+        first = store.get("s1")
+        for i in range(5):
+            first.add_message("user", f"message {i}")
+        first.set("volume", 40)
+        del first
+        store.get("s2")
+        store.get("s1")  # s1 is now most recent
+        store.get("s3")
+
+        assert "s2" not in store and "s1" in store
+        assert len(store) == 2
+        assert store.stats.evictions == 1
+
+        store.get("s3")
+        store.get("s4")  # evicts s1
+        assert "s1" not in store
+
+        again = store.get("s1")
+        assert [m.content for m in again.get_messages()] == ["message 2", "message 3", "message 4"]
+        assert again.get("volume") == 40
+        assert store.stats.hits == 2
+        assert store.stats.rehydrations == 5
+        store.close()
+
+    def test_evicted_session_in_use_stays_writable(self, tmp_path):
+        """Test a caller's evicted manager keeps persisting and is handed back."""
+        store = SessionStore(tmp_path / "context.db", max_resident=1)
+        alice = store.get("alice")
+        store.get("bob")
+        assert "alice" not in store
+
+        alice.add_message("user", "still here")
+        alice.record_action("set_volume", "volume_control", {"level": 30}, "ok", success=True)
+        store.flush()
+        assert {s["session_id"]: s["messages"] for s in store.list_sessions()} == {"alice": 1}
+
+        assert store.get("alice") is alice
+        assert store.stats.rehydrations == 2
+        store.close()
+
+    def test_summaries_are_per_session(self, tmp_path):
+        """Test each session summarizes and stores only its own evictions."""
+        made = []
+
+        def factory():
+            made.append(ConversationSummarizer(_joining_summarizer, span_size=1))
+            return made[-1]
+
+        store = SessionStore(
+            tmp_path / "context.db", max_context_messages=2, summarizer_factory=factory
+        )
+        alice = store.get("alice")
+        bob = store.get("bob")
+        for i in range(3):
+            alice.add_message("user", f"alice-{i}")
+            bob.add_message("user", f"bob-{i}")
+        assert all(s.flush(timeout=5) for s in made)
+        store.flush()
+
+        assert alice.summarizer is not bob.summarizer
+        assert alice.get_summary() == "alice-0"
+        assert bob.get_summary() == "bob-0"
+        rows = store._root._db.execute("SELECT session_id, summary FROM summaries").fetchall()
+        assert sorted(rows) == [("alice", "alice-0"), ("bob", "bob-0")]
+        store.close()
+
+    def test_summarizer_closed_on_eviction(self, tmp_path):
+        """Test an evicted session's summarizer stops and a returning one gets a new one."""
+        made = []
+
+        def factory():
+            made.append(ConversationSummarizer(_joining_summarizer, span_size=1))
+            return made[-1]
+
+        store = SessionStore(tmp_path / "context.db", max_resident=1, summarizer_factory=factory)
+        alice = store.get("alice")
+        first = alice.summarizer
+        store.get("bob")
+        assert alice.summarizer is None
+        assert not first._thread.is_alive()
+
+        assert store.get("alice") is alice
+        assert alice.summarizer is made[-1] and alice.summarizer is not first
+        store.close()
+        assert not any(s._thread.is_alive() for s in made)
+
+    def test_shared_summarizer_rejected(self, tmp_path):
+        """Test one summarizer object can't be handed to every session."""
+        summarizer = ConversationSummarizer(_joining_summarizer)
+        with pytest.raises(ValueError):
+            SessionStore(tmp_path / "context.db", summarizer=summarizer)
+        summarizer.close()
+
+    def test_delete_session(self, tmp_path):
+        """Test deleting a session removes its rows only."""
+        store = SessionStore(tmp_path / "context.db")
+        store.get("keep").add_message("user", "hello")
+        store.get("drop").add_message("user", "goodbye")
+        store.delete_session("drop")
+
+        assert "drop" not in store
+        assert [s["session_id"] for s in store.list_sessions()] == ["keep"]
+        assert store.get("drop").get_messages() == []
+        store.close()
+
+    def test_invalid_arguments(self, tmp_path):
+        """Test empty session ids and sizes are rejected."""
+        with pytest.raises(ValueError):
+            SessionStore(tmp_path / "context.db", max_resident=0)
+        store = SessionStore(tmp_path / "context.db")
+        with pytest.raises(ValueError):
+            store.get("")
+        store.close()
+
+    def test_old_database_becomes_default_session(self, tmp_path):
+        """Test a pre-session database is migrated into the default session."""
+        path = tmp_path / "old.db"
+        with sqlite3.connect(str(path)) as db:
+            db.executescript("""
+                CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT, role TEXT NOT NULL,
+                    content TEXT NOT NULL, timestamp TEXT NOT NULL, metadata TEXT);
+                CREATE TABLE session_data (key TEXT PRIMARY KEY, value TEXT NOT NULL,
+                    updated_at TEXT NOT NULL);
+                INSERT INTO messages (role, content, timestamp)
+                    VALUES ('user', 'remember the milk', '2026-01-01T00:00:00');
+                INSERT INTO session_data VALUES ('theme', '"dark"', '2026-01-01T00:00:00');
+            """)
+
+        ctx = ContextManager(persistence_path=path)
+        ctx.rehydrate()
+        assert [m.content for m in ctx.get_messages()] == ["remember the milk"]
+        assert ctx.get("theme") == "dark"
+        ctx.close()
+
+        store = SessionStore(path)
+        assert store.get("default").get("theme") == "dark"
+        assert store.get("other").get("theme") is None
+        store.close()
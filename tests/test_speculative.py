@@ -0,0 +1,127 @@
+"""
+Tests for speculative chat generation alongside routing.
+"""
+
+import time
+
+from app.core.registry import ToolRegistry
+from app.core.router import SemanticRouter
+from app.core.speculative import SpeculativeChat
+from app.interfaces.tool import BaseTool
+
+
+class _SlowChatTool(BaseTool):
+    """Chat stand-in emitting one token every few milliseconds."""
+
+    def __init__(self, tokens: int = 20, delay: float = 0.01):
+        self.tokens = tokens
+        self.delay = delay
+        self.calls = []
+
+    @property
+    def name(self) -> str:
+        return "general_chat"
+
+    @property
+    def description(self) -> str:
+        return "Chats."
+
+    def _run(self, query: str, cancel_event=None, **kwargs):
+        self.calls.append(cancel_event is not None)
+        generated = 0
+        for _ in range(self.tokens):
+            if cancel_event is not None and cancel_event.is_set():
+                return {"response": "", "tokens": generated, "cancelled": True}
+            time.sleep(self.delay)
+            generated += 1
+        return {"response": f"reply to {query}", "tokens": generated, "cancelled": False}
+
+
+class _VolumeTool(_SlowChatTool):
+    """Volume stand-in so the fast path has a tool to route to."""
+
+    @property
+    def name(self) -> str:
+        return "set_volume"
+
+
+class _DelayedOllama:
+    """Ollama stand-in that takes a while to route."""
+
+    def __init__(self, tool_name: str, delay: float):
+        self.tool_name = tool_name
+        self.delay = delay
+
+    def chat(self, **kwargs):
+        time.sleep(self.delay)
+        return {"message": {"content": f'{{"tool_name": "{self.tool_name}", "parameters": {{}}}}'}}
+
+
+class TestSpeculativeChat:
+    """Tests for SpeculativeChat."""
+
+    def test_reply_overlaps_routing(self):
+        """Test a chat decision reuses the reply started during routing."""
+        chat = _SlowChatTool(tokens=10, delay=0.02)
+        speculative = SpeculativeChat(chat)
+        router = SemanticRouter(ToolRegistry(), use_fast_path=False, structured_output=False)
+        router._ollama = _DelayedOllama("general_chat", delay=0.2)
+
+        started = time.perf_counter()
+        speculation = speculative.prepare("hello")
+        decision = router.route("hello", before_llm=speculation.start)
+        result = speculation.result()
+        elapsed = time.perf_counter() - started
+
+        assert decision["tool_name"] == "general_chat"
+        assert result.data["response"] == "reply to hello"
+        # Sequential would be 0.2s routing + 0.2s chat
+        assert elapsed < 0.35
+        assert speculative.stats.used == 1
+        assert speculative.stats.used_tokens == 10
+        assert speculative.stats.head_start > 0.15
+
+    def test_cancelled_when_tool_picked(self):
+        """Test the speculation is cancelled and its tokens counted as waste."""
+        chat = _SlowChatTool(tokens=100, delay=0.01)
+        speculative = SpeculativeChat(chat)
+        speculation = speculative.prepare("mute")
+
+        speculation.start()
+        time.sleep(0.05)
+        speculation.cancel()
+        speculative.shutdown()
+        deadline = time.time() + 2
+        while speculative.stats.cancelled == 0 and time.time() < deadline:
+            time.sleep(0.01)
+
+        stats = speculative.stats
+        assert stats.cancelled == 1
+        assert 0 < stats.wasted_tokens < 100
+        assert stats.waste_rate == 1.0
+
+    def test_not_started_without_llm(self):
+        """Test commands resolved locally never launch a speculation."""
+        chat = _SlowChatTool()
+        speculative = SpeculativeChat(chat)
+        registry = ToolRegistry()
+        registry.register_tool(_VolumeTool())
+        router = SemanticRouter(registry)
+
+        speculation = speculative.prepare("volume 40")
+        decision = router.route("volume 40", before_llm=speculation.start)
+        speculation.cancel()
+
+        assert decision["source"] == "fast_path"
+        assert not speculation.started
+        assert speculative.stats.launched == 0
+
+    def test_result_without_start_runs_inline(self):
+        """Test result() still answers when routing never reached the LLM."""
+        chat = _SlowChatTool(tokens=2)
+        speculation = SpeculativeChat(chat).prepare("hi")
+
+        result = speculation.result()
+
+        assert result.data["response"] == "reply to hi"
+        assert chat.calls == [False]
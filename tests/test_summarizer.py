@@ -0,0 +1,123 @@
+"""
+Tests for background rolling summarization of conversation history.
+"""
+
+import threading
+
+from core.context_manager import ContextManager
+from core.llm_engine import LLMEngine
+from core.summarizer import ConversationSummarizer, make_llm_summarizer
+
+
+def _joining_summarizer(previous, messages):
+    """Toy summary: the contents of every folded message, in order."""
+    return " | ".join(filter(None, [previous] + [m.content for m in messages]))
+
+
+class TestConversationSummarizer:
+    """Tests for ConversationSummarizer and its ContextManager integration."""
+
+    def test_evicted_messages_summarized(self):
+        """Test messages leaving the window end up in the summary and context."""
+        summarizer = ConversationSummarizer(_joining_summarizer, span_size=2)
+        ctx = ContextManager(max_context_messages=3, summarizer=summarizer)
+
+        for i in range(7):
+            ctx.add_message("user", f"m{i}")
+        assert summarizer.flush(timeout=5)
+
+        assert ctx.get_summary() == "m0 | m1 | m2 | m3"
+        assert [m.content for m in ctx.get_messages()] == ["m4", "m5", "m6"]
+        assert "## Earlier Conversation\nm0 | m1 | m2 | m3" in ctx.build_context()
+        assert summarizer.stats.messages == 4
+        summarizer.close()
+
+    def test_summary_off_request_path(self):
+        """Test add_message doesn't wait for a slow summary."""
+        release = threading.Event()
+
+        def slow(previous, messages):
+            release.wait(5)
+            return "summary"
+
+        summarizer = ConversationSummarizer(slow, span_size=1)
+        ctx = ContextManager(max_context_messages=1, summarizer=summarizer)
+        for i in range(5):
+            ctx.add_message("user", f"m{i}")
+
+        assert ctx.get_summary() == ""
+        release.set()
+        assert summarizer.flush(timeout=5)
+        assert ctx.get_summary() == "summary"
+        summarizer.close()
+
+    def test_failed_span_retried_with_next(self):
+        """Test a failed span is folded in together with the following one."""
+        attempts = []
+
+        def flaky(previous, messages):
+            attempts.append([m.content for m in messages])
+            if len(attempts) == 1:
+                raise RuntimeError("model offline")
+            return _joining_summarizer(previous, messages)
+
+        summarizer = ConversationSummarizer(flaky, span_size=2)
+        ctx = ContextManager(max_context_messages=1, summarizer=summarizer)
+        for i in range(5):
+            ctx.add_message("user", f"m{i}")
+        assert summarizer.flush(timeout=5)
+
+        assert attempts == [["m0", "m1"], ["m0", "m1", "m2", "m3"]]
+        assert ctx.get_summary() == "m0 | m1 | m2 | m3"
+        assert summarizer.stats.failures == 1
+        summarizer.close()
+
+    def test_carry_bounded_while_failing(self):
+        """Test repeated failures don't grow the retried prompt without limit."""
+        sizes = []
+
+        def offline(previous, messages):
+            sizes.append(sum(len(m.content) for m in messages))
+            raise RuntimeError("model offline")
+
+        summarizer = ConversationSummarizer(offline, span_size=2, max_carry_tokens=40)
+        ctx = ContextManager(max_context_messages=1, summarizer=summarizer)
+        for i in range(41):
+            ctx.add_message("user", f"message number {i:03d}")
+        assert summarizer.flush(timeout=5)
+
+        assert summarizer.stats.failures == 20
+        assert max(sizes) == sizes[-1] < 200
+        assert [m.content for m in summarizer._carry][-1] == "message number 039"
+        assert summarizer.stats.dropped > 0
+        summarizer.close()
+
+    def test_summary_persisted(self, tmp_path):
+        """Test the summary survives a restart."""
+        db = tmp_path / "context.db"
+        summarizer = ConversationSummarizer(_joining_summarizer, span_size=1)
+        ctx = ContextManager(max_context_messages=1, persistence_path=db, summarizer=summarizer)
+        ctx.add_message("user", "my name is Sam")
+        ctx.add_message("user", "hello")
+        assert summarizer.flush(timeout=5)
+        summarizer.close()
+
+        restored = ConversationSummarizer(_joining_summarizer)
+        ctx = ContextManager(persistence_path=db, summarizer=restored)
+        assert ctx.get_summary() == "my name is Sam"
+        restored.close()
+
+    def test_llm_summarizer(self, fake_ollama):
+        """Test the LLM summarizer sends the previous summary and transcript."""
+        fake_ollama.reply = "User is Sam."
+        summarize = make_llm_summarizer(LLMEngine(host=fake_ollama.url))
+        summarizer = ConversationSummarizer(summarize, span_size=1, summary="Earlier notes.")
+        ctx = ContextManager(max_context_messages=1, summarizer=summarizer)
+        ctx.add_message("user", "my name is Sam")
+        ctx.add_message("assistant", "Hi Sam")
+        assert summarizer.flush(timeout=5)
+
+        prompt = fake_ollama.requests[0][1]["prompt"]
+        assert "Earlier notes." in prompt and "user: my name is Sam" in prompt
+        assert ctx.get_summary() == "User is Sam."
+        summarizer.close()
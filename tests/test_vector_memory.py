@@ -0,0 +1,149 @@
+"""
+Tests for the SQLite-backed vector memory.
+"""
+
+import numpy as np
+import pytest
+
+from core.context_manager import ContextManager
+from core.llm_engine import LLMEngine
+from core.session_store import SessionStore
+from core.vector_memory import VectorMemory
+
+
+def _no_embedding(texts):
+    raise AssertionError("nothing should be embedded")
+
+
+class TestVectorMemory:
+    """Tests for VectorMemory."""
+
+    def test_sync_is_incremental(self, fake_ollama, tmp_path):
+        """Test sync embeds only rows stored since the previous sync."""
+        ctx = ContextManager(persistence_path=tmp_path / "context.db", write_behind=True)
+        ctx.add_message("user", "set the volume to 20")
+        ctx.add_message("user", "open chrome")
+        ctx.record_action("launch_app", "launcher", {"app_name": "notepad"}, "ok", success=True)
+
+        memory = VectorMemory.from_context(ctx, LLMEngine(host=fake_ollama.url).embed)
+        assert memory.sync() == 3
+        assert memory.sync() == 0
+
+        ctx.add_message("user", "search the weather")
+        assert memory.sync() == 1
+        assert len(memory) == 4
+
+        hits = memory.search("weather search", k=2)
+        assert hits[0].text == "user: search the weather"
+        assert hits[0].source == "message"
+        assert memory.search("notepad", k=1, source="action")[0].source == "action"
+        memory.close()
+        ctx.close()
+
+    def test_search_scoped_to_session(self, fake_ollama, tmp_path):
+        """Test a session's memory recalls only that session's rows."""
+        store = SessionStore(tmp_path / "context.db")
+        alice = store.get("alice")
+        bob = store.get("bob")
+        for i in range(3):
+            alice.add_message("user", f"alice-secret-{i}")
+        bob.add_message("user", "bob note")
+        embed = LLMEngine(host=fake_ollama.url).embed
+
+        memory = VectorMemory.from_context(bob, embed)
+        assert memory.sync() == 4
+        assert [h.text for h in memory.search("alice-secret-0", k=5)] == ["user: bob note"]
+        assert {h.text for h in memory.search("secret", k=5, session_id="alice")} == {
+            f"user: alice-secret-{i}" for i in range(3)
+        }
+        assert memory.search("secret", k=5, session_id="carol") == []
+        memory.close()
+
+        # Without a context every session is searched, and sessions survive a reopen
+        reopened = VectorMemory(tmp_path / "context.db", _no_embedding)
+        assert len(reopened.search_vector(np.ones(reopened.dim), k=10)) == 4
+        assert len(reopened.search_vector(np.ones(reopened.dim), k=10, session_id="bob")) == 1
+        reopened.close()
+        store.close()
+
+    def test_deleted_session_forgotten(self, fake_ollama, tmp_path):
+        """Test deleting a session removes its vectors, also from an open store."""
+        store = SessionStore(tmp_path / "context.db")
+        alice = store.get("alice")
+        bob = store.get("bob")
+        alice.add_message("user", "alice-secret")
+        bob.add_message("user", "bob note")
+        alice.add_message("user", "alice-other")
+        store.flush()
+
+        memory = VectorMemory(tmp_path / "context.db", LLMEngine(host=fake_ollama.url).embed)
+        assert memory.sync() == 3
+        store.delete_session("alice")
+
+        everyone = memory.search("secret", k=10)
+        assert [h.text for h in everyone] == ["user: bob note"]
+        assert memory.sync() == 0
+        memory.add(["a note"], session_id="bob")
+        assert {h.text for h in memory.search("note", k=10)} == {"user: bob note", "a note"}
+        memory.close()
+
+        reopened = VectorMemory(tmp_path / "context.db", _no_embedding)
+        assert len(reopened) == 2
+        assert len(reopened.search_vector(np.ones(reopened.dim), k=10)) == 2
+        reopened.close()
+        store.close()
+
+    def test_reopen_uses_mirror(self, tmp_path):
+        """Test a reopened store searches without re-embedding, even if the mirror is lost."""
+        rng = np.random.default_rng(1)
+        vectors = rng.normal(size=(50, 16)).astype(np.float32)
+        db = tmp_path / "memory.db"
+
+        memory = VectorMemory(db, _no_embedding)
+        memory.add([f"note {i}" for i in range(50)], vectors=vectors)
+        expected = [h.text for h in memory.search_vector(vectors[7], k=3)]
+        memory.close()
+
+        reopened = VectorMemory(db, _no_embedding)
+        assert isinstance(reopened.matrix, np.memmap)
+        assert [h.text for h in reopened.search_vector(vectors[7], k=3)] == expected
+        assert expected[0] == "note 7"
+        reopened.close()
+
+        # A mirror out of step with SQLite (e.g. a crash mid-append) is regenerated
+        reopened.matrix_path.write_bytes(b"\0" * 12)
+        rebuilt = VectorMemory(db, _no_embedding)
+        assert [h.text for h in rebuilt.search_vector(vectors[7], k=3)] == expected
+        rebuilt.close()
+
+    def test_dimension_mismatch(self, tmp_path):
+        """Test vectors of a different size are rejected."""
+        memory = VectorMemory(tmp_path / "memory.db", _no_embedding)
+        memory.add(["a"], vectors=[[1.0, 0.0]])
+        with pytest.raises(ValueError):
+            memory.add(["b"], vectors=[[1.0, 0.0, 0.0]])
+        memory.close()
+
+    def test_ivf_past_threshold(self, tmp_path):
+        """Test a large store switches to the IVF index and keeps it updated."""
+        rng = np.random.default_rng(0)
+        centers = rng.normal(size=(20, 32))
+        labels = rng.integers(0, 20, size=2000)
+        vectors = (centers[labels] + rng.normal(scale=0.05, size=(2000, 32))).astype(np.float32)
+
+        memory = VectorMemory(tmp_path / "memory.db", _no_embedding, ivf_threshold=1000, nlist=20, nprobe=3)
+        memory.add([f"v{i}" for i in range(1000)], vectors=vectors[:1000])
+        assert memory._ivf is not None
+        memory.add([f"v{i}" for i in range(1000, 1500)], vectors=vectors[1000:1500])
+        assert memory._ivf.size == 1500
+
+        exact = VectorMemory(tmp_path / "exact.db", _no_embedding)
+        exact.add([f"v{i}" for i in range(1500)], vectors=vectors[:1500])
+        assert exact._ivf is None
+
+        for i in (3, 1200, 1499):
+            approx = memory.search_vector(vectors[i], k=5)
+            assert approx[0].text == f"v{i}"
+            assert {h.text for h in approx} == {h.text for h in exact.search_vector(vectors[i], k=5)}
+        memory.close()
+        exact.close()
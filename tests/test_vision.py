@@ -0,0 +1,175 @@
+"""
+Tests for screen frame processing in perception.vision.
+"""
+
+from io import BytesIO
+from types import SimpleNamespace
+
+import numpy as np
+from PIL import Image
+
+from perception import vision
+from perception.vision import (
+    CaptureRegion,
+    FrameDiffer,
+    ScreenCapture,
+    Screenshot,
+    VisionProcessor,
+    encode_for_llm,
+    frame_to_image,
+)
+
+
+def _frame(width=64, height=32):
+    """BGRA frame: blue left half, red right half."""
+    frame = np.zeros((height, width, 4), dtype=np.uint8)
+    frame[:, : width // 2] = (255, 0, 0, 255)
+    frame[:, width // 2:] = (0, 0, 255, 255)
+    return frame.tobytes()
+
+
+class TestFrameEncoding:
+    """Tests for the in-memory frame to JPEG path."""
+
+    def test_frame_to_image_swaps_channels(self):
+        """Test BGRA bytes become an RGB image without a PNG round trip."""
+        image = frame_to_image(_frame(), (64, 32))
+        assert image.mode == "RGB"
+        assert image.getpixel((0, 0)) == (0, 0, 255)
+        assert image.getpixel((63, 0)) == (255, 0, 0)
+
+    def test_encode_downscales_to_jpeg(self):
+        """Test the encoding keeps the aspect ratio within max_resolution."""
+        jpeg = encode_for_llm(frame_to_image(_frame(), (64, 32)), max_resolution=(16, 16))
+        decoded = Image.open(BytesIO(jpeg))
+        assert decoded.format == "JPEG"
+        assert decoded.size == (16, 8)
+
+    def test_processor_frame_matches_image_path(self):
+        """Test process_frame encodes like process_image, without capturing."""
+        processor = VisionProcessor(max_resolution=(32, 32), quality=70)
+        image = frame_to_image(_frame(), (64, 32))
+        png = BytesIO()
+        image.save(png, format="PNG")
+
+        assert processor.process_frame(_frame(), (64, 32)) == processor.process_image(png.getvalue())
+        assert processor._capture is None
+
+
+class TestFrameDiffer:
+    """Tests for tile-level change detection."""
+
+    def test_first_frame_and_identical_frames(self):
+        """Test the first frame is fully dirty and an unchanged one is clean."""
+        differ = FrameDiffer(tile_size=16)
+        frame = np.zeros((40, 50, 4), dtype=np.uint8)
+
+        assert differ.update(frame.tobytes(), (50, 40)) == [CaptureRegion(0, 0, 50, 40)]
+        assert differ.update(frame.tobytes(), (50, 40)) == []
+
+    def test_dirty_rectangles(self):
+        """Test changed tiles merge into rectangles clipped to the frame."""
+        differ = FrameDiffer(tile_size=16)
+        frame = np.zeros((40, 50, 4), dtype=np.uint8)
+        differ.update(frame.tobytes(), (50, 40))
+
+        frame[5, 5] = 255  # tile (0, 0)
+        frame[20:39, 40:49] = 255  # tiles (1, 2) and (2, 2), clipped edge
+        regions = differ.update(frame.tobytes(), (50, 40))
+        assert regions == [CaptureRegion(0, 0, 16, 16), CaptureRegion(32, 16, 18, 24)]
+
+    def test_tolerance_ignores_noise(self):
+        """Test small per-channel differences are ignored with a tolerance."""
+        differ = FrameDiffer(tile_size=8, tolerance=4)
+        frame = np.full((16, 16, 4), 100, dtype=np.uint8)
+        differ.update(frame.tobytes(), (16, 16))
+
+        frame[:, :, :3] += 3
+        assert differ.update(frame.tobytes(), (16, 16)) == []
+        frame[12, 12, 2] += 20
+        assert differ.update(frame.tobytes(), (16, 16)) == [CaptureRegion(8, 8, 8, 8)]
+
+
+class _FakeGrab:
+    def __init__(self, frame):
+        self.raw = bytearray(frame.tobytes())
+        self.height, self.width = frame.shape[:2]
+        self.size = (self.width, self.height)
+
+
+class _FakeMSS:
+    monitors = [{}, {"left": 0, "top": 0, "width": 32, "height": 32}]
+
+    def __init__(self):
+        self.frame = np.zeros((32, 32, 4), dtype=np.uint8)
+
+    def grab(self, monitor):
+        return _FakeGrab(self.frame)
+
+    def close(self):
+        pass
+
+
+class TestCaptureChanges:
+    """Tests for ScreenCapture's continuous mode."""
+
+    def test_reports_changes_per_frame(self, monkeypatch):
+        """Test unchanged frames skip encoding and changes carry a screenshot."""
+        monkeypatch.setattr(vision, "mss", SimpleNamespace(mss=_FakeMSS))
+        capture = ScreenCapture(tile_size=16)
+
+        first = capture.capture_changes()
+        assert first.changed and first.changed_fraction == 1.0
+        assert first.screenshot is not None
+
+        idle = capture.capture_changes()
+        assert not idle.changed and idle.screenshot is None
+
+        capture._sct.frame[20, 20] = 255
+        changed = capture.capture_changes()
+        assert changed.regions == [CaptureRegion(16, 16, 16, 16)]
+        assert changed.changed_fraction == 0.25
+        assert changed.screenshot.pixels[20, 20, 0] == 255
+
+    def test_min_change_keeps_reference(self, monkeypatch):
+        """Test frames below min_change are diffed against the last kept frame."""
+        monkeypatch.setattr(vision, "mss", SimpleNamespace(mss=_FakeMSS))
+        capture = ScreenCapture(tile_size=16)
+        capture.capture_changes()
+
+        capture._sct.frame[0, 0] = 255
+        small = capture.capture_changes(min_change=0.5)
+        assert small.changed and small.screenshot is None
+
+        capture._sct.frame[0, 20] = 255
+        kept = capture.capture_changes(min_change=0.5)
+        assert kept.changed_fraction == 0.5 and kept.screenshot is not None
+        assert not capture.capture_changes(min_change=0.5).changed
+
+
+class TestScreenshot:
+    """Tests for Screenshot's raw buffer and lazy encodings."""
+
+    def test_pixels_share_the_buffer(self):
+        """Test the NumPy view is zero-copy and nothing is encoded up front."""
+        raw = bytearray(_frame())
+        shot = Screenshot(bgra=raw, width=64, height=32, timestamp=None)
+
+        assert shot.pixels.shape == (32, 64, 4)
+        assert np.shares_memory(shot.pixels, np.frombuffer(raw, dtype=np.uint8))
+        assert tuple(shot.pixels[0, 0, :3]) == (255, 0, 0)
+        assert shot._encoded == {}
+
+    def test_encodings_cached(self):
+        """Test PNG, JPEG and base64 are computed once and reused."""
+        shot = Screenshot(bgra=_frame(), width=64, height=32, timestamp=None)
+
+        png = shot.image_bytes
+        assert Image.open(BytesIO(png)).getpixel((0, 0)) == (0, 0, 255)
+        assert shot.png is png
+        assert shot.to_base64() is shot.to_base64()
+
+        jpeg = shot.jpeg(max_resolution=(32, 32))
+        assert shot.jpeg(max_resolution=(32, 32)) is jpeg
+        assert Image.open(BytesIO(jpeg)).size == (32, 16)
+        assert shot.jpeg() is not jpeg
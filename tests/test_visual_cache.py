@@ -0,0 +1,104 @@
+"""
+Tests for the visual answer cache.
+"""
+
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from app.services.ai.vision import VisionTool
+from core.visual_cache import VisualAnswerCache, dhash, hamming, normalize_question
+from utils.config import VisionConfig, _parse_config
+
+
+def _screen(window_x=100, cursor=False, text=False, fmt="JPEG") -> bytes:
+    """A desktop-like screenshot: a dark window on a light background."""
+    frame = np.full((540, 960, 3), 220, dtype=np.uint8)
+    frame[100:400, window_x:window_x + 400] = (40, 40, 60)
+    frame[120:130, window_x + 20:window_x + 300] = (200, 200, 200)
+    if cursor:
+        frame[300:318, 700:702] = 0
+    if text:
+        frame[200:208, window_x + 20:window_x + 380:3] = (200, 200, 200)
+    buffer = BytesIO()
+    Image.fromarray(frame).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class TestVisualAnswerCache:
+    """Tests for dhash and VisualAnswerCache."""
+
+    def test_hash_tolerates_small_changes(self):
+        """Test a blinking cursor barely moves the hash; a moved window does."""
+        base = dhash(_screen())
+        assert hamming(base, dhash(_screen(cursor=True))) <= 4
+        assert hamming(base, dhash(_screen(fmt="PNG"))) <= 4
+        assert hamming(base, dhash(_screen(window_x=500))) > 20
+
+    def test_hit_on_same_frame_and_question(self):
+        """Test lookups match the same frame and rephrased whitespace/case."""
+        cache = VisualAnswerCache()
+        cache.put(cache.frame_hash(_screen()), "What's on my screen?", "A dark window.", "vision")
+
+        same = cache.frame_hash(_screen())
+        assert cache.get(same, "  what's on my   SCREEN ", "vision") == "A dark window."
+        assert cache.get(same, "what's on my screen", "other-model") is None
+        assert cache.get(same, "is there an error?", "vision") is None
+        assert cache.stats.hits == 1 and cache.stats.misses == 2
+        assert normalize_question("Read it!") == "read it"
+
+    def test_exact_match_by_default(self):
+        """Test a changed line of text misses even though dHash can't see it."""
+        cache = VisualAnswerCache()
+        cache.put(cache.frame_hash(_screen()), "what does the error say", "No error.")
+
+        assert cache.get(cache.frame_hash(_screen(text=True)), "what does the error say") is None
+        assert cache.get(cache.frame_hash(_screen(cursor=True)), "what does the error say") is None
+
+    def test_fuzzy_match_is_opt_in(self):
+        """Test max_distance lets near-identical frames share an answer."""
+        cache = VisualAnswerCache(max_distance=8)
+        cache.put(cache.frame_hash(_screen()), "what's on my screen", "A dark window.")
+
+        assert cache.get(cache.frame_hash(_screen(cursor=True)), "what's on my screen") == "A dark window."
+        assert cache.get(cache.frame_hash(_screen(window_x=500)), "what's on my screen") is None
+
+    def test_from_config(self):
+        """Test the cache is on with exact matching by default and fuzzy matching is opt-in."""
+        default = VisionConfig()
+        assert default.answer_cache
+        assert VisualAnswerCache.from_config(default).max_distance is None
+
+        config = _parse_config({"vision": {"answer_cache_max_distance": 6}}).vision
+        assert VisualAnswerCache.from_config(config).max_distance == 6
+
+    def test_ttl_and_eviction(self):
+        """Test answers expire and the cache stays bounded."""
+        cache = VisualAnswerCache(ttl=0.0)
+        frame = cache.frame_hash(_screen())
+        cache.put(frame, "q", "a")
+        assert cache.get(frame, "q") is None
+        assert cache.stats.expirations == 1 and len(cache) == 0
+
+        cache = VisualAnswerCache(max_entries=2, ttl=None)
+        for i in range(3):
+            cache.put(frame, f"question {i}", "a")
+        assert len(cache) == 2
+        assert cache.get(frame, "question 0") is None
+        assert cache.get(frame, "question 2") == "a"
+
+        # Re-answering the same screen replaces the old entry
+        cache.put(frame, "question 2", "b")
+        assert len(cache) == 2 and cache.get(frame, "question 2") == "b"
+
+    def test_vision_tool_answers_from_cache(self):
+        """Test VisionTool skips the model when the cache has the answer."""
+        cache = VisualAnswerCache()
+        tool = VisionTool(model="vision", cache=cache)
+        cache.put(cache.frame_hash(_screen()), "what's on my screen", "A dark window.", "vision")
+
+        result = tool.execute(image_bytes=_screen(), query="What's on my screen?")
+        assert result.success
+        assert result.data["response"] == "A dark window."
+        assert result.data["cached"] is True
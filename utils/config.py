@@ -42,6 +42,10 @@ class VisionConfig:
     max_resolution: tuple = (1920, 1080)
     ocr_enabled: bool = True
     ocr_backend: str = "tesseract"
+    background_capture: bool = False
+    capture_min_change: float = 0.005
+    answer_cache: bool = True
+    answer_cache_max_distance: Optional[int] = None
 
 
 @dataclass
@@ -247,6 +251,10 @@ vision:
   max_resolution: [1920, 1080]
   ocr_enabled: true
   ocr_backend: "tesseract"  # tesseract, easyocr
+  background_capture: false  # sample the screen for visual queries (CPU while the screen changes)
+  capture_min_change: 0.005  # fraction of the screen that must change to store a frame (skips a caret or clock)
+  answer_cache: true  # answer a repeated question about an identical screen without the model
+  answer_cache_max_distance: null  # also match frames within this many dHash bits (blind to text changes)
 
 # Logging
 logging: